@@ -13,6 +13,7 @@ from alembic.config import Config
 from config import config
 from app.extensions import db, jwt, scheduler, migrate
 from app.tasks import register_scheduled_tasks
+from app.jobs import init_job_queue
 
 
 logger = logging.getLogger(__name__)
@@ -60,6 +61,9 @@ def create_app(config_name='default'):
     # 注册定时任务
     register_scheduled_tasks()
     
+    # 启用后台任务队列（工作线程在处理第一个请求时启动）
+    init_job_queue(app)
+    
     return app
 
 
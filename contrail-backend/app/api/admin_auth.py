@@ -2,11 +2,12 @@
 管理员认证相关 API
 提供管理员登录、信息查询等功能
 """
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask import Blueprint
 from app.extensions import db
 from app.models import AdminUser
 from app.utils.rsa_utils import get_rsa_utils
+from app.utils.permission import build_admin_scope_claims
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 
 # 创建管理员 API 蓝图，前缀为 /api/admin
@@ -60,17 +61,21 @@ def admin_login():
     if not admin or not admin.check_password(password):
         return jsonify({'error': '用户名或密码错误'}), 401
     
+    # 获取管理的部门ID列表
+    managed_departments = admin.managed_departments.all()
+    department_ids = [dept.id for dept in managed_departments]
+    
     # 生成 JWT Token
     # identity 存 admin_id，additional_claims 中存入 role
+    # 开启 ADMIN_SCOPE_IN_JWT 时同时存入管理部门ID与权限版本号
+    claims = {'role': admin.role}
+    if current_app.config.get('ADMIN_SCOPE_IN_JWT'):
+        claims.update(build_admin_scope_claims(admin, department_ids))
     access_token = create_access_token(
         identity=admin.id,
-        additional_claims={'role': admin.role}
+        additional_claims=claims
     )
     
-    # 获取管理的部门ID列表
-    managed_departments = admin.managed_departments.all()
-    department_ids = [dept.id for dept in managed_departments]
-    
     return jsonify({
         'access_token': access_token,
         'admin': {
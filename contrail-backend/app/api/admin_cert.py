@@ -3,15 +3,20 @@
 提供证书列表查询、审核等功能
 需要管理员权限，普通管理员只能管理自己部门学生的证书
 """
+import base64
 from datetime import datetime
 from flask import request, jsonify
+from sqlalchemy import and_, case, or_, true
 from app.api.admin_auth import admin_bp
 from app.extensions import db
-from app.models import Certificate, User, AdminUser
-from app.utils.permission import get_admin_accessible_query
-from app.utils.s3_presign import presign_get_object_url
+from app.models import Certificate, User, Department
+from app.utils.permission import get_admin_department_filter, get_admin_scope
+from app.utils.s3_presign import presign_get_object_url, presign_many
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
+# 批量审核单次最多处理的证书数
+AUDIT_BATCH_MAX_ITEMS = 1000
+
 
 def check_admin_access_to_certificate(admin_id, certificate_id):
     """
@@ -24,8 +29,8 @@ def check_admin_access_to_certificate(admin_id, certificate_id):
     Returns:
         tuple: (has_access: bool, certificate: Certificate or None)
     """
-    admin = AdminUser.query.get(admin_id)
-    if not admin:
+    scope = get_admin_scope(admin_id)
+    if not scope:
         return False, None
     
     certificate = Certificate.query.get(certificate_id)
@@ -37,21 +42,29 @@ def check_admin_access_to_certificate(admin_id, certificate_id):
     if not student:
         return False, certificate
     
-    # 超级管理员可以操作所有证书
-    if admin.role == AdminUser.ROLE_SUPER:
-        return True, certificate
-    
-    # 普通管理员只能操作自己部门学生的证书
-    if not student.department_id:
-        return False, certificate
-    
-    managed_departments = admin.managed_departments.all()
-    managed_dept_ids = [dept.id for dept in managed_departments]
-    
-    if student.department_id in managed_dept_ids:
-        return True, certificate
-    
-    return False, certificate
+    # 超级管理员可以操作所有证书；普通管理员只能操作自己部门学生的证书
+    return scope.can_access_department(student.department_id), certificate
+
+
+def _encode_certificate_cursor(cert):
+    """将证书的 (upload_time, id) 编码为分页游标"""
+    raw = f"{cert.upload_time.isoformat()}|{cert.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_certificate_cursor(cursor):
+    """
+    解析分页游标
+
+    Returns:
+        tuple: (upload_time: datetime, cert_id: int)，游标无效时返回 None
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        upload_time_str, cert_id_str = raw.rsplit('|', 1)
+        return datetime.fromisoformat(upload_time_str), int(cert_id_str)
+    except (ValueError, UnicodeError):
+        return None
 
 
 @admin_bp.route('/certificates', methods=['GET'])
@@ -63,81 +76,100 @@ def list_certificates():
         - status: 审核状态（0待审, 1通过, 2驳回）
         - page: 页码（默认1）
         - per_page: 每页数量（默认20）
-    返回: { "total": n, "page": 1, "per_page": 20, "pages": n, "items": [...] }
+        - cursor: 分页游标（可选，取自上一页返回的 next_cursor）
+                  传入时按 (upload_time, id) 游标分页，忽略 page 且不统计 total，适合深度翻页的审核队列
+    返回: { "total": n, "page": 1, "per_page": 20, "pages": n, "items": [...], "next_cursor": "..." }
+          next_cursor 为空表示没有更多数据
     """
     admin_id = get_jwt_identity()
     status = request.args.get('status', type=int)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
     
-    # 获取基础查询（已根据权限过滤学生）
-    # 需要通过 User 表 join Certificate 表进行权限过滤
-    user_query = get_admin_accessible_query(User, admin_id)
+    if page < 1:
+        page = 1
+    if per_page < 1:
+        per_page = 20
     
-    # 获取有权限访问的学生ID列表
-    accessible_user_ids = [user.id for user in user_query.all()]
+    # 证书、学生、部门在同一条查询中取出；部门权限通过子查询在 SQL 中过滤
+    cert_query = db.session.query(
+        Certificate,
+        User.id, User.name, User.student_id, User.id_card_no,
+        Department
+    ).join(User, User.id == Certificate.user_id)\
+        .outerjoin(Department, Department.id == User.department_id)
     
-    if not accessible_user_ids:
-        # 如果没有可访问的学生，返回空结果
-        return jsonify({
-            'total': 0,
-            'page': page,
-            'per_page': per_page,
-            'pages': 0,
-            'items': []
-        }), 200
-    
-    # 构建证书查询，只查询有权限访问的学生的证书
-    cert_query = Certificate.query.filter(Certificate.user_id.in_(accessible_user_ids))
+    department_filter = get_admin_department_filter(User.department_id, admin_id)
+    if department_filter is not None:
+        cert_query = cert_query.filter(department_filter)
     
     # 状态筛选
     if status is not None:
         if status not in [Certificate.STATUS_PENDING, Certificate.STATUS_APPROVED, Certificate.STATUS_REJECTED]:
             return jsonify({'error': f'无效的状态: {status}，支持: 0(待审)/1(通过)/2(驳回)'}), 400
-        cert_query = cert_query.filter_by(status=status)
-    
-    # 分页查询
-    pagination = cert_query.order_by(Certificate.upload_time.desc()).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
+        cert_query = cert_query.filter(Certificate.status == status)
+    
+    total = None
+    pages = None
+    if cursor:
+        # 游标分页：取 (upload_time, id) 严格小于游标的记录
+        position = _decode_certificate_cursor(cursor)
+        if position is None:
+            return jsonify({'error': '无效的分页游标'}), 400
+        cursor_time, cursor_id = position
+        cert_query = cert_query.filter(or_(
+            Certificate.upload_time < cursor_time,
+            and_(Certificate.upload_time == cursor_time, Certificate.id < cursor_id)
+        ))
+        offset = 0
+    else:
+        total = cert_query.order_by(None).count()
+        pages = (total + per_page - 1) // per_page
+        offset = (page - 1) * per_page
+    
+    # 多取一条用于判断是否还有下一页
+    rows = cert_query.order_by(Certificate.upload_time.desc(), Certificate.id.desc())\
+        .offset(offset)\
+        .limit(per_page + 1)\
+        .all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
     
     # 构建返回数据
     items = []
     any_presign_failed = False
-    for cert in pagination.items:
-        # 获取学生信息
-        student = User.query.get(cert.user_id)
-        
+    # 本页所有证书图片一次批量签名
+    urls = presign_many(key for row in rows for key in (row[0].image_url, row[0].thumbnail_key))
+    for cert, student_id, student_name, student_no, id_card_no, department in rows:
         cert_dict = cert.to_dict()
         # 添加前端需要的字段
         cert_dict['certName'] = cert.name
         # 生成 Presigned URL
-        cert_dict['imgUrl'] = presign_get_object_url(cert.image_url)
+        cert_dict['imgUrl'] = urls.get(cert.image_url)
+        # 列表使用缩略图，未生成（PDF、任务未完成）时回退为原图
+        cert_dict['thumbUrl'] = urls.get(cert.thumbnail_key) or cert_dict['imgUrl']
         if cert_dict['imgUrl'] is None and cert.image_url:
             any_presign_failed = True
         
         # 添加学生信息
-        if student:
-            cert_dict['student'] = {
-                'id': student.id,
-                'name': student.name,
-                'student_id': student.student_id,
-                'id_card_no': student.id_card_no,
-                'department': student.department.to_dict() if student.department else None
-            }
-        else:
-            cert_dict['student'] = None
+        cert_dict['student'] = {
+            'id': student_id,
+            'name': student_name,
+            'student_id': student_no,
+            'id_card_no': id_card_no,
+            'department': department.to_dict() if department else None
+        }
         
         items.append(cert_dict)
     
     result = {
-        'total': pagination.total,
+        'total': total,
         'page': page,
         'per_page': per_page,
-        'pages': pagination.pages,
-        'items': items
+        'pages': pages,
+        'items': items,
+        'next_cursor': _encode_certificate_cursor(rows[-1][0]) if has_more and rows else None
     }
     
     # 如果有 Presigned URL 生成失败的情况，添加警告
@@ -171,6 +203,8 @@ def get_certificate_detail(certificate_id):
     cert_dict = certificate.to_dict()
     cert_dict['certName'] = certificate.name
     cert_dict['imgUrl'] = presign_get_object_url(certificate.image_url)
+    # 详情使用审核尺寸图，未生成时回退为原图
+    cert_dict['reviewUrl'] = presign_get_object_url(certificate.review_image_key) or cert_dict['imgUrl']
     
     # 添加学生信息
     if student:
@@ -252,6 +286,7 @@ def audit_certificate(certificate_id):
         cert_dict = certificate.to_dict()
         cert_dict['certName'] = certificate.name
         cert_dict['imgUrl'] = presign_get_object_url(certificate.image_url)
+        cert_dict['reviewUrl'] = presign_get_object_url(certificate.review_image_key) or cert_dict['imgUrl']
         
         # 添加学生信息
         if student:
@@ -273,3 +308,116 @@ def audit_certificate(certificate_id):
         db.session.rollback()
         return jsonify({'error': f'审核失败: {str(e)}'}), 500
 
+
+@admin_bp.route('/certificates/audit-batch', methods=['POST'])
+@jwt_required()
+def audit_certificates_batch():
+    """
+    批量审核证书（管理员权限）
+    请求体: {
+        "items": [
+            { "id": 1, "action": "approve" },
+            { "id": 2, "action": "reject", "reject_reason": "图片不清晰" }
+        ]
+    }
+    返回: {
+        "message": "批量审核完成",
+        "summary": { "total": 2, "succeeded": 1, "failed": 1 },
+        "results": [
+            { "id": 1, "success": true, "status": 1 },
+            { "id": 2, "success": false, "error": "无权审核该证书" }
+        ]
+    }
+
+    一次查询取出所有证书及其权限判定，按审核结果（通过 / 相同驳回原因）分组各执行一条 UPDATE，
+    全部在同一事务中提交；单项参数错误或无权限只影响该项。
+    """
+    admin_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data:
+        return jsonify({'error': '请求体不能为空'}), 400
+
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items 必须是非空数组'}), 400
+    if len(items) > AUDIT_BATCH_MAX_ITEMS:
+        return jsonify({'error': f'单次最多审核 {AUDIT_BATCH_MAX_ITEMS} 条'}), 400
+
+    # 逐项校验参数；results 与 items 一一对应
+    results = []
+    pending = {}  # 证书ID -> (results 下标, action, reject_reason)
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        cert_id = item.get('id')
+        action = item.get('action')
+        reject_reason = item.get('reject_reason') or ''
+        results.append({'id': cert_id, 'success': False})
+
+        if not isinstance(cert_id, int) or isinstance(cert_id, bool):
+            results[index]['error'] = 'id 必须是整数'
+        elif not isinstance(reject_reason, str):
+            results[index]['error'] = 'reject_reason 必须是字符串'
+        elif action not in ['approve', 'reject']:
+            results[index]['error'] = f'无效的 action: {action}，支持: approve/reject'
+        elif action == 'reject' and not reject_reason.strip():
+            results[index]['error'] = '驳回时必须提供 reject_reason'
+        elif cert_id in pending:
+            results[index]['error'] = '证书ID重复'
+        else:
+            pending[cert_id] = (index, action, reject_reason.strip())
+
+    if pending:
+        # 一次查询取出证书是否存在、所属学生是否存在以及当前管理员是否有权限
+        department_filter = get_admin_department_filter(User.department_id, admin_id)
+        access_column = true() if department_filter is None else case((department_filter, True), else_=False)
+        rows = db.session.query(Certificate.id, User.id, access_column)\
+            .outerjoin(User, User.id == Certificate.user_id)\
+            .filter(Certificate.id.in_(list(pending)))\
+            .all()
+        found = {cert_id: (student_id is not None and bool(has_access)) for cert_id, student_id, has_access in rows}
+
+        # 按审核结果分组：通过一组，驳回按原因分组
+        groups = {}
+        for cert_id, (index, action, reject_reason) in pending.items():
+            if cert_id not in found:
+                results[index]['error'] = '证书不存在'
+            elif not found[cert_id]:
+                results[index]['error'] = '无权审核该证书'
+            else:
+                key = (Certificate.STATUS_APPROVED, None) if action == 'approve' \
+                    else (Certificate.STATUS_REJECTED, reject_reason)
+                groups.setdefault(key, []).append(cert_id)
+
+        review_time = datetime.utcnow()
+        try:
+            for (status, reject_reason), cert_ids in groups.items():
+                db.session.query(Certificate)\
+                    .filter(Certificate.id.in_(cert_ids))\
+                    .update({
+                        Certificate.status: status,
+                        Certificate.reject_reason: reject_reason,
+                        Certificate.review_time: review_time,
+                    }, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'审核失败: {str(e)}'}), 500
+
+        for (status, _), cert_ids in groups.items():
+            for cert_id in cert_ids:
+                result = results[pending[cert_id][0]]
+                result['success'] = True
+                result['status'] = status
+
+    succeeded = sum(1 for result in results if result['success'])
+    return jsonify({
+        'message': '批量审核完成',
+        'summary': {
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+        },
+        'results': results,
+    }), 200
+
@@ -7,23 +7,38 @@
 - pandas: 用于解析 Excel 文件（pip install pandas openpyxl）
 - openpyxl: pandas 读取 Excel 文件所需的引擎（pip install openpyxl）
 """
-import io
+import json
 import os
-import threading
+import shutil
 import uuid
 import zipfile
 from datetime import datetime
+from itertools import islice
+from urllib.parse import quote
 
-from flask import request, jsonify, send_file, current_app, url_for, after_this_request
+from flask import request, jsonify, send_file, current_app, url_for, after_this_request, Response
+from sqlalchemy import func, case, true
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from app.api.admin_auth import admin_bp
 from app.extensions import db
-from app.models import User, AdminUser, Department, ScoreLog, Comment, Certificate
-from app.utils.permission import get_admin_accessible_query
+from app.models import User, AdminUser, Department, ScoreLog, Comment, Certificate, BackgroundJob
+from app.jobs import register_job_handler, enqueue_job, get_queue_position
+from app.utils.permission import get_admin_accessible_query, get_admin_scope, get_admin_department_filter
 from app.utils.rsa_utils import get_rsa_utils
+from app.utils.password_batch import decrypt_passwords, hash_passwords, resolve_password_workers
 from app.utils.admin_permission import admin_required
-from app.utils.s3_presign import presign_get_object_url
+from app.utils.s3_presign import presign_many
+from app.utils.export_render import (
+    build_student_snapshot, iter_render_student_files, iter_zip_stream, resolve_render_processes
+)
+from app.utils.student_records import load_student_records
+from app.utils.score_ledger import bulk_insert_score_logs
+from app.utils.student_import import (
+    IDENTITY_QUERY_CHUNK_SIZE, IMPORT_REQUIRED_COLUMNS, STREAMING_IMPORT_EXTENSIONS, bulk_insert_users,
+    inspect_import_file, iter_import_chunks, load_registered_identities, read_import_frame, validate_import_rows
+)
+from app.utils.dashboard_stats import invalidate_dashboard_stats
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from docxtpl import DocxTemplate
 
 # 尝试导入 pandas，如果未安装会抛出 ImportError
 try:
@@ -36,38 +51,18 @@ except ImportError:
 # 状态枚举值
 VALID_STAGES = ['preliminary', 'medical', 'political', 'admission']
 VALID_STATUSES = ['qualified', 'unqualified', 'pending']
-
-# 导出任务全局存储（仅进程内有效，适合作为简单方案）
-EXPORT_TASKS = {}
-EXPORT_TASKS_LOCK = threading.Lock()
-
-
-def _extract_birth_and_gender(id_card_no: str):
-    """
-    从18位身份证号中提取出生年月和性别
-
-    返回:
-        birth_date: 'YYYY年MM月' 格式字符串
-        gender: '男' 或 '女'
-    """
-    if not id_card_no or len(id_card_no) != 18:
-        return '', ''
-
-    try:
-        birth_str = id_card_no[6:14]  # YYYYMMDD
-        year = birth_str[0:4]
-        month = birth_str[4:6]
-        birth_date = f"{year}年{month}月"
-    except Exception:
-        birth_date = ''
-
-    try:
-        gender_code = int(id_card_no[16])
-        gender = '男' if gender_code % 2 == 1 else '女'
-    except Exception:
-        gender = ''
-
-    return birth_date, gender
+# 阶段名称 -> 学生表中对应的状态列
+STAGE_STATUS_COLUMNS = {
+    'preliminary': User.preliminary_status,
+    'medical': User.medical_status,
+    'political': User.political_status,
+    'admission': User.admission_status,
+}
+# 批量更新状态时单次请求的最大学生数
+STATUS_BATCH_MAX_ITEMS = 1000
+# 批量调整积分时单次请求的最大学生数，以及批次键的最大长度
+SCORE_BATCH_MAX_ITEMS = 1000
+SCORE_BATCH_KEY_MAX_LENGTH = 64
 
 
 def _cleanup_old_export_files(app, max_age_minutes=30):
@@ -87,6 +82,15 @@ def _cleanup_old_export_files(app, max_age_minutes=30):
         max_age_seconds = max_age_minutes * 60
         
         for filename in os.listdir(temp_dir):
+            # 失败任务遗留的分片目录（保留 1 天，便于任务重新入队后续跑）
+            if filename.startswith('export_') and filename.endswith('_parts'):
+                dir_path = os.path.join(temp_dir, filename)
+                try:
+                    if current_time - os.path.getmtime(dir_path) > 24 * 3600:
+                        shutil.rmtree(dir_path, ignore_errors=True)
+                except OSError:
+                    pass
+                continue
             if filename.startswith('export_') and filename.endswith('.zip'):
                 file_path = os.path.join(temp_dir, filename)
                 try:
@@ -105,533 +109,118 @@ def _cleanup_old_export_files(app, max_age_minutes=30):
         pass
 
 
-def _run_department_export_task(app, task_id: str, admin_id: int, dept_id: int):
+def _get_export_template_path(app):
+    """获取送飞鉴定表 Word 模板路径"""
+    return os.path.join(app.root_path, 'templates', 'template_profile.docx')
+
+
+def _get_export_display_filename(department):
+    """供下载展示的导出文件名（中文名）"""
+    college = department.college or '未知学院'
+    class_name = department.class_name or f'班级{department.id}'
+    return f'{college}_{class_name}_学生档案.zip'
+
+
+def _build_export_snapshots(users, department):
     """
-    后台线程：部门学生档案批量导出（单人双文件：Word+Excel）
+    整理一批学生的导出快照（证书与积分流水各一条查询批量加载，渲染进程只处理纯数据）
+    """
+    records = load_student_records([user.id for user in users])
+    return [
+        build_student_snapshot(
+            user,
+            department,
+            records[user.id]['certificates'],
+            records[user.id]['score_logs']
+        )
+        for user in users
+    ]
+
+
+@register_job_handler(BackgroundJob.TYPE_DEPARTMENT_EXPORT)
+def _run_department_export_job(ctx):
+    """
+    后台任务：部门学生档案批量导出（单人双文件：Word+Excel）
 
     步骤：
-      1. 查询部门和学生（预加载 certificates 和 score_logs）
-      2. 遍历学生，提取证书数据（从 extra_data JSON）
-      3. 生成积分明细 Excel 文件
-      4. 生成送飞鉴定表 Word 文件
-      5. 将所有文档打包为 ZIP 文件（按 {学院}_{班级}_{姓名}_{学号}/ 结构）
-      6. 更新 EXPORT_TASKS 中的任务状态
+      1. 查询部门和学生，预先整理所有未完成学生的导出快照（纯数据）
+      2. 将快照分发到渲染进程池（EXPORT_RENDER_PROCESSES）并行生成积分明细 Excel 与送飞鉴定表 Word
+      3. 按学生ID顺序逐个接收渲染结果，写入该学生的分片 ZIP
+         （instance/temp/export_{任务ID}_parts/{学生ID}.zip）并保存断点
+      4. 全部学生完成后按学生ID顺序合并分片，生成最终 ZIP（按 {学院}_{班级}_{姓名}_{学号}/ 结构）
+
+    断点续跑：进程崩溃后任务会重新入队，再次执行时跳过断点中已完成且分片文件存在的学生
     """
-    with app.app_context():
-        try:
-            # 再次检查管理员是否有权限访问该部门
-            has_access, department = check_admin_access_to_department(admin_id, dept_id)
-            if not department:
-                with EXPORT_TASKS_LOCK:
-                    task = EXPORT_TASKS.get(task_id)
-                    if task is not None:
-                        task.update({
-                            'status': 'failed',
-                            'error': '部门不存在',
-                        })
-                return
-
-            if not has_access:
-                with EXPORT_TASKS_LOCK:
-                    task = EXPORT_TASKS.get(task_id)
-                    if task is not None:
-                        task.update({
-                            'status': 'failed',
-                            'error': '无权导出该部门学生档案',
-                        })
-                return
-
-            # 查询部门下所有学生
-            # 注意：User.certificates 和 User.score_logs 使用 lazy='dynamic'，返回 Query 对象
-            # 不能使用 joinedload，需要在循环中直接访问（dynamic 关系本身就是 Query 对象）
-            users = User.query.filter_by(department_id=dept_id).order_by(User.id.asc()).all()
-
-            with EXPORT_TASKS_LOCK:
-                task = EXPORT_TASKS.get(task_id)
-                if task is None:
-                    # 任务已被外部删除，直接结束
-                    return
-                task['total'] = len(users)
-                task['progress'] = 0
-                task['status'] = 'processing'
-
-            # 模板路径
-            template_path = os.path.join(app.root_path, 'templates', 'template_profile.docx')
-            if not os.path.exists(template_path):
-                with EXPORT_TASKS_LOCK:
-                    task = EXPORT_TASKS.get(task_id)
-                    if task is not None:
-                        task.update({
-                            'status': 'failed',
-                            'error': f'模板文件不存在: {template_path}',
-                        })
-                return
-
-            # 检查 pandas 是否可用
-            if not PANDAS_AVAILABLE:
-                with EXPORT_TASKS_LOCK:
-                    task = EXPORT_TASKS.get(task_id)
-                    if task is not None:
-                        task.update({
-                            'status': 'failed',
-                            'error': 'pandas 未安装，无法生成 Excel 文件',
-                        })
-                return
-
-            # 临时目录及 ZIP 路径
-            temp_dir = os.path.join(app.instance_path, 'temp')
-            os.makedirs(temp_dir, exist_ok=True)
-
-            zip_filename_on_disk = f'export_{task_id}.zip'
-            zip_path = os.path.join(temp_dir, zip_filename_on_disk)
-
-            # 供下载展示的文件名（中文名）
-            college = department.college or '未知学院'
-            class_name = department.class_name or f'班级{department.id}'
-            display_filename = f'{college}_{class_name}_学生档案.zip'
-
-            # 创建 ZIP 文件并逐个学生写入文档
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for idx, user in enumerate(users):
-                    # ========== 1. 数据清洗与提取 ==========
-                    birth_date, gender = _extract_birth_and_gender(user.id_card_no)
-                    dept = user.department or department
-                    
-                    # 获取审核通过的证书
-                    # 注意：user.certificates 是 dynamic 关系，返回 Query 对象，需要调用 .all() 或 .filter()
-                    approved_certs = user.certificates.filter_by(status=Certificate.STATUS_APPROVED).all()
-                    
-                    # 提取英语四六级成绩（与 student.py 的 profile 接口保持一致）
-                    cet4_cert = None
-                    cet6_cert = None
-                    for cert in approved_certs:
-                        cert_name = cert.name or ''
-                        cert_name_upper = cert_name.upper()
-                        
-                        # 根据证书名称分类（与 profile 接口逻辑一致）
-                        if cert_name == '英语四级' or ('CET-4' in cert_name_upper or '四级' in cert_name):
-                            if not cet4_cert:  # 只取第一个（最新的）
-                                cet4_cert = cert
-                        elif cert_name == '英语六级' or ('CET-6' in cert_name_upper or '六级' in cert_name):
-                            if not cet6_cert:  # 只取第一个（最新的）
-                                cet6_cert = cert
-                    
-                    # 处理四级（与 profile 接口逻辑一致）
-                    cet4_score = ''
-                    if cet4_cert:
-                        extra_data = cet4_cert.extra_data or {}
-                        if not isinstance(extra_data, dict):
-                            extra_data = {}
-                        score = extra_data.get('score')
-                        if score is not None:
-                            cet4_score = str(score)
-                    
-                    # 处理六级（与 profile 接口逻辑一致）
-                    cet6_score = ''
-                    if cet6_cert:
-                        extra_data = cet6_cert.extra_data or {}
-                        if not isinstance(extra_data, dict):
-                            extra_data = {}
-                        score = extra_data.get('score')
-                        if score is not None:
-                            cet6_score = str(score)
-                    
-                    # 提取雅思成绩（取最新的一条）
-                    ielts_l = ielts_r = ielts_w = ielts_s = ielts_total = ''
-                    ielts_certs = [cert for cert in approved_certs 
-                                  if 'IELTS' in (cert.name or '').upper() or '雅思' in (cert.name or '')]
-                    if ielts_certs:
-                        # 按 upload_time 排序，取最新的
-                        latest_ielts = max(ielts_certs, key=lambda c: c.upload_time or datetime.min)
-                        extra_data = latest_ielts.extra_data or {}
-                        if isinstance(extra_data, dict):
-                            # 确保空值转换为空字符串，而不是 'None'
-                            listening_val = extra_data.get('listening')
-                            reading_val = extra_data.get('reading')
-                            writing_val = extra_data.get('writing')
-                            speaking_val = extra_data.get('speaking')
-                            total_val = extra_data.get('total')
-                            
-                            ielts_l = str(listening_val) if listening_val is not None else ''
-                            ielts_r = str(reading_val) if reading_val is not None else ''
-                            ielts_w = str(writing_val) if writing_val is not None else ''
-                            ielts_s = str(speaking_val) if speaking_val is not None else ''
-                            ielts_total = str(total_val) if total_val is not None else ''
-                    
-                    # 提取任职情况
-                    # 先识别任职类证书（根据证书名称和类型，与 student.py 保持一致）
-                    position_certs = []
-                    for cert in approved_certs:
-                        cert_name = cert.name or ''
-                        cert_type = (cert.extra_data or {}).get('type', '').lower() if isinstance(cert.extra_data, dict) else ''
-                        if cert_name == '任职情况' or cert_name == '任职经历' or cert_type == 'position' or '任职' in cert_name:
-                            position_certs.append(cert)
-                    
-                    jobs = []
-                    for cert in position_certs:
-                        extra_data = cert.extra_data or {}
-                        if not isinstance(extra_data, dict):
-                            extra_data = {}
-                        
-                        # 解析任职时间：优先使用 start_time/end_time，如果没有则尝试解析 date 字段
-                        start_time = extra_data.get('start_time', '') or ''
-                        end_time = extra_data.get('end_time', '') or ''
-                        
-                        # 如果 start_time/end_time 为空，尝试从 date 字段解析（格式：2026-02 至 2026-02）
-                        if not start_time and not end_time:
-                            date_str = extra_data.get('date', '') or ''
-                            if date_str and '至' in date_str:
-                                parts = date_str.split('至')
-                                if len(parts) == 2:
-                                    start_time = parts[0].strip()
-                                    end_time = parts[1].strip()
-                        
-                        # 处理集体获奖情况：优先使用 collective_awards，如果没有则使用 award 字段（与 student.py 保持一致）
-                        collective_awards = extra_data.get('collective_awards') or extra_data.get('collectiveAwards')
-                        if not collective_awards:
-                            collective_awards = extra_data.get('award', '')  # 兼容 award 字段
-                        
-                        collective_awards_str = ''
-                        if collective_awards:
-                            if isinstance(collective_awards, list):
-                                collective_awards_str = '；'.join(str(a) for a in collective_awards if a)
-                            elif isinstance(collective_awards, str):
-                                collective_awards_str = collective_awards.strip()
-                        
-                        job = {
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'role': extra_data.get('role') or extra_data.get('position', ''),  # 兼容 position 字段
-                            'organization': extra_data.get('organization') or extra_data.get('org', ''),  # 兼容 org 字段
-                            'collective_awards': collective_awards_str,
-                        }
-                        jobs.append(job)
-                    
-                    # 提取获奖情况（先识别获奖类证书，与 student.py 保持一致）
-                    award_certs = []
-                    for cert in approved_certs:
-                        cert_name = cert.name or ''
-                        cert_type = (cert.extra_data or {}).get('type', '').lower() if isinstance(cert.extra_data, dict) else ''
-                        # 排除英语和任职类证书
-                        is_english = (cert_name == '英语四级' or cert_name == '英语六级' or 
-                                     'CET-4' in cert_name.upper() or 'CET-6' in cert_name.upper() or
-                                     '四级' in cert_name or '六级' in cert_name or
-                                     'IELTS' in cert_name.upper() or '雅思' in cert_name)
-                        is_position = (cert_name == '任职情况' or cert_name == '任职经历' or 
-                                      cert_type == 'position' or '任职' in cert_name)
-                        
-                        # 识别获奖类证书
-                        if not is_english and not is_position:
-                            if cert_name == '获奖情况' or cert_type in ['competition', 'honor']:
-                                award_certs.append(cert)
-                            # 如果证书名称不是明确的英语/任职类，也视为获奖（兼容处理）
-                            elif cert_name and cert_name not in ['英语四级', '英语六级', '任职情况', '任职经历']:
-                                award_certs.append(cert)
-                    
-                    awards = []
-                    for cert in award_certs:
-                        extra_data = cert.extra_data or {}
-                        if not isinstance(extra_data, dict):
-                            extra_data = {}
-                        
-                        # 标准化获奖信息（与 profile 接口逻辑一致）
-                        award_date = extra_data.get('date')
-                        # 如果 date 为空，尝试使用 upload_time
-                        if not award_date and cert.upload_time:
-                            award_date = cert.upload_time.strftime('%Y-%m-%d')
-                        
-                        award = {
-                            'date': award_date if award_date else '',  # 转换为字符串或空字符串
-                            'name': extra_data.get('name') or cert.name or '',  # 奖励名称，如果没有 name，使用证书名称
-                            'level': extra_data.get('level') or '',  # 奖励级别
-                            'rank': extra_data.get('rank') or '',  # 获奖等次
-                            'organizer': extra_data.get('organizer') or '',  # 主办单位
-                        }
-                        
-                        awards.append(award)
-                    
-                    # ========== 2. 生成积分明细 Excel ==========
-                    # 注意：user.score_logs 是 dynamic 关系，返回 Query 对象
-                    score_logs_list = user.score_logs.order_by(ScoreLog.create_time.asc()).all()
-                    excel_data = []
-                    for log in score_logs_list:
-                        if log.delta is None:
-                            continue
-                        date_str = log.create_time.strftime('%Y-%m-%d') if log.create_time else ''
-                        delta_str = f"+{log.delta}" if log.delta > 0 else str(log.delta)
-                        reason = log.reason or ''
-                        # 操作类型映射：'system' -> '系统', 'manual' -> '人工'
-                        op_type = '系统' if log.type == ScoreLog.TYPE_SYSTEM else '人工'
-                        excel_data.append({
-                            '日期': date_str,
-                            '变动分值': delta_str,
-                            '变动原因': reason,
-                            '操作类型': op_type,
-                        })
-                    
-                    # 使用 pandas 生成 Excel
-                    df = pd.DataFrame(excel_data)
-                    excel_buffer = io.BytesIO()
-                    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                        df.to_excel(writer, index=False, sheet_name='积分明细')
-                    excel_buffer.seek(0)
-                    
-                    # ========== 3. 准备 Word Context（包含定长切片逻辑）==========
-                    # 任职情况：前3条映射到扁平变量，超出部分放入 jobs_extra
-                    jobs_main = jobs[:3]
-                    jobs_extra_raw = jobs[3:]
-                    # 格式化额外任职情况：任职时间：xxx，担任职务：xxx，任职期间集体获奖情况：xxxxxx;
-                    # 注意：docxtpl 模板中可能使用 {% for job in jobs_extra %} 循环，需要传递字典列表
-                    jobs_extra = []
-                    for idx, job in enumerate(jobs_extra_raw, start=4):  # 从第4条开始编号
-                        start_time = job.get('start_time', '') or ''
-                        end_time = job.get('end_time', '') or ''
-                        job_time = f"{start_time} - {end_time}".strip(' -') if (start_time or end_time) else '无'
-                        job_role = job.get('role', '') or '无'
-                        collective_awards = job.get('collective_awards', '') or '无'
-                        # 格式：任职时间：xxx，担任职务：xxx，任职期间集体获奖情况：xxxxxx;
-                        job_str = f"任职时间：{job_time}，担任职务：{job_role}，任职期间集体获奖情况：{collective_awards};"
-                        jobs_extra.append({
-                            'index': idx,
-                            'text': job_str,
-                            'time': job_time,
-                            'role': job_role,
-                            'collective_awards': collective_awards
-                        })
-                    
-                    # 填充前3条任职变量（不足3条用空字符串填充）
-                    job_vars = {}
-                    for i in range(1, 4):
-                        if i <= len(jobs_main):
-                            job = jobs_main[i - 1]
-                            start_time = job.get('start_time', '') or ''
-                            end_time = job.get('end_time', '') or ''
-                            # 如果任职时间都为空，显示"无"，否则显示时间范围
-                            if start_time or end_time:
-                                job_vars[f'job_{i}_time'] = f"{start_time} - {end_time}".strip(' -')
-                            else:
-                                job_vars[f'job_{i}_time'] = '无'
-                            job_vars[f'job_{i}_role'] = job.get('role', '') or ''
-                            # 任职期间集体获奖情况：Word 模板使用 job_{i}_note 字段
-                            # 如果为空，显示"无"
-                            collective_awards = job.get('collective_awards', '') or ''
-                            job_vars[f'job_{i}_note'] = collective_awards if collective_awards else '无'
-                            # 保留兼容变量名
-                            job_vars[f'job_{i}_collective_awards'] = collective_awards if collective_awards else '无'
-                        else:
-                            job_vars[f'job_{i}_time'] = ''
-                            job_vars[f'job_{i}_role'] = ''
-                            job_vars[f'job_{i}_note'] = ''
-                            job_vars[f'job_{i}_collective_awards'] = ''
-                    
-                    # 获奖情况：前3条映射到扁平变量，超出部分放入 awards_extra
-                    awards_main = awards[:3]
-                    awards_extra_raw = awards[3:]
-                    # 格式化额外获奖情况：奖励时间：xxx，奖励名称：xxxx，主办单位：xxx；奖励级别：xxxx，获奖等次：xxx；
-                    # 注意：docxtpl 模板中可能使用 {% for award in awards_extra %} 循环，需要传递字典列表
-                    awards_extra = []
-                    for idx, award in enumerate(awards_extra_raw, start=4):  # 从第4条开始编号
-                        award_date = award.get('date', '') or '无'
-                        award_name = award.get('name', '') or '无'
-                        award_organizer = award.get('organizer', '') or '无'
-                        award_level = award.get('level', '') or '无'
-                        award_rank = award.get('rank', '') or '无'
-                        # 格式：奖励时间：xxx，奖励名称：xxxx，主办单位：xxx；奖励级别：xxxx，获奖等次：xxx；
-                        award_str = f"奖励时间：{award_date}，奖励名称：{award_name}，主办单位：{award_organizer}；奖励级别：{award_level}，获奖等次：{award_rank}；"
-                        awards_extra.append({
-                            'index': idx,
-                            'text': award_str,
-                            'date': award_date,
-                            'name': award_name,
-                            'organizer': award_organizer,
-                            'level': award_level,
-                            'rank': award_rank
-                        })
-                    
-                    # 填充前3条获奖变量（不足3条用空字符串填充）
-                    # 注意：Word 模板使用的字段名为：award_{i}_time, award_{i}_name, award_{i}_host, award_{i}_level, award_{i}_grade
-                    award_vars = {}
-                    for i in range(1, 4):
-                        if i <= len(awards_main):
-                            award = awards_main[i - 1]
-                            # 确保所有字段都不为 None，转换为字符串
-                            award_name = award.get('name', '') or ''
-                            award_date = award.get('date', '') or ''
-                            award_level = award.get('level', '') or ''
-                            award_rank = award.get('rank', '') or ''  # rank 对应模板中的 grade
-                            award_organizer = award.get('organizer', '') or ''  # organizer 对应模板中的 host
-                            
-                            # Word 模板使用的字段名
-                            award_vars[f'award_{i}_time'] = str(award_date) if award_date else ''
-                            award_vars[f'award_{i}_name'] = str(award_name) if award_name else ''
-                            award_vars[f'award_{i}_host'] = str(award_organizer) if award_organizer else ''  # 主办单位
-                            award_vars[f'award_{i}_level'] = str(award_level) if award_level else ''
-                            award_vars[f'award_{i}_grade'] = str(award_rank) if award_rank else ''  # 获奖等次
-                            
-                            # 保留兼容变量名
-                            award_vars[f'award_{i}_date'] = str(award_date) if award_date else ''
-                            award_vars[f'award_{i}_rank'] = str(award_rank) if award_rank else ''
-                            award_vars[f'award_{i}_organizer'] = str(award_organizer) if award_organizer else ''
-                        else:
-                            award_vars[f'award_{i}_time'] = ''
-                            award_vars[f'award_{i}_name'] = ''
-                            award_vars[f'award_{i}_host'] = ''
-                            award_vars[f'award_{i}_level'] = ''
-                            award_vars[f'award_{i}_grade'] = ''
-                            # 保留兼容变量名
-                            award_vars[f'award_{i}_date'] = ''
-                            award_vars[f'award_{i}_rank'] = ''
-                            award_vars[f'award_{i}_organizer'] = ''
-                    
-                    # 生成导出日期
-                    export_date = datetime.now().strftime('%Y年%m月%d日')
-                    
-                    # 合并显示英语四六级分数（格式：四级：xxx\n六级：xxx，如果没有就写"无"）
-                    english_level = ''
-                    if cet4_score or cet6_score:
-                        parts = []
-                        if cet4_score:
-                            parts.append(f'四级：{cet4_score}')
-                        else:
-                            parts.append('四级：无')
-                        if cet6_score:
-                            parts.append(f'六级：{cet6_score}')
-                        else:
-                            parts.append('六级：无')
-                        english_level = '\n'.join(parts)
-                    else:
-                        english_level = '四级：无\n六级：无'
-                    
-                    # 格式化 GPA（保留2位小数）
-                    gpa_display = ''
-                    if user.gpa is not None:
-                        gpa_display = f'{user.gpa:.2f}'
-                    
-                    # 构建 Word 模板上下文
-                    context = {
-                        'name': user.name or '',
-                        'id_card_no': user.id_card_no or '',
-                        'student_id': user.student_id or '',
-                        'college': dept.college or '',
-                        'class_name': dept.class_name or '',  # 班级
-                        'grade': dept.grade or '',
-                        'total_score': user.total_score or 0,
-                        'birth_date': birth_date,
-                        'gender': gender,
-                        'ethnicity': user.ethnicity or '',  # 民族
-                        'political_affiliation': user.political_affiliation or '',  # 政治面貌
-                        'gpa': gpa_display,  # 学分绩点
-                        'birthplace': user.birthplace or '',  # 籍贯
-                        'phone': user.phone or '',  # 联系电话
-                        'export_date': export_date,
-                        # 英语成绩（Word 模板使用 english_level 字段）
-                        'english_level': english_level,  # 格式：四级：xxx\n六级：xxx，如果没有就写"无"
-                        # 保留兼容变量名
-                        'cet4_score': cet4_score,
-                        'cet6_score': cet6_score,
-                        'cet_scores': english_level,
-                        'cet4': cet4_score,
-                        'cet6': cet6_score,
-                        # 雅思成绩（Word 模板使用的字段名）
-                        'ielts_speaking': ielts_s,  # 口语
-                        'ielts_listening': ielts_l,  # 听力
-                        'ielts_reading': ielts_r,  # 阅读
-                        'ielts_writing': ielts_w,  # 写作
-                        'ielts_total': ielts_total,  # 总分
-                        # 保留兼容变量名
-                        'ielts_l': ielts_l,
-                        'ielts_r': ielts_r,
-                        'ielts_w': ielts_w,
-                        'ielts_s': ielts_s,
-                        # 任职情况（前3条）
-                        **job_vars,
-                        'jobs_extra': jobs_extra,  # 超出3条的数据，用于附录页循环展示（格式化的字典列表）
-                        # 获奖情况（前3条）
-                        **award_vars,
-                        'awards_extra': awards_extra,  # 超出3条的数据，用于附录页循环展示（格式化的字典列表）
-                        # 缺失字段（必须置空）
-                        'photo_path': None,
-                        'warning_logs': [],  # 积分预警情况（暂无数据源，保持为空）
-                    }
-                    
-                    # #region agent log
-                    import json
-                    log_data = {
-                        'sessionId': 'debug-session',
-                        'runId': 'run1',
-                        'hypothesisId': 'J',
-                        'location': 'admin_student.py:560',
-                        'message': '检查额外数据格式',
-                        'data': {
-                            'user_id': user.id,
-                            'jobs_extra_count': len(jobs_extra),
-                            'jobs_extra_sample': jobs_extra[0] if jobs_extra else None,
-                            'awards_extra_count': len(awards_extra),
-                            'awards_extra_sample': awards_extra[0] if awards_extra else None
-                        },
-                        'timestamp': int(datetime.now().timestamp() * 1000)
-                    }
-                    try:
-                        with open(r'e:\01_Work_Study\Contrail\.cursor\debug.log', 'a', encoding='utf-8') as f:
-                            f.write(json.dumps(log_data, ensure_ascii=False) + '\n')
-                    except Exception:
-                        pass
-                    # #endregion agent log
-                    
-                    # ========== 4. 生成 Word 文档 ==========
-                    doc = DocxTemplate(template_path)
-                    doc.render(context)
-                    word_buffer = io.BytesIO()
-                    doc.save(word_buffer)
-                    word_buffer.seek(0)
-                    
-                    # ========== 5. 构建 ZIP 文件结构 ==========
-                    # 文件夹名：{学院}_{班级}_{姓名}_{学号}
-                    safe_name = (user.name or '未命名').replace('/', '_').replace('\\', '_')
-                    safe_college = (dept.college or '未知学院').replace('/', '_').replace('\\', '_')
-                    safe_class = (dept.class_name or f'班级{dept.id}').replace('/', '_').replace('\\', '_')
-                    stu_id_or_id = user.student_id or user.id_card_no or ''
-                    folder_name = f'{safe_college}_{safe_class}_{safe_name}_{stu_id_or_id}'
-                    
-                    # Excel 文件名：{姓名}_积分明细.xlsx
-                    excel_filename = f'{safe_name}_积分明细.xlsx'
-                    excel_path_in_zip = f'{folder_name}/{excel_filename}'
-                    
-                    # Word 文件名：{姓名}_送飞鉴定表.docx
-                    word_filename = f'{safe_name}_送飞鉴定表.docx'
-                    word_path_in_zip = f'{folder_name}/{word_filename}'
-                    
-                    # 写入 ZIP
-                    zipf.writestr(excel_path_in_zip, excel_buffer.getvalue())
-                    zipf.writestr(word_path_in_zip, word_buffer.getvalue())
-                    
-                    # 更新进度
-                    with EXPORT_TASKS_LOCK:
-                        task = EXPORT_TASKS.get(task_id)
-                        if task is None:
-                            # 任务被删除，提前终止
-                            return
-                        task['progress'] = idx + 1
-
-            # 全部完成，更新任务状态
-            with EXPORT_TASKS_LOCK:
-                task = EXPORT_TASKS.get(task_id)
-                if task is not None:
-                    task.update({
-                        'status': 'completed',
-                        'file_path': zip_path,
-                        'display_filename': display_filename,
-                        'error': None,
-                    })
-        except Exception as e:
-            # 异常处理：记录错误信息
-            with EXPORT_TASKS_LOCK:
-                task = EXPORT_TASKS.get(task_id)
-                if task is not None:
-                    task.update({
-                        'status': 'failed',
-                        'error': f'导出过程发生异常: {str(e)}',
-                    })
+    app = current_app._get_current_object()
+    dept_id = ctx.payload.get('dept_id')
+
+    # 再次检查管理员是否有权限访问该部门
+    has_access, department = check_admin_access_to_department(ctx.admin_id, dept_id)
+    if not department:
+        raise ValueError('部门不存在')
+    if not has_access:
+        raise ValueError('无权导出该部门学生档案')
+
+    # 模板路径
+    template_path = _get_export_template_path(app)
+    if not os.path.exists(template_path):
+        raise ValueError(f'模板文件不存在: {template_path}')
+
+    # 检查 pandas 是否可用
+    if not PANDAS_AVAILABLE:
+        raise ValueError('pandas 未安装，无法生成 Excel 文件')
+
+    # 查询部门下所有学生
+    users = User.query.filter_by(department_id=dept_id).order_by(User.id.asc()).all()
+
+    # 临时目录、分片目录及 ZIP 路径
+    temp_dir = os.path.join(app.instance_path, 'temp')
+    parts_dir = os.path.join(temp_dir, f'export_{ctx.job_id}_parts')
+    os.makedirs(parts_dir, exist_ok=True)
+    zip_path = os.path.join(temp_dir, f'export_{ctx.job_id}.zip')
+
+    # 供下载展示的文件名（中文名）
+    display_filename = _get_export_display_filename(department)
+
+    # 断点：已完成（分片文件已落盘）的学生ID
+    completed_ids = [
+        uid for uid in ctx.checkpoint.get('completed_user_ids', [])
+        if os.path.exists(os.path.join(parts_dir, f'{uid}.zip'))
+    ]
+    completed_set = set(completed_ids)
+    ctx.set_progress(len(completed_ids), total=len(users))
+
+    # 预先整理未完成学生的快照
+    snapshots = _build_export_snapshots(
+        [user for user in users if user.id not in completed_set],
+        department
+    )
+
+    processes = resolve_render_processes(app.config.get('EXPORT_RENDER_PROCESSES'))
+    for snapshot, files in iter_render_student_files(snapshots, template_path, processes):
+        # 先写临时文件再原子替换，避免崩溃时留下不完整的分片
+        part_path = os.path.join(parts_dir, f"{snapshot['user_id']}.zip")
+        with zipfile.ZipFile(part_path + '.tmp', 'w', zipfile.ZIP_STORED) as part:
+            for path_in_zip, data in files:
+                part.writestr(path_in_zip, data)
+        os.replace(part_path + '.tmp', part_path)
+
+        completed_ids.append(snapshot['user_id'])
+        ctx.save_checkpoint({'completed_user_ids': completed_ids}, progress=len(completed_ids))
+
+    # 按学生ID顺序合并分片
+    with zipfile.ZipFile(zip_path + '.tmp', 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for user in users:
+            with zipfile.ZipFile(os.path.join(parts_dir, f'{user.id}.zip')) as part:
+                for info in part.infolist():
+                    zipf.writestr(info.filename, part.read(info))
+    os.replace(zip_path + '.tmp', zip_path)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return {
+        'file_path': zip_path,
+        'display_filename': display_filename,
+    }
 
 
 def check_admin_access_to_student(admin_id, student_id):
@@ -645,29 +234,16 @@ def check_admin_access_to_student(admin_id, student_id):
     Returns:
         tuple: (has_access: bool, student: User or None)
     """
-    admin = AdminUser.query.get(admin_id)
-    if not admin:
+    scope = get_admin_scope(admin_id)
+    if not scope:
         return False, None
     
     student = User.query.get(student_id)
     if not student:
         return False, None
     
-    # 超级管理员可以操作所有学生
-    if admin.role == AdminUser.ROLE_SUPER:
-        return True, student
-    
-    # 普通管理员只能操作自己部门的学生
-    if not student.department_id:
-        return False, student
-    
-    managed_departments = admin.managed_departments.all()
-    managed_dept_ids = [dept.id for dept in managed_departments]
-    
-    if student.department_id in managed_dept_ids:
-        return True, student
-    
-    return False, student
+    # 超级管理员可以操作所有学生；普通管理员只能操作自己部门的学生
+    return scope.can_access_department(student.department_id), student
 
 
 @admin_bp.route('/students', methods=['GET'])
@@ -690,9 +266,9 @@ def list_students():
     - department_id过滤会进一步限制在指定部门，但必须确保该部门在管理员权限范围内
     """
     admin_id = get_jwt_identity()
-    admin = AdminUser.query.get(admin_id)
+    scope = get_admin_scope(admin_id)
     
-    if not admin:
+    if not scope:
         return jsonify({'error': '管理员不存在'}), 404
     
     # 获取查询参数
@@ -716,11 +292,9 @@ def list_students():
     # 部门ID过滤
     if department_id is not None:
         # 检查管理员是否有权限访问该部门
-        if admin.role != AdminUser.ROLE_SUPER:
-            # 普通管理员需要检查该部门是否在其管理范围内
-            managed_dept_ids = [dept.id for dept in admin.managed_departments.all()]
-            if department_id not in managed_dept_ids:
-                return jsonify({'error': '无权访问该部门'}), 403
+        # 普通管理员需要检查该部门是否在其管理范围内
+        if not scope.can_access_department(department_id):
+            return jsonify({'error': '无权访问该部门'}), 403
         
         # 验证部门是否存在
         department = Department.query.get(department_id)
@@ -829,12 +403,14 @@ def get_student_detail(student_id):
     # 获取证书列表（按上传时间倒序）
     certificates = student.certificates.order_by(Certificate.upload_time.desc()).all()
     certificates_list = []
+    urls = presign_many(key for cert in certificates for key in (cert.image_url, cert.thumbnail_key))
     for cert in certificates:
         cert_dict = cert.to_dict()
         # 添加前端需要的字段
         cert_dict['certName'] = cert.name
-        # 生成 Presigned URL
-        cert_dict['imgUrl'] = presign_get_object_url(cert.image_url)
+        # 生成 Presigned URL（缩略图未生成时回退为原图）
+        cert_dict['imgUrl'] = urls.get(cert.image_url)
+        cert_dict['thumbUrl'] = urls.get(cert.thumbnail_key) or cert_dict['imgUrl']
         certificates_list.append(cert_dict)
     
     return jsonify({
@@ -899,6 +475,7 @@ def update_student_status(student_id):
     
     try:
         db.session.commit()
+        invalidate_dashboard_stats()
         
         # 重新查询以获取最新数据
         db.session.refresh(student)
@@ -920,6 +497,154 @@ def update_student_status(student_id):
         return jsonify({'error': f'更新状态失败: {str(e)}'}), 500
 
 
+@admin_bp.route('/students/status-batch', methods=['PUT'])
+@jwt_required()
+def update_students_status_batch():
+    """
+    批量更新学生状态（管理员权限）
+    请求体（student_ids 与 filter 二选一）: {
+        "stage": "preliminary" | "medical" | "political" | "admission",
+        "status": "qualified" | "unqualified" | "pending",
+        "student_ids": [1, 2, 3],
+        "filter": {
+            "department_id": 1,          // 可选，按部门筛选
+            "current_status": "pending"  // 可选，按该阶段的当前状态筛选
+        }
+    }
+    返回: {
+        "message": "批量更新完成",
+        "summary": { "requested": 3, "updated": 1, "unchanged": 1, "failed": 1 },
+        "failed": [ { "id": 3, "error": "无权操作该学生" } ]
+    }
+    按 filter 更新时 summary 不含 requested，unchanged 与 failed 恒为 0；重复的学生ID只计一次。
+
+    按 student_ids 更新时，一次查询取出所有学生的当前状态及权限判定，单项不存在或无权限只影响该项；
+    按 filter 更新时只作用于管理员有权限的部门。两种方式都只执行一条 UPDATE（跳过状态已是目标值的学生）。
+    """
+    admin_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data:
+        return jsonify({'error': '请求体不能为空'}), 400
+
+    stage = data.get('stage')
+    status = data.get('status')
+    student_ids = data.get('student_ids')
+    filters = data.get('filter')
+
+    # 参数验证
+    if not stage or not status:
+        return jsonify({'error': 'stage 和 status 不能为空'}), 400
+
+    if stage not in VALID_STAGES:
+        return jsonify({
+            'error': f'无效的阶段: {stage}，支持: {", ".join(VALID_STAGES)}'
+        }), 400
+
+    if status not in VALID_STATUSES:
+        return jsonify({
+            'error': f'无效的状态: {status}，支持: {", ".join(VALID_STATUSES)}'
+        }), 400
+
+    if (student_ids is None) == (filters is None):
+        return jsonify({'error': 'student_ids 与 filter 必须且只能提供一个'}), 400
+
+    scope = get_admin_scope(admin_id)
+    if not scope:
+        return jsonify({'error': '管理员不存在'}), 404
+
+    status_column = STAGE_STATUS_COLUMNS[stage]
+
+    if student_ids is not None:
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({'error': 'student_ids 必须是非空数组'}), 400
+        if len(student_ids) > STATUS_BATCH_MAX_ITEMS:
+            return jsonify({'error': f'单次最多更新 {STATUS_BATCH_MAX_ITEMS} 名学生'}), 400
+        if any(not isinstance(sid, int) or isinstance(sid, bool) for sid in student_ids):
+            return jsonify({'error': 'student_ids 中的每一项必须是整数'}), 400
+
+        # 一次查询取出学生是否存在、当前状态以及当前管理员是否有权限
+        requested_ids = list(dict.fromkeys(student_ids))
+        department_filter = get_admin_department_filter(User.department_id, admin_id)
+        access_column = true() if department_filter is None else case((department_filter, True), else_=False)
+        rows = db.session.query(User.id, status_column, access_column)\
+            .filter(User.id.in_(requested_ids))\
+            .all()
+        found = {sid: (current_status, bool(has_access)) for sid, current_status, has_access in rows}
+
+        failed = []
+        update_ids = []
+        unchanged = 0
+        for sid in requested_ids:
+            if sid not in found:
+                failed.append({'id': sid, 'error': '学生不存在'})
+            elif not found[sid][1]:
+                failed.append({'id': sid, 'error': '无权操作该学生'})
+            elif found[sid][0] == status:
+                unchanged += 1
+            else:
+                update_ids.append(sid)
+
+        criteria = [User.id.in_(update_ids)] if update_ids else None
+    else:
+        if not isinstance(filters, dict):
+            return jsonify({'error': 'filter 必须是对象'}), 400
+
+        department_id = filters.get('department_id')
+        current_status = filters.get('current_status')
+        if department_id is None and current_status is None:
+            return jsonify({'error': 'filter 至少需要包含 department_id 或 current_status'}), 400
+
+        criteria = []
+        if department_id is not None:
+            if not isinstance(department_id, int) or isinstance(department_id, bool):
+                return jsonify({'error': 'department_id 必须是整数'}), 400
+            if not scope.can_access_department(department_id):
+                return jsonify({'error': '无权访问该部门'}), 403
+            if not db.session.get(Department, department_id):
+                return jsonify({'error': '部门不存在'}), 404
+            criteria.append(User.department_id == department_id)
+        else:
+            department_filter = get_admin_department_filter(User.department_id, admin_id)
+            if department_filter is not None:
+                criteria.append(department_filter)
+
+        if current_status is not None:
+            if current_status not in VALID_STATUSES:
+                return jsonify({
+                    'error': f'无效的状态: {current_status}，支持: {", ".join(VALID_STATUSES)}'
+                }), 400
+            criteria.append(status_column == current_status)
+
+        # 状态已是目标值的学生不需要更新
+        criteria.append(status_column != status)
+        failed = []
+        unchanged = 0
+
+    updated = 0
+    if criteria:
+        try:
+            result = db.session.query(User)\
+                .filter(*criteria)\
+                .update({status_column: status}, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'批量更新状态失败: {str(e)}'}), 500
+        updated = result
+        if updated:
+            invalidate_dashboard_stats()
+
+    summary = {'updated': updated, 'unchanged': unchanged, 'failed': len(failed)}
+    if student_ids is not None:
+        summary['requested'] = len(requested_ids)
+    return jsonify({
+        'message': '批量更新完成',
+        'summary': summary,
+        'failed': failed,
+    }), 200
+
+
 @admin_bp.route('/score/adjust', methods=['POST'])
 @jwt_required()
 def adjust_score():
@@ -972,14 +697,15 @@ def adjust_score():
         user_id=user_id,
         delta=delta,
         reason=reason,
-        type=ScoreLog.TYPE_MANUAL
+        type=ScoreLog.TYPE_MANUAL,
+        admin_id=admin_id
     )
     
     try:
         db.session.add(score_log)
         db.session.commit()
         
-        # 重新查询用户以获取最新总分（User 表的总分是动态计算的）
+        # 重新查询用户以获取最新总分（total_delta 物化余额已随积分流水在同一事务内更新）
         db.session.refresh(student)
         
         return jsonify({
@@ -992,6 +718,199 @@ def adjust_score():
         return jsonify({'error': f'积分调整失败: {str(e)}'}), 500
 
 
+def _load_score_batch_logs(admin_id, batch_key):
+    """
+    查询管理员某批次已写入的积分流水
+
+    Returns:
+        list: [(user_id, delta, reason), ...]，批次尚未执行时为空列表
+    """
+    return db.session.query(ScoreLog.user_id, ScoreLog.delta, ScoreLog.reason)\
+        .filter(ScoreLog.admin_id == admin_id, ScoreLog.batch_key == batch_key)\
+        .order_by(ScoreLog.user_id)\
+        .all()
+
+
+def _score_batch_response(batch_key, user_ids, failed, replayed):
+    """构建批量调整积分的返回数据，学生最新总分按批查询（基础分 + 物化余额）"""
+    totals = {}
+    for i in range(0, len(user_ids), SCORE_BATCH_MAX_ITEMS):
+        chunk = user_ids[i:i + SCORE_BATCH_MAX_ITEMS]
+        totals.update(
+            db.session.query(User.id, User.base_score + User.total_delta)
+            .filter(User.id.in_(chunk))
+            .all()
+        )
+    return jsonify({
+        'message': '该批次已执行，未重复调整' if replayed else '批量调整完成',
+        'batch_key': batch_key,
+        'replayed': replayed,
+        'summary': {
+            'succeeded': len(user_ids),
+            'failed': len(failed),
+        },
+        'items': [{'user_id': user_id, 'new_total_score': totals.get(user_id)} for user_id in user_ids],
+        'failed': failed,
+    }), 200
+
+
+@admin_bp.route('/score/adjust-batch', methods=['POST'])
+@jwt_required()
+def adjust_score_batch():
+    """
+    批量调整学生积分（管理员权限）
+    请求体（student_ids 与 department_id 二选一）: {
+        "batch_key": "客户端生成的批次键（如 UUID），重试时保持不变",
+        "delta": 变动分数（正数为加分，负数为扣分）,
+        "reason": "变动原因",
+        "student_ids": [1, 2, 3],
+        "department_id": 1
+    }
+    返回: {
+        "message": "批量调整完成",
+        "batch_key": "...",
+        "replayed": false,
+        "summary": { "succeeded": 2, "failed": 1 },
+        "items": [ { "user_id": 1, "new_total_score": 75 }, ... ],
+        "failed": [ { "id": 3, "error": "无权操作该学生" } ]
+    }
+
+    batch_key 按管理员区分，同一管理员的同一批次对同一学生只记录一次积分流水：批次已执行过时直接返回该批次中
+    当前仍有权限访问的学生的总分（replayed 为 true），不会重复加减分；此时 failed 为按本次请求参数与当前权限
+    重新判定的结果。batch_key 已用于不同的分数或原因时返回 409。
+    student_ids 单次最多 SCORE_BATCH_MAX_ITEMS 个；按部门调整时不限人数，积分流水分批插入，
+    所有流水与物化余额在同一事务中提交。
+    """
+    admin_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data:
+        return jsonify({'error': '请求体不能为空'}), 400
+
+    batch_key = data.get('batch_key')
+    delta = data.get('delta')
+    reason = data.get('reason')
+    student_ids = data.get('student_ids')
+    department_id = data.get('department_id')
+
+    # 参数验证
+    if not isinstance(batch_key, str) or not batch_key.strip():
+        return jsonify({'error': 'batch_key 不能为空'}), 400
+    batch_key = batch_key.strip()
+    if len(batch_key) > SCORE_BATCH_KEY_MAX_LENGTH:
+        return jsonify({'error': f'batch_key 长度不能超过 {SCORE_BATCH_KEY_MAX_LENGTH}'}), 400
+
+    if delta is None:
+        return jsonify({'error': 'delta 不能为空'}), 400
+
+    if not isinstance(delta, int) or isinstance(delta, bool):
+        return jsonify({'error': 'delta 必须是整数'}), 400
+
+    if delta == 0:
+        return jsonify({'error': '变动分数不能为0'}), 400
+
+    if not isinstance(reason, str) or not reason.strip():
+        return jsonify({'error': 'reason 不能为空'}), 400
+    reason = reason.strip()
+
+    if (student_ids is None) == (department_id is None):
+        return jsonify({'error': 'student_ids 与 department_id 必须且只能提供一个'}), 400
+
+    scope = get_admin_scope(admin_id)
+    if not scope:
+        return jsonify({'error': '管理员不存在'}), 404
+
+    # 确定要调整的学生（一次按权限过滤的查询）
+    department_filter = get_admin_department_filter(User.department_id, admin_id)
+    failed = []
+    if student_ids is not None:
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({'error': 'student_ids 必须是非空数组'}), 400
+        if len(student_ids) > SCORE_BATCH_MAX_ITEMS:
+            return jsonify({'error': f'单次最多调整 {SCORE_BATCH_MAX_ITEMS} 名学生，整个班级请按 department_id 调整'}), 400
+        if any(not isinstance(sid, int) or isinstance(sid, bool) for sid in student_ids):
+            return jsonify({'error': 'student_ids 中的每一项必须是整数'}), 400
+
+        requested_ids = list(dict.fromkeys(student_ids))
+        access_column = true() if department_filter is None else case((department_filter, True), else_=False)
+        found = dict(
+            db.session.query(User.id, access_column)
+            .filter(User.id.in_(requested_ids))
+            .all()
+        )
+
+        target_ids = []
+        for sid in requested_ids:
+            if sid not in found:
+                failed.append({'id': sid, 'error': '学生不存在'})
+            elif not found[sid]:
+                failed.append({'id': sid, 'error': '无权操作该学生'})
+            else:
+                target_ids.append(sid)
+    else:
+        if not isinstance(department_id, int) or isinstance(department_id, bool):
+            return jsonify({'error': 'department_id 必须是整数'}), 400
+        if not scope.can_access_department(department_id):
+            return jsonify({'error': '无权访问该部门'}), 403
+        if not db.session.get(Department, department_id):
+            return jsonify({'error': '部门不存在'}), 404
+
+        target_ids = [
+            sid for sid, in db.session.query(User.id)
+            .filter(User.department_id == department_id)
+            .all()
+        ]
+
+    def replay(logs):
+        if any(log_delta != delta or log_reason != reason for _, log_delta, log_reason in logs):
+            return jsonify({'error': 'batch_key 已用于其他积分调整'}), 409
+        # 只返回当前仍有权限访问的学生（管理员的管理部门可能已变更）
+        logged_ids = [user_id for user_id, _, _ in logs]
+        if department_filter is not None:
+            accessible = set()
+            for i in range(0, len(logged_ids), SCORE_BATCH_MAX_ITEMS):
+                accessible.update(
+                    sid for sid, in db.session.query(User.id)
+                    .filter(User.id.in_(logged_ids[i:i + SCORE_BATCH_MAX_ITEMS]), department_filter)
+                    .all()
+                )
+            logged_ids = [user_id for user_id in logged_ids if user_id in accessible]
+        return _score_batch_response(batch_key, logged_ids, failed, replayed=True)
+
+    # 批次已执行过（客户端重试）：不再重复调整
+    logs = _load_score_batch_logs(scope.admin_id, batch_key)
+    if logs:
+        return replay(logs)
+
+    if target_ids:
+        create_time = datetime.utcnow()
+        try:
+            # 积分流水与物化余额由 bulk_insert_score_logs 同步写入，分批执行、最后一次提交
+            for i in range(0, len(target_ids), SCORE_BATCH_MAX_ITEMS):
+                bulk_insert_score_logs([{
+                    'user_id': user_id,
+                    'delta': delta,
+                    'reason': reason,
+                    'type': ScoreLog.TYPE_MANUAL,
+                    'create_time': create_time,
+                    'admin_id': scope.admin_id,
+                    'batch_key': batch_key,
+                } for user_id in target_ids[i:i + SCORE_BATCH_MAX_ITEMS]])
+            db.session.commit()
+        except IntegrityError:
+            # 并发的同一批次请求已先提交
+            db.session.rollback()
+            logs = _load_score_batch_logs(scope.admin_id, batch_key)
+            if logs:
+                return replay(logs)
+            return jsonify({'error': '积分调整失败: 数据冲突，请重试'}), 500
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'积分调整失败: {str(e)}'}), 500
+
+    return _score_batch_response(batch_key, sorted(target_ids), failed, replayed=False)
+
+
 @admin_bp.route('/students/<int:student_id>/comment', methods=['POST'])
 @jwt_required()
 def add_comment(student_id):
@@ -1058,69 +977,111 @@ def check_admin_access_to_department(admin_id, department_id):
     Returns:
         tuple: (has_access: bool, department: Department or None)
     """
-    admin = AdminUser.query.get(admin_id)
-    if not admin:
+    scope = get_admin_scope(admin_id)
+    if not scope:
         return False, None
     
     department = Department.query.get(department_id)
     if not department:
         return False, None
     
-    # 超级管理员可以在所有部门注册用户
-    if admin.role == AdminUser.ROLE_SUPER:
-        return True, department
-    
-    # 普通管理员只能在自己管理的部门注册用户
-    managed_departments = admin.managed_departments.all()
-    managed_dept_ids = [dept.id for dept in managed_departments]
-    
-    if department_id in managed_dept_ids:
-        return True, department
-    
-    return False, department
+    # 超级管理员可以在所有部门注册用户；普通管理员只能在自己管理的部门注册用户
+    return scope.can_access_department(department_id), department
+
+
+def _parse_department_id(value):
+    """把请求中的 department_id 转换为整数，无法转换时返回 None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
 @admin_bp.route('/department/<int:dept_id>/export/start', methods=['POST'])
 @jwt_required()
 def start_department_export(dept_id):
     """
-    发起部门学生档案批量导出任务（异步）
+    发起部门学生档案批量导出任务（异步，进入后台任务队列）
+    请求体（可选）: { "priority": 0 }  数值越大越先执行
     返回: { "code": 200, "task_id": "..." }
     """
     admin_id = get_jwt_identity()
 
-    # 基本权限校验，避免无效任务进入队列（线程中也会再次校验，双重保险）
+    # 基本权限校验，避免无效任务进入队列（任务执行时也会再次校验，双重保险）
     has_access, department = check_admin_access_to_department(admin_id, dept_id)
     if not department:
         return jsonify({'code': 404, 'error': '部门不存在'}), 404
     if not has_access:
         return jsonify({'code': 403, 'error': '无权导出该部门学生档案'}), 403
 
-    task_id = uuid.uuid4().hex
-
-    with EXPORT_TASKS_LOCK:
-        EXPORT_TASKS[task_id] = {
-            'status': 'processing',   # processing/completed/failed
-            'progress': 0,
-            'total': 0,
-            'file_path': None,
-            'display_filename': None,
-            'error': None,
-            'admin_id': admin_id,
-            'dept_id': dept_id,
-            'created_at': datetime.utcnow().isoformat(),
-        }
+    data = request.get_json(silent=True) or {}
+    priority = data.get('priority', 0)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        return jsonify({'code': 400, 'error': 'priority 必须是整数'}), 400
 
-    # 在线程中执行实际的导出逻辑
-    app = current_app._get_current_object()
-    thread = threading.Thread(
-        target=_run_department_export_task,
-        args=(app, task_id, admin_id, dept_id),
-        daemon=True
+    job, error = enqueue_job(
+        BackgroundJob.TYPE_DEPARTMENT_EXPORT,
+        admin_id,
+        payload={'dept_id': dept_id},
+        priority=priority
     )
-    thread.start()
+    if not job:
+        return jsonify({'code': 429, 'error': error}), 429
+
+    return jsonify({'code': 200, 'task_id': job.id}), 200
+
+
+@admin_bp.route('/department/<int:dept_id>/export/stream', methods=['GET'])
+@jwt_required()
+def stream_department_export(dept_id):
+    """
+    流式导出部门学生档案（同步下载，不进入任务队列）
+    边渲染边输出 ZIP：每个学生的文档渲染完成后立即写入响应流，
+    首个学生完成即开始下载，不在服务器上生成临时文件，内存占用与单个学生的文档大小相当
+    查询参数: compression=deflated|stored（默认 deflated；docx/xlsx 本身已压缩，stored 可减少 CPU 开销）
+    返回: application/zip 分块响应
+    """
+    admin_id = get_jwt_identity()
 
-    return jsonify({'code': 200, 'task_id': task_id}), 200
+    has_access, department = check_admin_access_to_department(admin_id, dept_id)
+    if not department:
+        return jsonify({'code': 404, 'error': '部门不存在'}), 404
+    if not has_access:
+        return jsonify({'code': 403, 'error': '无权导出该部门学生档案'}), 403
+
+    compression_name = request.args.get('compression', 'deflated')
+    if compression_name not in ('deflated', 'stored'):
+        return jsonify({'code': 400, 'error': 'compression 只能是 deflated 或 stored'}), 400
+    compression = zipfile.ZIP_STORED if compression_name == 'stored' else zipfile.ZIP_DEFLATED
+
+    template_path = _get_export_template_path(current_app)
+    if not os.path.exists(template_path):
+        return jsonify({'code': 500, 'error': f'模板文件不存在: {template_path}'}), 500
+    if not PANDAS_AVAILABLE:
+        return jsonify({'code': 500, 'error': 'pandas 未安装，无法生成 Excel 文件'}), 500
+
+    # 数据库查询在返回响应前完成，生成器中只做渲染与打包
+    users = User.query.filter_by(department_id=dept_id).order_by(User.id.asc()).all()
+    snapshots = _build_export_snapshots(users, department)
+    processes = resolve_render_processes(current_app.config.get('EXPORT_RENDER_PROCESSES'))
+
+    rendered_files = (
+        files for _, files in iter_render_student_files(snapshots, template_path, processes)
+    )
+    response = Response(iter_zip_stream(rendered_files, compression), mimetype='application/zip')
+    response.headers['Content-Disposition'] = \
+        f"attachment; filename*=UTF-8''{quote(_get_export_display_filename(department))}"
+    # 禁止反向代理缓冲整个响应
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _get_export_job(task_id):
+    """查询导出任务（不存在或不是导出任务时返回 None）"""
+    job = db.session.get(BackgroundJob, task_id)
+    if not job or job.job_type != BackgroundJob.TYPE_DEPARTMENT_EXPORT:
+        return None
+    return job
 
 
 @admin_bp.route('/export/status/<task_id>', methods=['GET'])
@@ -1128,37 +1089,40 @@ def start_department_export(dept_id):
 def get_export_status(task_id):
     """
     查询导出任务进度
-    返回: { "code": 200, "status": "...", "progress": 0, "total": 0, "download_url": null }
+    返回: { "code": 200, "status": "...", "progress": 0, "total": 0, "download_url": null,
+            "queue_status": "queued", "queue_position": 0 }
+    status 取值 processing/completed/failed（排队中的任务也返回 processing），
+    queue_status 为队列中的实际状态 queued/processing/completed/failed
     """
     admin_id = get_jwt_identity()
 
-    with EXPORT_TASKS_LOCK:
-        task = EXPORT_TASKS.get(task_id)
-        if not task:
-            return jsonify({'code': 404, 'error': '任务不存在'}), 404
+    job = _get_export_job(task_id)
+    if not job:
+        return jsonify({'code': 404, 'error': '任务不存在'}), 404
 
-        # 只允许发起该任务的管理员查询（简单权限控制）
-        if task.get('admin_id') != admin_id:
-            return jsonify({'code': 403, 'error': '无权查询该导出任务'}), 403
+    # 只允许发起该任务的管理员查询（简单权限控制）
+    if job.admin_id != admin_id:
+        return jsonify({'code': 403, 'error': '无权查询该导出任务'}), 403
 
-        status = task.get('status', 'processing')
-        progress = task.get('progress', 0)
-        total = task.get('total', 0)
-        error = task.get('error')
+    status = job.status
+    if status == BackgroundJob.STATUS_QUEUED:
+        status = BackgroundJob.STATUS_PROCESSING
 
-        download_url = None
-        if status == 'completed':
-            # 使用 url_for 生成下载链接（前端可直接使用）
-            download_url = url_for('admin.download_export_file', task_id=task_id)
+    download_url = None
+    if job.status == BackgroundJob.STATUS_COMPLETED:
+        # 使用 url_for 生成下载链接（前端可直接使用）
+        download_url = url_for('admin.download_export_file', task_id=task_id)
 
     return jsonify({
         'code': 200,
         'task_id': task_id,
         'status': status,
-        'progress': progress,
-        'total': total,
-        'error': error,
+        'progress': job.progress or 0,
+        'total': job.total or 0,
+        'error': job.error,
         'download_url': download_url,
+        'queue_status': job.status,
+        'queue_position': get_queue_position(job),
     }), 200
 
 
@@ -1174,20 +1138,20 @@ def download_export_file(task_id):
     
     admin_id = get_jwt_identity()
 
-    with EXPORT_TASKS_LOCK:
-        task = EXPORT_TASKS.get(task_id)
-        if not task:
-            return jsonify({'code': 404, 'error': '任务不存在'}), 404
+    job = _get_export_job(task_id)
+    if not job:
+        return jsonify({'code': 404, 'error': '任务不存在'}), 404
 
-        # 简单权限控制：只能由发起任务的管理员下载
-        if task.get('admin_id') != admin_id:
-            return jsonify({'code': 403, 'error': '无权下载该导出文件'}), 403
+    # 简单权限控制：只能由发起任务的管理员下载
+    if job.admin_id != admin_id:
+        return jsonify({'code': 403, 'error': '无权下载该导出文件'}), 403
 
-        if task.get('status') != 'completed':
-            return jsonify({'code': 400, 'error': '任务尚未完成，无法下载'}), 400
+    if job.status != BackgroundJob.STATUS_COMPLETED:
+        return jsonify({'code': 400, 'error': '任务尚未完成，无法下载'}), 400
 
-        file_path = task.get('file_path')
-        display_filename = task.get('display_filename') or (os.path.basename(file_path) if file_path else None)
+    result = job.result or {}
+    file_path = result.get('file_path')
+    display_filename = result.get('display_filename') or (os.path.basename(file_path) if file_path else None)
 
     if not file_path or not os.path.exists(file_path):
         return jsonify({'code': 410, 'error': '导出文件不存在或已被清理'}), 410
@@ -1227,6 +1191,7 @@ def batch_register():
         ]
     }
     注意：password 必须是使用 RSA 公钥加密后的 base64 字符串，请先调用 GET /api/admin/auth/public-key 获取公钥
+    单次人数上限为 BATCH_REGISTER_MAX_USERS（默认100，密码哈希在请求内同步执行），更多学生请使用异步导入
     返回: {
         "success_count": 2,
         "failed_count": 1,
@@ -1248,158 +1213,143 @@ def batch_register():
     if not users_data:
         return jsonify({'error': 'users 数组不能为空'}), 400
     
-    if len(users_data) > 100:
-        return jsonify({'error': '单次最多只能注册100个用户'}), 400
+    max_users = current_app.config.get('BATCH_REGISTER_MAX_USERS') or 100
+    if len(users_data) > max_users:
+        return jsonify({'error': f'单次最多只能注册{max_users}个用户，更多学生请使用异步导入（/students/import/start）'}), 400
     
     rsa_utils = get_rsa_utils()
-    success_list = []
+    workers = resolve_password_workers(current_app.config.get('PASSWORD_HASH_WORKERS'))
     failed_list = []
     
+    def add_failed(idx, id_card_no, error):
+        failed_list.append({'index': idx, 'id_card_no': id_card_no, 'error': error})
+    
+    # 第一步：参数校验与部门权限检查（引用的部门一次查询加载，权限由管理员权限范围在内存中判断）
+    scope = get_admin_scope(admin_id)
+    department_ids = {
+        _parse_department_id(user_data.get('department_id'))
+        for user_data in users_data if isinstance(user_data, dict)
+    }
+    department_ids.discard(None)
+    departments = {}
+    if scope and department_ids:
+        departments = {
+            department.id: department
+            for department in Department.query.filter(Department.id.in_(department_ids)).all()
+        }
+    
+    candidates = []  # [(idx, user_data, department)]
     for idx, user_data in enumerate(users_data):
-        try:
-            # 提取用户数据
-            id_card_no = user_data.get('id_card_no')
-            student_id = user_data.get('student_id')
-            name = user_data.get('name')
-            password = user_data.get('password')
-            department_id = user_data.get('department_id')
-            
-            # 参数验证
-            if not id_card_no or not name or not password:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no or '',
-                    'error': '身份证号、姓名和密码不能为空'
-                })
-                continue
-            
-            if not department_id:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': 'department_id 不能为空'
-                })
-                continue
-            
-            # 检查管理员是否有权限在该部门注册用户
-            has_access, department = check_admin_access_to_department(admin_id, department_id)
-            if not department:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': f'department_id {department_id} 不存在'
-                })
-                continue
-            
-            if not has_access:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': f'无权在部门 {department_id} 注册用户'
-                })
-                continue
-            
-            # 解密密码
-            try:
-                decrypted_password = rsa_utils.decrypt_password(password)
-            except ValueError as e:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': f'密码解密失败，请确保密码已使用RSA公钥加密: {str(e)}'
-                })
-                continue
-            except Exception as e:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': f'密码处理失败: {str(e)}'
-                })
-                continue
-            
-            # 身份证号格式校验
-            id_card_no = str(id_card_no).strip()
-            if len(id_card_no) != 18:
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': '身份证号必须为18位'
-                })
+        if not isinstance(user_data, dict):
+            add_failed(idx, '', '处理失败: 用户数据必须是对象')
+            continue
+        
+        id_card_no = user_data.get('id_card_no')
+        department_id = user_data.get('department_id')
+        if not id_card_no or not user_data.get('name') or not user_data.get('password'):
+            add_failed(idx, id_card_no or '', '身份证号、姓名和密码不能为空')
+            continue
+        
+        if not department_id:
+            add_failed(idx, id_card_no, 'department_id 不能为空')
+            continue
+        
+        department = departments.get(_parse_department_id(department_id))
+        if not department:
+            add_failed(idx, id_card_no, f'department_id {department_id} 不存在')
+            continue
+        
+        if not scope.can_access_department(department.id):
+            add_failed(idx, id_card_no, f'无权在部门 {department_id} 注册用户')
+            continue
+        
+        candidates.append((idx, user_data, department))
+    
+    # 第二步：并行解密密码
+    decrypted = decrypt_passwords(rsa_utils, [user_data.get('password') for _, user_data, _ in candidates], workers)
+    
+    # 第三步：格式校验与唯一性检查（已注册的身份证号/学号一次查询加载；同一批次内重复的按已注册处理）
+    registered_id_cards, registered_student_ids = load_registered_identities(
+        [str(user_data.get('id_card_no')).strip() for _, user_data, _ in candidates],
+        [str(user_data.get('student_id')).strip() for _, user_data, _ in candidates
+         if user_data.get('student_id') is not None],
+    )
+    
+    prepared = []  # [(idx, 新用户字段, 明文密码)]
+    for (idx, user_data, department), (decrypted_password, decrypt_error) in zip(candidates, decrypted):
+        id_card_no = user_data.get('id_card_no')
+        if decrypt_error:
+            add_failed(idx, id_card_no, decrypt_error)
+            continue
+        
+        # 身份证号格式校验
+        id_card_no = str(id_card_no).strip()
+        if len(id_card_no) != 18:
+            add_failed(idx, id_card_no, '身份证号必须为18位')
+            continue
+        
+        if (not id_card_no[:17].isdigit()) or (not (id_card_no[17].isdigit() or id_card_no[17] in ('X', 'x'))):
+            add_failed(idx, id_card_no, '身份证号格式不正确')
+            continue
+        
+        # 检查身份证号是否已存在（末位 X 不区分大小写）
+        if id_card_no.upper() in registered_id_cards:
+            add_failed(idx, id_card_no, '该身份证号已注册')
+            continue
+        
+        # 学号可选：如果提供，校验格式
+        student_id = user_data.get('student_id')
+        if student_id is not None and str(student_id).strip() != '':
+            student_id = str(student_id).strip()
+            if not student_id.isdigit():
+                add_failed(idx, id_card_no, '学号必须为纯数字')
                 continue
-            
-            if (not id_card_no[:17].isdigit()) or (not (id_card_no[17].isdigit() or id_card_no[17] in ('X', 'x'))):
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': '身份证号格式不正确'
-                })
+            if len(student_id) != 12:
+                add_failed(idx, id_card_no, '学号必须为12位数字')
                 continue
-            
-            # 检查身份证号是否已存在
-            if User.query.filter_by(id_card_no=id_card_no).first():
-                failed_list.append({
-                    'index': idx,
-                    'id_card_no': id_card_no,
-                    'error': '该身份证号已注册'
-                })
+            # 学号唯一性检查
+            if student_id in registered_student_ids:
+                add_failed(idx, id_card_no, '该学号已注册')
                 continue
-            
-            # 学号可选：如果提供，校验格式
-            if student_id is not None and str(student_id).strip() != '':
-                student_id = str(student_id).strip()
-                if not student_id.isdigit():
-                    failed_list.append({
-                        'index': idx,
-                        'id_card_no': id_card_no,
-                        'error': '学号必须为纯数字'
-                    })
-                    continue
-                if len(student_id) != 12:
-                    failed_list.append({
-                        'index': idx,
-                        'id_card_no': id_card_no,
-                        'error': '学号必须为12位数字'
-                    })
-                    continue
-                # 学号唯一性检查
-                if User.query.filter_by(student_id=student_id).first():
-                    failed_list.append({
-                        'index': idx,
-                        'id_card_no': id_card_no,
-                        'error': '该学号已注册'
-                    })
-                    continue
-            else:
-                student_id = None
-            
-            # 创建新用户，使用部门的基础分
-            user = User(
-                id_card_no=id_card_no,
-                student_id=student_id,
-                name=name,
-                department_id=department.id,
-                base_score=department.base_score  # 使用部门的基础分
-            )
-            user.set_password(decrypted_password)
-            
-            db.session.add(user)
-            db.session.flush()  # 刷新以获取用户ID，但不提交事务
-            
-            success_list.append({
-                'index': idx,
-                'user': user.to_dict(include_score=False)
-            })
-            
-        except Exception as e:
-            failed_list.append({
-                'index': idx,
-                'id_card_no': user_data.get('id_card_no', ''),
-                'error': f'处理失败: {str(e)}'
-            })
-    
-    # 提交所有成功的用户
+            registered_student_ids.add(student_id)
+        else:
+            student_id = None
+        registered_id_cards.add(id_card_no.upper())
+        
+        # 新用户使用部门的基础分
+        prepared.append((idx, {
+            'id_card_no': id_card_no,
+            'student_id': student_id,
+            'name': user_data.get('name'),
+            'department_id': department.id,
+            'base_score': department.base_score,
+        }, decrypted_password))
+    
+    # 第四步：并行生成密码哈希
+    password_hashes = hash_passwords([password for _, _, password in prepared], workers)
+    rows = []
+    for (_, row, _), password_hash in zip(prepared, password_hashes):
+        row['password_hash'] = password_hash
+        rows.append(row)
+    failed_list.sort(key=lambda item: item['index'])
+    
+    # 第五步：批量插入并一次提交
     try:
+        success_list = []
+        if rows:
+            bulk_insert_users(rows)
+            created = {}
+            id_card_nos = [row['id_card_no'] for row in rows]
+            for i in range(0, len(id_card_nos), IDENTITY_QUERY_CHUNK_SIZE):
+                chunk = id_card_nos[i:i + IDENTITY_QUERY_CHUNK_SIZE]
+                for user in User.query.filter(User.id_card_no.in_(chunk)).all():
+                    created[user.id_card_no] = user
+            success_list = [
+                {'index': idx, 'user': created[row['id_card_no']].to_dict(include_score=False)}
+                for idx, row, _ in prepared
+            ]
         db.session.commit()
+        invalidate_dashboard_stats()
         return jsonify({
             'success_count': len(success_list),
             'failed_count': len(failed_list),
@@ -1411,9 +1361,9 @@ def batch_register():
         return jsonify({
             'error': f'批量注册提交失败: {str(e)}',
             'success_count': 0,
-            'failed_count': len(failed_list) + len(success_list),
+            'failed_count': len(failed_list) + len(prepared),
             'success': [],
-            'failed': failed_list + [{'index': item['index'], 'id_card_no': item['user']['id_card_no'], 'error': '数据库提交失败'} for item in success_list]
+            'failed': failed_list + [{'index': idx, 'id_card_no': row['id_card_no'], 'error': '数据库提交失败'} for idx, row, _ in prepared]
         }), 500
 
 
@@ -1457,52 +1407,47 @@ def get_student_score_logs(student_id):
     if limit < 1 or limit > 100:
         limit = 20
     
-    # 构建查询
-    query = ScoreLog.query.filter_by(user_id=student_id)
+    # 构建查询条件
+    filters = [ScoreLog.user_id == student_id]
     
     # 类型过滤
     if type_filter is not None:
         if type_filter == 1:
-            query = query.filter(ScoreLog.type == ScoreLog.TYPE_MANUAL)
+            filters.append(ScoreLog.type == ScoreLog.TYPE_MANUAL)
         elif type_filter == 2:
-            query = query.filter(ScoreLog.type == ScoreLog.TYPE_SYSTEM)
+            filters.append(ScoreLog.type == ScoreLog.TYPE_SYSTEM)
         else:
             return jsonify({'code': 400, 'message': '无效的类型参数，支持的值：1（人工调整）或 2（系统自动）'}), 400
     
-    # 按创建时间倒序排列
-    query = query.order_by(ScoreLog.create_time.desc())
-    
-    # 分页查询
-    pagination = query.paginate(
-        page=page,
-        per_page=limit,
-        error_out=False
-    )
-    
-    # 为了计算 old_score 和 new_score，需要获取所有记录（按时间正序）
-    # 注意：即使使用了类型过滤，old_score 的计算也应该基于所有记录，而不是只考虑过滤后的记录
-    # 这样才能保证 old_score 的准确性（反映该记录发生前的实际总分）
+    total = ScoreLog.query.filter(*filters).count()
+    
+    # 变动后的累计分数由数据库窗口函数计算（SUM() OVER 按时间正序累加），只取当前页的记录
+    # 注意：窗口只按学生过滤，不考虑类型过滤，保证 old_score 反映该记录发生前的实际总分
+    ledger = db.session.query(
+        ScoreLog.id.label('log_id'),
+        func.sum(ScoreLog.delta).over(
+            order_by=(ScoreLog.create_time.asc(), ScoreLog.id.asc())
+        ).label('balance_after')
+    ).filter(ScoreLog.user_id == student_id).subquery()
+    
+    # 按创建时间倒序分页
+    rows = db.session.query(ScoreLog, ledger.c.balance_after)\
+        .join(ledger, ledger.c.log_id == ScoreLog.id)\
+        .filter(*filters)\
+        .order_by(ScoreLog.create_time.desc(), ScoreLog.id.desc())\
+        .offset((page - 1) * limit)\
+        .limit(limit)\
+        .all()
     
     # 获取基础分
     base_score = student.base_score
     
-    # 获取所有记录（用于计算分数，按时间正序，不考虑类型过滤）
-    all_logs = ScoreLog.query.filter_by(user_id=student_id)\
-        .order_by(ScoreLog.create_time.asc()).all()
-    
-    # 构建一个字典，key为log_id，value为该记录之前的累计分数
-    score_before_log = {}
-    current_score = base_score
-    for log in all_logs:
-        score_before_log[log.id] = current_score
-        current_score += log.delta
-    
     # 构建返回数据
     items = []
-    for log in pagination.items:
+    for log, balance_after in rows:
         # 计算变动前后的分数
-        old_score = score_before_log.get(log.id, base_score)
-        new_score = old_score + log.delta
+        new_score = base_score + int(balance_after or 0)
+        old_score = new_score - log.delta
         
         # 类型转换：'manual' -> 1, 'system' -> 2
         type_value = 1 if log.type == ScoreLog.TYPE_MANUAL else 2
@@ -1525,7 +1470,7 @@ def get_student_score_logs(student_id):
         'code': 200,
         'data': {
             'items': items,
-            'total': pagination.total
+            'total': total
         },
         'message': 'success'
     }), 200
@@ -1611,10 +1556,8 @@ def update_student_archive(student_id):
                     if not department:
                         return jsonify({'code': 404, 'message': f'部门ID {dept_id} 不存在'}), 404
                     # 普通管理员只能将学生分配到其管理的部门
-                    if admin.role != AdminUser.ROLE_SUPER:
-                        managed_dept_ids = [dept.id for dept in admin.managed_departments.all()]
-                        if dept_id not in managed_dept_ids:
-                            return jsonify({'code': 403, 'message': '无权将学生分配到该部门'}), 403
+                    if not get_admin_scope(admin_id).can_access_department(dept_id):
+                        return jsonify({'code': 403, 'message': '无权将学生分配到该部门'}), 403
                 student.department_id = dept_id
 
             if 'base_score' in base_info:
@@ -1704,6 +1647,7 @@ def update_student_archive(student_id):
         
         # 提交事务（所有操作一起提交，确保原子性）
         db.session.commit()
+        invalidate_dashboard_stats()
         
         return jsonify({
             'code': 200,
@@ -1719,6 +1663,118 @@ def update_student_archive(student_id):
         }), 500
 
 
+def _check_import_request(admin_id):
+    """
+    校验 Excel 导入请求（同步导入与异步导入任务共用）：上传文件、department_id 参数及管理员权限
+    
+    Returns:
+        tuple: (department, file, filename, error_response)，校验失败时 error_response 为 (响应, 状态码)
+    """
+    if not PANDAS_AVAILABLE:
+        return None, None, None, (jsonify({
+            'code': 500,
+            'message': 'pandas 未安装，请运行: pip install pandas openpyxl'
+        }), 500)
+    
+    scope = get_admin_scope(admin_id)
+    
+    if not scope:
+        return None, None, None, (jsonify({'code': 404, 'message': '管理员不存在'}), 404)
+    
+    # 检查文件是否上传
+    if 'file' not in request.files:
+        return None, None, None, (jsonify({'code': 400, 'message': '未上传文件，请使用字段名 "file"'}), 400)
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return None, None, None, (jsonify({'code': 400, 'message': '文件名为空'}), 400)
+    
+    # 检查文件扩展名
+    filename = file.filename.lower()
+    if not filename.endswith(('.xlsx', '.xls', '.csv')):
+        return None, None, None, (jsonify({'code': 400, 'message': '不支持的文件格式，仅支持 .xlsx、.xls 和 .csv 文件'}), 400)
+    
+    # 获取 department_id 参数
+    department_id_str = request.form.get('department_id')
+    if not department_id_str:
+        return None, None, None, (jsonify({'code': 400, 'message': '缺少必需参数: department_id'}), 400)
+    
+    try:
+        department_id = int(department_id_str)
+    except (ValueError, TypeError):
+        return None, None, None, (jsonify({'code': 400, 'message': 'department_id 必须是整数'}), 400)
+    
+    # 验证部门是否存在
+    department = Department.query.get(department_id)
+    if not department:
+        return None, None, None, (jsonify({'code': 404, 'message': f'部门ID {department_id} 不存在'}), 404)
+    
+    # 权限检查：超级管理员可以访问所有部门，普通管理员只能导入到其管理的部门
+    if not scope.is_super:
+        if not scope.department_ids:
+            return None, None, None, (jsonify({'code': 403, 'message': '您没有管理的部门，无法导入学生'}), 403)
+        
+        if department_id not in scope.department_ids:
+            return None, None, None, (jsonify({'code': 403, 'message': f'无权将学生导入到部门ID {department_id}'}), 403)
+    
+    return department, file, filename, None
+
+
+def _read_import_sheet(source, filename):
+    """
+    读取整个导入文件（Excel 或 CSV）并检查必需的列
+    
+    Args:
+        source: 二进制文件对象或文件路径（CSV 只支持文件对象）
+        filename: 原始文件名（小写，用于选择读取方式）
+    
+    Returns:
+        DataFrame
+    
+    Raises:
+        ValueError: 文件读取失败或缺少必需的列（异常信息可直接返回给前端）
+    """
+    if filename.endswith('.csv'):
+        try:
+            return read_import_frame(source, filename)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f'CSV 文件读取失败: {str(e)}')
+    
+    try:
+        # 使用 pandas 读取 Excel
+        df = pd.read_excel(source, engine='openpyxl' if filename.endswith('.xlsx') else None)
+    except Exception as e:
+        raise ValueError(f'Excel 文件读取失败: {str(e)}')
+    
+    missing_columns = [col for col in IMPORT_REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f'Excel 文件缺少必需的列: {", ".join(missing_columns)}')
+    return df
+
+
+def _build_import_user_rows(new_students, department):
+    """
+    生成待插入的学生数据：导入到指定部门并使用部门的基础分，
+    默认密码为身份证号后6位（并行生成密码哈希）
+    """
+    workers = resolve_password_workers(current_app.config.get('PASSWORD_HASH_WORKERS'))
+    password_hashes = hash_passwords([student['id_card_no'][-6:] for student in new_students], workers)
+    return [
+        {
+            'id_card_no': student['id_card_no'],
+            'student_id': student['student_id'],
+            'name': student['name'],
+            'password_hash': password_hash,
+            'department_id': department.id,
+            'base_score': department.base_score,
+        }
+        for student, password_hash in zip(new_students, password_hashes)
+    ]
+
+
 @admin_bp.route('/students/import', methods=['POST'])
 @admin_required
 def import_students_from_excel():
@@ -1732,7 +1788,7 @@ def import_students_from_excel():
     
     Excel 文件格式要求：
     - 第一行为列名：学号、姓名、身份证号
-    - 支持 .xlsx 和 .xls 格式
+    - 支持 .xlsx、.xls 和 .csv 格式（CSV 支持 UTF-8 与 GBK 编码）
     - 不需要包含班级名称，班级由前端传入的 department_id 指定
     
     逻辑：
@@ -1759,211 +1815,30 @@ def import_students_from_excel():
     - pandas: pip install pandas
     - openpyxl: pip install openpyxl (用于读取 .xlsx 文件)
     """
-    if not PANDAS_AVAILABLE:
-        return jsonify({
-            'code': 500,
-            'message': 'pandas 未安装，请运行: pip install pandas openpyxl'
-        }), 500
-    
     admin_id = get_jwt_identity()
-    admin = AdminUser.query.get(admin_id)
-    
-    if not admin:
-        return jsonify({'code': 404, 'message': '管理员不存在'}), 404
-    
-    # 检查文件是否上传
-    if 'file' not in request.files:
-        return jsonify({'code': 400, 'message': '未上传文件，请使用字段名 "file"'}), 400
-    
-    file = request.files['file']
-    
-    if file.filename == '':
-        return jsonify({'code': 400, 'message': '文件名为空'}), 400
-    
-    # 检查文件扩展名
-    filename = file.filename.lower()
-    if not (filename.endswith('.xlsx') or filename.endswith('.xls')):
-        return jsonify({'code': 400, 'message': '不支持的文件格式，仅支持 .xlsx 和 .xls 文件'}), 400
-    
-    # 获取 department_id 参数
-    department_id_str = request.form.get('department_id')
-    if not department_id_str:
-        return jsonify({'code': 400, 'message': '缺少必需参数: department_id'}), 400
-    
-    try:
-        department_id = int(department_id_str)
-    except (ValueError, TypeError):
-        return jsonify({'code': 400, 'message': 'department_id 必须是整数'}), 400
-    
-    # 验证部门是否存在
-    department = Department.query.get(department_id)
-    if not department:
-        return jsonify({'code': 404, 'message': f'部门ID {department_id} 不存在'}), 404
-    
-    # 获取管理员管理的部门列表（用于权限检查）
-    if admin.role == AdminUser.ROLE_SUPER:
-        managed_dept_ids = None  # 超级管理员可以访问所有部门
-    else:
-        managed_departments = admin.managed_departments.all()
-        managed_dept_ids = [dept.id for dept in managed_departments]
-        if not managed_dept_ids:
-            return jsonify({'code': 403, 'message': '您没有管理的部门，无法导入学生'}), 403
-        
-        # 权限检查：普通管理员只能导入到其管理的部门
-        if department_id not in managed_dept_ids:
-            return jsonify({'code': 403, 'message': f'无权将学生导入到部门ID {department_id}'}), 403
+    department, file, filename, error_response = _check_import_request(admin_id)
+    if error_response:
+        return error_response
     
     # 读取 Excel 文件
     try:
-        # 使用 pandas 读取 Excel
-        df = pd.read_excel(file, engine='openpyxl' if filename.endswith('.xlsx') else None)
-    except Exception as e:
-        return jsonify({
-            'code': 400,
-            'message': f'Excel 文件读取失败: {str(e)}'
-        }), 400
+        df = _read_import_sheet(file.stream, filename)
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
     
-    # 检查必需的列（不再需要班级名称列）
-    required_columns = ['学号', '姓名', '身份证号']
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    
-    if missing_columns:
-        return jsonify({
-            'code': 400,
-            'message': f'Excel 文件缺少必需的列: {", ".join(missing_columns)}'
-        }), 400
-    
-    # 统计数据
+    # 按列校验数据并批量查询已注册的身份证号/学号
+    new_students, skip_count, errors = validate_import_rows(df)
+    error_count = len(errors)
     success_count = 0
-    skip_count = 0
-    error_count = 0
-    errors = []
-    
-    # 批量查询已存在的学号和身份证号（优化性能）
-    existing_student_ids_query = User.query.with_entities(User.student_id).filter(
-        User.student_id.isnot(None),
-        User.student_id != ''
-    ).all()
-    existing_student_ids = {str(sid[0]) for sid in existing_student_ids_query if sid[0] and str(sid[0]).strip()}
-    
-    existing_id_cards_query = User.query.with_entities(User.id_card_no).all()
-    existing_id_cards = {str(card[0]) for card in existing_id_cards_query if card[0]}
-    
-    # 准备批量插入的数据
-    users_to_add = []
-    
-    # 遍历每一行数据
-    for index, row in df.iterrows():
-        row_num = index + 2  # Excel 行号（从2开始，因为第1行是列名）
-        
-        try:
-            # 提取数据（去除前后空格）
-            student_id = str(row['学号']).strip() if pd.notna(row['学号']) else ''
-            name = str(row['姓名']).strip() if pd.notna(row['姓名']) else ''
-            id_card_no = str(row['身份证号']).strip() if pd.notna(row['身份证号']) else ''
-            
-            # 基本验证
-            if not name:
-                errors.append({
-                    'row': row_num,
-                    'student_id': student_id,
-                    'error': '姓名为空'
-                })
-                error_count += 1
-                continue
-            
-            if not id_card_no:
-                errors.append({
-                    'row': row_num,
-                    'student_id': student_id,
-                    'error': '身份证号为空'
-                })
-                error_count += 1
-                continue
-            
-            # 身份证号格式验证
-            id_card_no = id_card_no.upper()  # 统一转为大写
-            if len(id_card_no) != 18:
-                errors.append({
-                    'row': row_num,
-                    'student_id': student_id,
-                    'id_card_no': id_card_no,
-                    'error': '身份证号必须为18位'
-                })
-                error_count += 1
-                continue
-            
-            if (not id_card_no[:17].isdigit()) or (not (id_card_no[17].isdigit() or id_card_no[17] == 'X')):
-                errors.append({
-                    'row': row_num,
-                    'student_id': student_id,
-                    'id_card_no': id_card_no,
-                    'error': '身份证号格式不正确'
-                })
-                error_count += 1
-                continue
-            
-            # 检查身份证号是否已存在
-            if id_card_no in existing_id_cards:
-                skip_count += 1
-                continue
-            
-            # 检查学号是否已存在（如果提供了学号）
-            if student_id and student_id in existing_student_ids:
-                skip_count += 1
-                continue
-            
-            # 使用前端传入的 department_id（已在前面验证过）
-            
-            # 学号格式验证（如果提供了学号）
-            if student_id:
-                if not student_id.isdigit():
-                    errors.append({
-                        'row': row_num,
-                        'student_id': student_id,
-                        'error': '学号必须为纯数字'
-                    })
-                    error_count += 1
-                    continue
-            
-            # 准备创建用户对象（使用前端传入的 department_id）
-            # 使用部门的基础分，如果部门不存在则使用默认值80
-            department_base_score = 80
-            if department:
-                department_base_score = department.base_score
-            
-            user = User(
-                id_card_no=id_card_no,
-                student_id=student_id if student_id else None,
-                name=name,
-                department_id=department_id,  # 使用前端传入的部门ID
-                base_score=department_base_score  # 使用部门的基础分
-            )
-            # 设置默认密码（使用身份证号后6位作为初始密码）
-            default_password = id_card_no[-6:]
-            user.set_password(default_password)
-            
-            users_to_add.append(user)
-            
-            # 更新已存在的集合（避免同一批数据中的重复）
-            if student_id:
-                existing_student_ids.add(student_id)
-            existing_id_cards.add(id_card_no)
-            
-        except Exception as e:
-            errors.append({
-                'row': row_num,
-                'error': f'处理失败: {str(e)}'
-            })
-            error_count += 1
-            continue
+    rows = _build_import_user_rows(new_students, department)
     
     # 批量插入数据库
-    if users_to_add:
+    if rows:
         try:
-            db.session.add_all(users_to_add)
+            bulk_insert_users(rows)
             db.session.commit()
-            success_count = len(users_to_add)
+            invalidate_dashboard_stats()
+            success_count = len(rows)
         except Exception as e:
             db.session.rollback()
             return jsonify({
@@ -1980,4 +1855,353 @@ def import_students_from_excel():
             'errors': errors[:100]  # 最多返回100条错误信息，避免响应过大
         },
         'message': 'import completed'
-    }), 200
\ No newline at end of file
+    }), 200
+
+def _get_import_temp_dir(app):
+    """异步导入任务的临时目录（上传的 Excel 文件、错误明细与错误报告）"""
+    return os.path.join(app.instance_path, 'temp')
+
+
+def _cleanup_old_import_files(app, max_age_hours=24):
+    """
+    清理临时目录中超过指定时间的导入文件（上传的 Excel、错误明细与错误报告）
+    
+    Args:
+        app: Flask 应用实例
+        max_age_hours: 文件最大保留时间（小时），默认24小时
+    """
+    temp_dir = _get_import_temp_dir(app)
+    if not os.path.exists(temp_dir):
+        return
+    
+    current_time = datetime.now().timestamp()
+    for filename in os.listdir(temp_dir):
+        if not filename.startswith('import_'):
+            continue
+        file_path = os.path.join(temp_dir, filename)
+        try:
+            if current_time - os.path.getmtime(file_path) > max_age_hours * 3600:
+                os.remove(file_path)
+        except OSError:
+            # 文件可能已被删除或无法访问，忽略错误
+            pass
+
+
+def _append_import_errors(errors_path, errors):
+    """把一批错误明细追加到 JSON Lines 文件，返回追加后的文件长度（字节）"""
+    with open(errors_path, 'ab') as f:
+        for error in errors:
+            f.write(json.dumps(error, ensure_ascii=False).encode('utf-8') + b'\n')
+        return f.tell()
+
+
+def _iter_import_errors(errors_path):
+    """逐条读取错误明细文件中的错误"""
+    if not os.path.exists(errors_path):
+        return
+    with open(errors_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_import_job_chunks(file_path, filename, chunk_size, start_row):
+    """
+    按批读取导入文件：.xlsx/.csv 流式逐行读取（内存占用与文件大小无关），.xls 只能整表读取后切片
+    
+    Yields:
+        tuple: (已读取的数据行数, DataFrame)
+    """
+    if filename.endswith(STREAMING_IMPORT_EXTENSIONS):
+        with open(file_path, 'rb') as f:
+            yield from iter_import_chunks(f, filename, chunk_size, start_row)
+        return
+    
+    df = _read_import_sheet(file_path, filename)
+    for start in range(start_row, len(df), chunk_size):
+        yield min(start + chunk_size, len(df)), df.iloc[start:start + chunk_size]
+
+
+def _insert_import_rows(rows, new_students):
+    """
+    在保存点内批量插入一批学生；失败时将该批二分后分别重试，只把无法插入的行记为错误
+
+    Args:
+        rows: 待插入的学生数据（与 new_students 一一对应）
+        new_students: validate_import_rows 返回的待创建学生（用于错误中的行号、学号与身份证号）
+
+    Returns:
+        tuple: (成功插入的行数, 错误列表)
+    """
+    try:
+        with db.session.begin_nested():
+            bulk_insert_users(rows)
+        return len(rows), []
+    except SQLAlchemyError as e:
+        if len(rows) == 1:
+            student = new_students[0]
+            return 0, [{
+                'row': student['row'],
+                'student_id': student['student_id'] or '',
+                'id_card_no': student['id_card_no'],
+                'error': f'数据库写入失败: {str(e.orig if hasattr(e, "orig") else e)[:200]}'
+            }]
+
+    middle = len(rows) // 2
+    inserted, errors = _insert_import_rows(rows[:middle], new_students[:middle])
+    inserted_rest, errors_rest = _insert_import_rows(rows[middle:], new_students[middle:])
+    return inserted + inserted_rest, errors + errors_rest
+
+
+@register_job_handler(BackgroundJob.TYPE_STUDENT_IMPORT)
+def _run_student_import_job(ctx):
+    """
+    后台任务：Excel 批量导入学生（分批处理，每批单独提交）
+
+    步骤：
+      1. 再次检查部门与管理员权限，读取发起任务时保存的 Excel 文件
+      2. 每 STUDENT_IMPORT_CHUNK_SIZE 行为一批：按列校验、并行生成密码哈希、批量插入，
+         新学生与断点（下一批的起始行、累计统计）在同一事务中提交
+      3. 某一批写入数据库失败时回滚到该批的保存点并二分重试，只有无法插入的行记为错误
+      4. 错误明细逐批追加到 instance/temp/import_{任务ID}_errors.jsonl，全部完成后生成错误报告 Excel
+
+    断点续跑：进程崩溃后任务会重新入队，再次执行时从最后提交的批次之后继续
+    （错误明细文件截断到断点记录的长度，丢弃未提交批次已写入的错误）
+    """
+    app = current_app._get_current_object()
+    dept_id = ctx.payload.get('dept_id')
+    file_path = ctx.payload.get('file_path')
+    original_filename = ctx.payload.get('filename') or ''
+
+    # 再次检查部门与管理员权限
+    department = db.session.get(Department, dept_id)
+    if not department:
+        raise ValueError(f'部门ID {dept_id} 不存在')
+    scope = get_admin_scope(ctx.admin_id)
+    if not scope or not scope.can_access_department(dept_id):
+        raise ValueError(f'无权将学生导入到部门ID {dept_id}')
+
+    if not PANDAS_AVAILABLE:
+        raise ValueError('pandas 未安装，无法读取 Excel 文件')
+    if not file_path or not os.path.exists(file_path):
+        raise ValueError('导入文件不存在或已被清理')
+    filename = original_filename.lower()
+
+    # 断点：下一批的起始行、累计统计与错误明细文件长度
+    temp_dir = _get_import_temp_dir(app)
+    errors_path = os.path.join(temp_dir, f'import_{ctx.job_id}_errors.jsonl')
+    next_row = ctx.checkpoint.get('next_row', 0)
+    counts = {key: ctx.checkpoint.get(key, 0) for key in ('success_count', 'skip_count', 'error_count')}
+    with open(errors_path, 'ab') as f:
+        f.truncate(ctx.checkpoint.get('errors_size', 0))
+    ctx.set_progress(next_row, total=ctx.payload.get('total') or 0)
+
+    chunk_size = max(1, int(app.config.get('STUDENT_IMPORT_CHUNK_SIZE') or 500))
+    for consumed, chunk in _iter_import_job_chunks(file_path, filename, chunk_size, next_row):
+        # 每批的索引为数据行序号，错误中的行号与表格行号一致；更靠前批次已提交的学生在本批按已注册跳过
+        new_students, skip_count, errors = validate_import_rows(chunk)
+        rows = _build_import_user_rows(new_students, department)
+        inserted = 0
+        if rows:
+            inserted, insert_errors = _insert_import_rows(rows, new_students)
+            if insert_errors:
+                errors.extend(insert_errors)
+                errors.sort(key=lambda error: error['row'])
+
+        counts['success_count'] += inserted
+        counts['skip_count'] += skip_count
+        counts['error_count'] += len(errors)
+        errors_size = _append_import_errors(errors_path, errors)
+        next_row = consumed
+
+        # 保存断点时提交事务：本批新学生与断点一起提交
+        ctx.save_checkpoint(dict(counts, next_row=next_row, errors_size=errors_size), progress=next_row)
+        if inserted:
+            invalidate_dashboard_stats()
+
+    # .xlsx 记录的行数可能包含末尾空行，以实际读取的行数为准
+    if next_row != ctx.payload.get('total'):
+        ctx.set_progress(next_row, total=next_row)
+
+    # 生成错误报告（逐条写入只写模式的工作簿，错误再多内存占用也不随之增长）
+    report_path = None
+    report_filename = None
+    first_errors = list(islice(_iter_import_errors(errors_path), 100))
+    if first_errors:
+        from openpyxl import Workbook
+
+        report_path = os.path.join(temp_dir, f'import_{ctx.job_id}_report.xlsx')
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('错误明细')
+        sheet.append(['行号', '学号', '身份证号', '错误信息'])
+        for error in _iter_import_errors(errors_path):
+            sheet.append([error['row'], error.get('student_id', ''), error.get('id_card_no', ''), error['error']])
+        # 先写临时文件再原子替换
+        workbook.save(report_path + '.tmp')
+        os.replace(report_path + '.tmp', report_path)
+        report_filename = f'{os.path.splitext(original_filename)[0] or "学生导入"}_错误报告.xlsx'
+
+    for path in (file_path, errors_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    return dict(
+        counts,
+        errors=first_errors,
+        report_path=report_path,
+        report_filename=report_filename,
+    )
+
+
+@admin_bp.route('/students/import/start', methods=['POST'])
+@admin_required
+def start_student_import():
+    """
+    发起 Excel/CSV 批量导入学生任务（异步，进入后台任务队列），适用于数据量较大的文件
+    
+    请求格式与 POST /students/import 相同（multipart/form-data）:
+    - file (Excel 或 CSV 文件，.xlsx/.csv 流式逐行读取，适合数万行以上的文件；CSV 解析速度更快)
+    - department_id (部门ID，整数，必填)
+    - priority (可选，整数，数值越大越先执行)
+    
+    与同步导入的区别：文件按 STUDENT_IMPORT_CHUNK_SIZE 行分批导入，每批单独提交，
+    某一批写入失败不影响其他批次；任务中断后从最后提交的批次继续；完成后可下载错误报告
+    
+    返回: { "code": 200, "task_id": "..." }
+    """
+    admin_id = get_jwt_identity()
+    department, file, filename, error_response = _check_import_request(admin_id)
+    if error_response:
+        return error_response
+    
+    try:
+        priority = int(request.form.get('priority') or 0)
+    except ValueError:
+        return jsonify({'code': 400, 'message': 'priority 必须是整数'}), 400
+    
+    # 保存上传的文件，供后台任务读取
+    _cleanup_old_import_files(current_app)
+    temp_dir = _get_import_temp_dir(current_app)
+    os.makedirs(temp_dir, exist_ok=True)
+    file_path = os.path.join(temp_dir, f'import_{uuid.uuid4().hex}{os.path.splitext(filename)[1]}')
+    file.save(file_path)
+    
+    # 检查表头并统计行数（.xlsx/.csv 流式读取，不加载整个文件）
+    try:
+        if filename.endswith(STREAMING_IMPORT_EXTENSIONS):
+            with open(file_path, 'rb') as f:
+                total = inspect_import_file(f, filename)
+        else:
+            total = len(_read_import_sheet(file_path, filename))
+    except ValueError as e:
+        os.remove(file_path)
+        return jsonify({'code': 400, 'message': str(e)}), 400
+    
+    job, error = enqueue_job(
+        BackgroundJob.TYPE_STUDENT_IMPORT,
+        admin_id,
+        payload={'dept_id': department.id, 'file_path': file_path, 'filename': file.filename, 'total': total},
+        priority=priority
+    )
+    if not job:
+        os.remove(file_path)
+        return jsonify({'code': 429, 'message': error}), 429
+    
+    return jsonify({'code': 200, 'task_id': job.id}), 200
+
+
+def _get_import_job(task_id):
+    """查询导入任务（不存在或不是导入任务时返回 None）"""
+    job = db.session.get(BackgroundJob, task_id)
+    if not job or job.job_type != BackgroundJob.TYPE_STUDENT_IMPORT:
+        return None
+    return job
+
+
+@admin_bp.route('/students/import/status/<task_id>', methods=['GET'])
+@admin_required
+def get_student_import_status(task_id):
+    """
+    查询导入任务进度与结果
+    返回: {
+        "code": 200,
+        "task_id": "...",
+        "status": "queued/processing/completed/failed",
+        "progress": 1000,          # 已处理（已提交）的行数
+        "total": 5000,             # 总行数
+        "queue_position": 0,
+        "error": null,             # 任务失败原因
+        "data": {
+            "success_count": 10, "skip_count": 2, "error_count": 1,   # 执行中为已提交批次的累计值
+            "errors": [...]        # 任务完成后返回前100条错误
+        },
+        "report_url": "..."        # 任务完成且存在错误时返回错误报告下载链接
+    }
+    """
+    admin_id = get_jwt_identity()
+    
+    job = _get_import_job(task_id)
+    if not job:
+        return jsonify({'code': 404, 'message': '任务不存在'}), 404
+    
+    # 只允许发起该任务的管理员查询
+    if job.admin_id != admin_id:
+        return jsonify({'code': 403, 'message': '无权查询该导入任务'}), 403
+    
+    summary = job.result or job.checkpoint or {}
+    report_url = None
+    if job.status == BackgroundJob.STATUS_COMPLETED and summary.get('report_path'):
+        report_url = url_for('admin.download_student_import_report', task_id=task_id)
+    
+    return jsonify({
+        'code': 200,
+        'task_id': task_id,
+        'status': job.status,
+        'progress': job.progress or 0,
+        'total': job.total or 0,
+        'queue_position': get_queue_position(job),
+        'error': job.error,
+        'data': {
+            'success_count': summary.get('success_count', 0),
+            'skip_count': summary.get('skip_count', 0),
+            'error_count': summary.get('error_count', 0),
+            'errors': summary.get('errors', []),
+        },
+        'report_url': report_url,
+    }), 200
+
+
+@admin_bp.route('/students/import/report/<task_id>', methods=['GET'])
+@admin_required
+def download_student_import_report(task_id):
+    """
+    下载导入任务的错误报告（Excel：行号、学号、身份证号、错误信息）
+    报告保留24小时，期间可重复下载
+    """
+    admin_id = get_jwt_identity()
+    
+    job = _get_import_job(task_id)
+    if not job:
+        return jsonify({'code': 404, 'message': '任务不存在'}), 404
+    
+    if job.admin_id != admin_id:
+        return jsonify({'code': 403, 'message': '无权下载该导入报告'}), 403
+    
+    if job.status != BackgroundJob.STATUS_COMPLETED:
+        return jsonify({'code': 400, 'message': '任务尚未完成，无法下载'}), 400
+    
+    result = job.result or {}
+    report_path = result.get('report_path')
+    if not report_path:
+        return jsonify({'code': 404, 'message': '本次导入没有错误，无需下载报告'}), 404
+    if not os.path.exists(report_path):
+        return jsonify({'code': 410, 'message': '错误报告不存在或已被清理'}), 410
+    
+    return send_file(
+        report_path,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=result.get('report_filename') or os.path.basename(report_path)
+    )
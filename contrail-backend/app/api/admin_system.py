@@ -6,12 +6,15 @@
 """
 import logging
 from flask import request, jsonify
+from sqlalchemy import select
 from app.api.admin_auth import admin_bp
 from app.extensions import db
-from app.models import AdminUser, Department, CertificateType, Certificate, User
+from app.models import AdminUser, Department, CertificateType, Certificate, admin_departments
 from app.utils.rsa_utils import get_rsa_utils
 from app.utils.admin_permission import super_admin_required, admin_required
-from app.utils.permission import get_admin_accessible_query
+from app.utils.dashboard_stats import get_dashboard_stats_cached, invalidate_dashboard_stats, get_dashboard_cache_stats
+from app.utils.s3_presign import get_presign_cache_stats
+from app.utils.permission import invalidate_admin_scope, get_admin_scope_cache_stats, bump_admin_scope_version
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
@@ -240,8 +243,14 @@ def update_admin(admin_id):
             # 如果是超级管理员，清空部门关联
             admin.managed_departments = []
     
+    # 角色或管理部门变更：递增权限版本号，使已签发令牌中的权限声明失效
+    if 'role' in data or 'department_ids' in data:
+        admin.scope_version = (admin.scope_version or 0) + 1
+    
     try:
         db.session.commit()
+        invalidate_dashboard_stats()
+        invalidate_admin_scope(admin.id)
         
         # 获取管理的部门ID列表
         managed_departments = admin.managed_departments.all()
@@ -306,6 +315,8 @@ def delete_admin(admin_id):
     try:
         db.session.delete(admin)
         db.session.commit()
+        invalidate_dashboard_stats()
+        invalidate_admin_scope(admin_id)
         return jsonify({'message': '管理员删除成功'}), 200
     except Exception as e:
         db.session.rollback()
@@ -555,6 +566,7 @@ def create_department():
             logger.info(f"[部门创建] 自动关联 {len(default_cert_types)} 个默认证书类型到部门 {department.id}")
         
         db.session.commit()
+        invalidate_dashboard_stats()
         return jsonify({
             'message': '部门创建成功',
             'department': department.to_dict()
@@ -681,6 +693,7 @@ def update_department(dept_id):
     
     try:
         db.session.commit()
+        invalidate_dashboard_stats()
         return jsonify({
             'message': '部门信息更新成功',
             'department': department.to_dict()
@@ -710,8 +723,15 @@ def delete_department(dept_id):
         }), 400
     
     try:
+        # 管理该部门的管理员权限范围随之变化
+        bump_admin_scope_version(
+            select(admin_departments.c.admin_id).where(admin_departments.c.department_id == department.id)
+        )
         db.session.delete(department)
         db.session.commit()
+        invalidate_dashboard_stats()
+        # 部门删除后其管理员关联随之删除
+        invalidate_admin_scope()
         return jsonify({'message': '部门删除成功'}), 200
     except Exception as e:
         db.session.rollback()
@@ -736,7 +756,16 @@ def get_dashboard_stats():
                 "admission": {0: 40, 1: 50, 2: 10},
                 "medical": {0: 20, 1: 70, 2: 10},
                 "vetted": {0: 30, 1: 60, 2: 10}
-            }
+            },
+            "department_stats": [
+                {
+                    "department_id": 1,
+                    "college": "...",
+                    "class_name": "...",
+                    "total_students": 30,
+                    "process_stats": { ... }   # 结构同上
+                }
+            ]
         },
         "message": "success"
     }
@@ -752,50 +781,12 @@ def get_dashboard_stats():
                 'message': '管理员不存在'
             }), 404
         
-        # 获取有权限访问的学生查询（已根据管理员权限过滤）
-        students_query = get_admin_accessible_query(User, admin_id)
-        
-        # 统计总学生数（基于权限）
-        total_students = students_query.count()
-        
-        # 统计总部门数（根据管理员权限）
-        if admin.role == AdminUser.ROLE_SUPER:
-            # 超级管理员可以看到所有部门
-            total_departments = Department.query.count()
-        else:
-            # 普通管理员只能看到自己管理的部门
-            total_departments = admin.managed_departments.count()
-        
-        # 统计三个阶段的状态分布（基于有权限的学生）
-        # 状态值映射：'pending' -> 0, 'qualified' -> 1, 'unqualified' -> 2
-        process_stats = {}
-        
-        # 三个阶段字段：录取(admission)、体检(medical)、政审(political/vetted)
-        stages = {
-            'admission': User.admission_status,
-            'medical': User.medical_status,
-            'vetted': User.political_status  # 政审字段在数据库中为 political_status
-        }
-        
-        for stage_name, stage_field in stages.items():
-            # 基于有权限的学生查询，统计各状态的人数
-            pending_count = students_query.filter(stage_field == 'pending').count()
-            qualified_count = students_query.filter(stage_field == 'qualified').count()
-            unqualified_count = students_query.filter(stage_field == 'unqualified').count()
-            
-            process_stats[stage_name] = {
-                0: pending_count,      # 待定(0)
-                1: qualified_count,    # 通过(1)
-                2: unqualified_count   # 不通过(2)
-            }
+        # 一条 GROUP BY 查询统计所有阶段状态分布与部门明细（结果按管理员短时缓存）
+        data = get_dashboard_stats_cached(admin)
         
         return jsonify({
             'code': 200,
-            'data': {
-                'total_students': total_students,
-                'total_departments': total_departments,
-                'process_stats': process_stats
-            },
+            'data': data,
             'message': 'success'
         }), 200
     except Exception as e:
@@ -805,6 +796,32 @@ def get_dashboard_stats():
         }), 500
 
 
+@admin_bp.route('/system/cache-stats', methods=['GET'])
+@super_admin_required
+def get_cache_stats():
+    """
+    获取进程内缓存的命中统计（仅限超级管理员，统计只反映处理本次请求的进程）
+    返回: {
+        "code": 200,
+        "data": {
+            "presign_url": { "size": 10, "hits": 100, "misses": 20 },
+            "dashboard_stats": { "size": 2, "hits": 30, "misses": 5 },
+            "admin_scope": { "size": 3, "hits": 200, "misses": 3 }
+        },
+        "message": "success"
+    }
+    """
+    return jsonify({
+        'code': 200,
+        'data': {
+            'presign_url': get_presign_cache_stats(),
+            'dashboard_stats': get_dashboard_cache_stats(),
+            'admin_scope': get_admin_scope_cache_stats()
+        },
+        'message': 'success'
+    }), 200
+
+
 # ==================== 系统初始化 ====================
 
 @admin_bp.route('/system/init-status', methods=['GET'])
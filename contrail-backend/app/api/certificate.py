@@ -1,24 +1,44 @@
 """
 证书相关 API
 提供证书上传、查询、审核等功能
+
+内容去重后同一学生的多条证书可能共享同一原图与衍生图对象，删除证书对象必须通过 remove_certificate_object
+（仍被任何证书引用的对象会被拒绝删除）
 """
+import io
 import json
 import logging
 import mimetypes
 import uuid
 from datetime import datetime
 
-from flask import request, jsonify
+from flask import request, jsonify, current_app
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from app.api import api_bp
 from app.extensions import db
-from app.models import Certificate, User, CertificateType, Department
+from app.models import Certificate, User, CertificateType, Department, BackgroundJob
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.utils.s3_presign import presign_get_object_url
-from app.utils.minio_storage import upload_bytes
+from app.jobs import register_job_handler, enqueue_job
+from app.utils.s3_presign import presign_get_object_url, presign_many
+from app.utils.minio_storage import (
+    HashingStream, PrefixedStream, hash_stream, upload_stream, download_bytes, upload_bytes,
+    presign_post_upload, stat_object, read_object_head, hash_object, copy_object, remove_object
+)
+from app.utils.cert_images import (
+    REVIEW_SUFFIX, THUMBNAIL_SUFFIX, build_image_derivatives, derivative_object_key, is_derivative_supported
+)
 
 logger = logging.getLogger(__name__)
 
 ALLOWED_EXTS = {"jpg", "png", "pdf"}
+# 内容嗅探读取的字节数
+SNIFF_BYTES = 64
+# 浏览器直传的临时对象前缀：上传表单只覆盖该前缀下的 Key，校验通过后复制到正式 Key（可为该前缀配置生命周期规则清理残留）
+DIRECT_UPLOAD_PREFIX = "incoming/"
+# 衍生图任务优先级：单张图片处理很快，排在档案导出等长任务之前，避免审核列表长时间没有缩略图
+DERIVATIVE_JOB_PRIORITY = 10
 CONTENT_TYPES = {
     "jpg": "image/jpeg",
     "png": "image/png",
@@ -49,6 +69,235 @@ def _sniff_file_ext(data: bytes) -> str:
     return ""
 
 
+@register_job_handler(BackgroundJob.TYPE_CERTIFICATE_DERIVATIVES)
+def _run_certificate_derivatives_job(ctx):
+    """
+    后台任务：为图片证书生成审核尺寸图与缩略图，上传到原图同目录并记录到证书上
+
+    证书已删除或原图已变更时直接结束；重复执行会覆盖同名衍生图，结果一致。
+    内容去重后多条证书可能共享同一原图，衍生图写入所有引用该原图的证书
+    """
+    certificate = Certificate.query.get(ctx.payload.get('certificate_id'))
+    object_key = ctx.payload.get('object_key')
+    if not certificate or certificate.image_url != object_key:
+        return {'skipped': True}
+
+    data = download_bytes(object_key)
+    derivatives = build_image_derivatives(
+        data,
+        review_size=current_app.config.get('CERT_REVIEW_IMAGE_SIZE') or 1600,
+        thumbnail_size=current_app.config.get('CERT_THUMBNAIL_SIZE') or 320,
+        quality=current_app.config.get('CERT_DERIVATIVE_QUALITY') or 82,
+    )
+
+    keys = {}
+    for suffix, image_data in derivatives.items():
+        keys[suffix] = derivative_object_key(object_key, suffix)
+        upload_bytes(object_key=keys[suffix], data=image_data, content_type='image/jpeg')
+
+    db.session.query(Certificate).filter(
+        Certificate.user_id == certificate.user_id,
+        Certificate.image_url == object_key
+    ).update({
+        Certificate.review_image_key: keys[REVIEW_SUFFIX],
+        Certificate.thumbnail_key: keys[THUMBNAIL_SUFFIX],
+    }, synchronize_session=False)
+    db.session.commit()
+
+    return {
+        'review_image_key': keys[REVIEW_SUFFIX],
+        'thumbnail_key': keys[THUMBNAIL_SUFFIX],
+        'original_size': len(data),
+        'review_size': len(derivatives[REVIEW_SUFFIX]),
+        'thumbnail_size': len(derivatives[THUMBNAIL_SUFFIX]),
+    }
+
+
+def _enqueue_certificate_derivatives(certificate):
+    """为图片证书提交衍生图生成任务（失败只记录日志，不影响上传结果）"""
+    if not is_derivative_supported(certificate.image_url):
+        return
+    try:
+        enqueue_job(
+            BackgroundJob.TYPE_CERTIFICATE_DERIVATIVES,
+            admin_id=None,
+            payload={'certificate_id': certificate.id, 'object_key': certificate.image_url},
+            priority=DERIVATIVE_JOB_PRIORITY,
+        )
+    except Exception:
+        db.session.rollback()
+        logger.exception("衍生图任务提交失败: certificate_id=%s", certificate.id)
+
+
+def _open_upload_stream(file):
+    """
+    获取上传文件的底层流及其长度
+
+    Returns:
+        (stream, length): 流可 seek 时 length 为文件字节数，否则为 -1（由 upload_stream 分片上传）
+    """
+    stream = file.stream
+    try:
+        if stream.seekable():
+            length = stream.seek(0, io.SEEK_END)
+            stream.seek(0)
+            return stream, length
+    except (AttributeError, OSError):
+        pass
+    return stream, -1
+
+
+def _new_object_key(ext):
+    """生成证书文件的 Object Key：{year}/{month}/{uuid}.{ext}"""
+    now = datetime.utcnow()
+    return f"{now:%Y}/{now:%m}/{uuid.uuid4().hex}.{ext}"
+
+
+def remove_certificate_object(object_key):
+    """
+    删除证书相关对象（原图、衍生图、直传临时对象）；对象仍被证书记录引用时拒绝删除
+
+    Returns:
+        bool: 是否已删除
+    """
+    referenced = db.session.query(Certificate.id).filter(or_(
+        Certificate.image_url == object_key,
+        Certificate.review_image_key == object_key,
+        Certificate.thumbnail_key == object_key,
+    )).first()
+    if referenced is not None:
+        logger.warning("对象仍被证书引用，拒绝删除: key=%s certificate_id=%s", object_key, referenced[0])
+        return False
+    remove_object(object_key)
+    return True
+
+
+def _parse_extra_data(raw):
+    """
+    解析 extraData（表单中为 JSON 字符串，JSON 请求体中也可以直接是对象）
+
+    Returns:
+        tuple: (extra_data, error)
+    """
+    if raw is None or raw == "":
+        return None, None
+    if not isinstance(raw, str):
+        return raw, None
+    try:
+        return json.loads(raw), None
+    except json.JSONDecodeError:
+        return None, "extraData must be valid JSON"
+
+
+def _check_single_upload(user_id, cert_name):
+    """
+    唯一性检查（硬编码逻辑）
+    如果证书类型是"英语四级"、"英语六级"或"雅思IELTS"，检查是否已存在非驳回状态的同名证书
+
+    Returns:
+        str or None: 不允许上传时返回错误信息
+    """
+    single_upload_types = ["英语四级", "英语六级", "雅思IELTS"]
+    if cert_name in single_upload_types:
+        existing_cert = Certificate.query.filter_by(
+            user_id=user_id,
+            name=cert_name
+        ).filter(
+            Certificate.status != Certificate.STATUS_REJECTED
+        ).first()
+
+        if existing_cert:
+            return "该类型证书只允许上传一次，请勿重复提交"
+    return None
+
+
+def _upload_success_response(certificate):
+    return jsonify({
+        "code": 200,
+        "msg": "Upload success",
+        "data": {
+            "fileId": certificate.id,
+            "filePath": certificate.image_url,
+        }
+    }), 200
+
+
+def _find_duplicate_certificate(user_id, content_sha256):
+    """查找该学生内容相同（SHA-256 一致）的最近一条证书"""
+    return Certificate.query.filter_by(
+        user_id=user_id,
+        content_sha256=content_sha256
+    ).order_by(Certificate.id.desc()).first()
+
+
+def _is_retried_upload(duplicate, cert_name, extra_data):
+    """内容、名称与额外数据都相同且仍在待审核：视为同一次上传的重试（幂等返回已有证书）"""
+    return (
+        duplicate is not None
+        and duplicate.status == Certificate.STATUS_PENDING
+        and duplicate.name == cert_name
+        and duplicate.extra_data == extra_data
+    )
+
+
+def _save_certificate(user_id, cert_name, object_key, extra_data, content_sha256=None, duplicate=None,
+                      upload_key=None):
+    """
+    创建证书记录并提交衍生图任务，返回上传接口的响应
+
+    duplicate 为内容相同的已有证书时复用其对象与衍生图，不再生成衍生图；
+    upload_key 为直传临时对象的 Key，并发登记同一次直传时返回先登记的证书并删除本次复制的对象
+    """
+    certificate = Certificate(
+        user_id=user_id,
+        name=cert_name,
+        image_url=object_key,
+        status=Certificate.STATUS_PENDING,
+        extra_data=extra_data,
+        content_sha256=content_sha256,
+        upload_key=upload_key
+    )
+    if duplicate is not None:
+        certificate.review_image_key = duplicate.review_image_key
+        certificate.thumbnail_key = duplicate.thumbnail_key
+
+    try:
+        db.session.add(certificate)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        existing = Certificate.query.filter_by(user_id=user_id, upload_key=upload_key).first() if upload_key else None
+        if existing is None:
+            logger.exception("证书记录保存失败: user_id=%s key=%s", user_id, object_key)
+            return jsonify({"code": 500, "msg": "Upload failed"}), 500
+        if duplicate is None:
+            _discard_direct_upload_objects(user_id, object_key)
+        return _upload_success_response(existing)
+    except Exception:
+        db.session.rollback()
+        logger.exception("证书记录保存失败: user_id=%s key=%s", user_id, object_key)
+        return jsonify({"code": 500, "msg": "Upload failed"}), 500
+
+    # 后台生成缩略图与审核尺寸图（复用已有对象时由原图的任务统一写入）
+    if duplicate is None:
+        _enqueue_certificate_derivatives(certificate)
+
+    return _upload_success_response(certificate)
+
+
+def _get_direct_upload_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='certificate-direct-upload')
+
+
+def _discard_direct_upload_objects(user_id, *object_keys):
+    """删除直传产生的临时对象或未被登记的副本（失败只记录日志）"""
+    for object_key in object_keys:
+        try:
+            remove_certificate_object(object_key)
+        except Exception:
+            logger.exception("删除直传对象失败: user_id=%s key=%s", user_id, object_key)
+
+
 @api_bp.route('/certificate/upload', methods=['POST'])
 @jwt_required()
 def upload_certificate():
@@ -63,6 +312,9 @@ def upload_certificate():
     - 绝不使用用户原始文件名作为存储名
     - 生成 object key：{year}/{month}/{uuid}.{ext}
     - 数据库仅保存 object key（落在 Certificate.image_url 字段中）
+
+    文件较大时建议使用直传模式（/certificate/upload/presign + /certificate/upload/complete），
+    文件内容不经过应用服务器。
     """
     user_id = get_jwt_identity()
 
@@ -81,19 +333,21 @@ def upload_certificate():
     if ext not in ALLOWED_EXTS:
         return jsonify({"code": 400, "msg": f"invalid file type, only {sorted(ALLOWED_EXTS)} allowed"}), 400
 
-    data = file.read()
-    if not data:
+    # 只读取前 64 字节用于类型嗅探，文件内容随后从流中分片上传，不整体读入内存
+    # （Werkzeug 解析 multipart 时超过 500KB 的文件已落盘到临时文件）
+    stream, length = _open_upload_stream(file)
+    head = stream.read(SNIFF_BYTES)
+    if not head:
         return jsonify({"code": 400, "msg": "empty file"}), 400
 
     # 二次校验：基于内容识别真实类型，防止伪造后缀（比如 .jpg 实际是可执行/脚本/其他）
-    sniffed_ext = _sniff_file_ext(data[:64])
+    sniffed_ext = _sniff_file_ext(head)
     if sniffed_ext not in ALLOWED_EXTS:
         return jsonify({"code": 400, "msg": "invalid file content"}), 400
     if sniffed_ext != ext:
         return jsonify({"code": 400, "msg": "file extension does not match file content"}), 400
 
-    now = datetime.utcnow()
-    object_key = f"{now:%Y}/{now:%m}/{uuid.uuid4().hex}.{ext}"
+    object_key = _new_object_key(ext)
     # Content-Type 以嗅探结果为准（不信任前端提供的 mimetype/文件名）
     content_type = CONTENT_TYPES.get(sniffed_ext) or mimetypes.guess_type(filename)[0] or "application/octet-stream"
     
@@ -102,62 +356,234 @@ def upload_certificate():
         return jsonify({"code": 404, "msg": "user not found"}), 404
 
     # 解析 extraData（如果提供）
-    extra_data = None
-    if extra_data_str:
+    extra_data, error = _parse_extra_data(extra_data_str)
+    if error:
+        return jsonify({"code": 400, "msg": error}), 400
+
+    # 内容去重：流可 seek 时先分块计算 SHA-256，同一学生已有相同文件则不再上传
+    content_sha256 = None
+    duplicate = None
+    if length >= 0:
+        stream.seek(0)
+        content_sha256 = hash_stream(stream)
+        duplicate = _find_duplicate_certificate(user_id, content_sha256)
+        # 网络重试导致的重复提交：直接返回已创建的证书
+        if _is_retried_upload(duplicate, cert_name, extra_data):
+            return _upload_success_response(duplicate)
+
+    error = _check_single_upload(user_id, cert_name)
+    if error:
+        return jsonify({"code": 400, "msg": error}), 400
+
+    if duplicate is not None:
+        # 复用已有对象（如驳回后重新提交同一张图片）
+        object_key = duplicate.image_url
+    else:
+        # 上传到 MinIO（流不可 seek 时在上传过程中计算 SHA-256）
         try:
-            extra_data = json.loads(extra_data_str)
-        except json.JSONDecodeError:
-            return jsonify({"code": 400, "msg": "extraData must be valid JSON"}), 400
+            if length >= 0:
+                stream.seek(0)
+                upload_stream(object_key=object_key, stream=stream, length=length, content_type=content_type)
+            else:
+                hashing_stream = HashingStream(PrefixedStream(head, stream))
+                upload_stream(object_key=object_key, stream=hashing_stream, length=length, content_type=content_type)
+                content_sha256 = hashing_stream.hexdigest()
+        except Exception:
+            logger.exception("MinIO 上传失败: user_id=%s key=%s", user_id, object_key)
+            return jsonify({"code": 500, "msg": "Upload failed"}), 500
 
-    # 唯一性检查（硬编码逻辑）
-    # 如果证书类型是"英语四级"、"英语六级"或"雅思IELTS"，检查是否已存在非驳回状态的同名证书
-    single_upload_types = ["英语四级", "英语六级", "雅思IELTS"]
-    if cert_name in single_upload_types:
-        existing_cert = Certificate.query.filter_by(
-            user_id=user_id,
-            name=cert_name
-        ).filter(
-            Certificate.status != Certificate.STATUS_REJECTED
-        ).first()
-        
-        if existing_cert:
-            return jsonify({
-                "code": 400,
-                "msg": "该类型证书只允许上传一次，请勿重复提交"
-            }), 400
+        if length < 0:
+            duplicate = _find_duplicate_certificate(user_id, content_sha256)
+            if duplicate is not None:
+                # 上传后才发现重复：删除刚写入的副本，改为引用已有对象
+                try:
+                    remove_certificate_object(object_key)
+                except Exception:
+                    logger.exception("删除重复对象失败: user_id=%s key=%s", user_id, object_key)
+                    duplicate = None
+                else:
+                    if _is_retried_upload(duplicate, cert_name, extra_data):
+                        return _upload_success_response(duplicate)
+                    object_key = duplicate.image_url
+    
+    # 创建证书记录
+    return _save_certificate(user_id, cert_name, object_key, extra_data, content_sha256, duplicate)
+
+
+@api_bp.route('/certificate/upload/presign', methods=['POST'])
+@jwt_required()
+def presign_certificate_upload():
+    """
+    直传模式第一步：申请浏览器直传 MinIO 的上传表单
+    请求体: { "certName": "英语四级", "fileExt": "jpg", "extraData": {...} (可选) }
+
+    返回: {
+        "code": 200,
+        "data": {
+            "uploadUrl": "http://minio:9000/bucket",   # 以 multipart/form-data POST 到该地址
+            "formData": {...},                           # 需原样提交的表单字段，文件字段 file 放在最后
+            "objectKey": "incoming/2024/01/uuid.jpg",  # 临时 Key，登记后证书使用复制出的正式 Key
+            "uploadToken": "...",                        # 上传成功后提交给 /certificate/upload/complete
+            "expiresIn": 600,
+            "maxSize": 16777216
+        }
+    }
+
+    表单策略限定了 Object Key、Content-Type（由 fileExt 决定）与文件大小（不超过 MAX_CONTENT_LENGTH），
+    文件内容在完成接口中再按头部字节校验。
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+
+    cert_name = data.get("certName") or data.get("name")
+    ext = str(data.get("fileExt") or "").lower().lstrip(".")
+
+    if not cert_name:
+        return jsonify({"code": 400, "msg": "certName is required"}), 400
+    if ext not in ALLOWED_EXTS:
+        return jsonify({"code": 400, "msg": f"invalid file type, only {sorted(ALLOWED_EXTS)} allowed"}), 400
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"code": 404, "msg": "user not found"}), 404
+
+    extra_data, error = _parse_extra_data(data.get("extraData"))
+    if error:
+        return jsonify({"code": 400, "msg": error}), 400
+
+    error = _check_single_upload(user_id, cert_name)
+    if error:
+        return jsonify({"code": 400, "msg": error}), 400
+
+    # 表单只允许写入临时 Key；证书引用的正式 Key 由完成接口复制生成，不受表单覆盖
+    object_key = DIRECT_UPLOAD_PREFIX + _new_object_key(ext)
+    expires_in = int(current_app.config.get("CERT_DIRECT_UPLOAD_EXPIRES") or 600)
+    max_size = int(current_app.config.get("MAX_CONTENT_LENGTH") or 16 * 1024 * 1024)
 
-    # 上传到 MinIO
     try:
-        upload_bytes(object_key=object_key, data=data, content_type=content_type)
+        upload_url, form_data = presign_post_upload(
+            object_key, content_type=CONTENT_TYPES[ext], max_size=max_size, expires_in=expires_in
+        )
     except Exception:
-        logger.exception("MinIO 上传失败: user_id=%s key=%s", user_id, object_key)
-        return jsonify({"code": 500, "msg": "Upload failed"}), 500
-    
-    # 创建证书记录
-    certificate = Certificate(
-        user_id=user_id,
-        name=cert_name,
-        image_url=object_key,
-        status=Certificate.STATUS_PENDING,
-        extra_data=extra_data
-    )
-    
+        logger.exception("生成直传表单失败: user_id=%s key=%s", user_id, object_key)
+        return jsonify({"code": 500, "msg": "Presign failed"}), 500
+
+    # 上传凭证：签名保存证书信息，完成接口据此创建记录，防止登记他人或任意的 Object Key
+    upload_token = _get_direct_upload_serializer().dumps({
+        "user_id": user_id,
+        "object_key": object_key,
+        "ext": ext,
+        "cert_name": cert_name,
+        "extra_data": extra_data,
+    })
+
+    return jsonify({
+        "code": 200,
+        "msg": "success",
+        "data": {
+            "uploadUrl": upload_url,
+            "formData": form_data,
+            "objectKey": object_key,
+            "uploadToken": upload_token,
+            "expiresIn": expires_in,
+            "maxSize": max_size,
+        }
+    }), 200
+
+
+@api_bp.route('/certificate/upload/complete', methods=['POST'])
+@jwt_required()
+def complete_certificate_upload():
+    """
+    直传模式第二步：文件已上传到 MinIO 后登记证书
+    请求体: { "uploadToken": "..." }
+    返回与 /certificate/upload 相同
+
+    校验临时对象存在且大小合法后复制到正式 Object Key，再对副本嗅探真实类型（上传表单在有效期内仍可覆盖临时对象，
+    只有副本的内容与校验结果一致），不合法时删除临时对象与副本。
+    同一凭证重复或并发提交时返回已创建的证书（upload_key 唯一）。
+    与中转上传相同按内容 SHA-256 去重：已有相同文件时复用其对象与衍生图；内容、名称与额外数据都相同且仍在待审核时
+    直接返回已有证书（保留临时对象，同一凭证再次提交得到相同结果，残留的临时对象由 incoming/ 的生命周期规则清理）。
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    token = data.get("uploadToken")
+    if not token:
+        return jsonify({"code": 400, "msg": "uploadToken is required"}), 400
+
+    # 凭证有效期比上传表单多留 1 小时，允许表单到期前开始的上传完成后再登记
+    expires_in = int(current_app.config.get("CERT_DIRECT_UPLOAD_EXPIRES") or 600)
     try:
-        db.session.add(certificate)
-        db.session.commit()
-        return jsonify({
-            "code": 200,
-            "msg": "Upload success",
-            "data": {
-                "fileId": certificate.id,
-                "filePath": object_key,
-            }
-        }), 200
-    except Exception as e:
-        db.session.rollback()
-        logger.exception("证书记录保存失败: user_id=%s key=%s", user_id, object_key)
+        payload = _get_direct_upload_serializer().loads(token, max_age=expires_in + 3600)
+    except SignatureExpired:
+        return jsonify({"code": 400, "msg": "uploadToken expired"}), 400
+    except BadSignature:
+        return jsonify({"code": 400, "msg": "invalid uploadToken"}), 400
+
+    if payload.get("user_id") != user_id:
+        return jsonify({"code": 403, "msg": "uploadToken does not belong to current user"}), 403
+
+    upload_key = payload["object_key"]
+    existing = Certificate.query.filter_by(user_id=user_id, upload_key=upload_key).first()
+    if existing:
+        return _upload_success_response(existing)
+
+    object_key = _new_object_key(payload["ext"])
+    try:
+        obj = stat_object(upload_key)
+        if obj is None:
+            return jsonify({"code": 400, "msg": "file not uploaded"}), 400
+
+        max_size = int(current_app.config.get("MAX_CONTENT_LENGTH") or 16 * 1024 * 1024)
+        if not obj.size or obj.size > max_size:
+            remove_certificate_object(upload_key)
+            return jsonify({"code": 400, "msg": "invalid file size"}), 400
+
+        # 复制到表单无法写入的正式 Key，之后的校验、哈希与证书记录都只针对副本
+        copy_object(upload_key, object_key)
+        copied = stat_object(object_key)
+        if copied is None or not copied.size or copied.size > max_size:
+            remove_certificate_object(object_key)
+            remove_certificate_object(upload_key)
+            return jsonify({"code": 400, "msg": "invalid file size"}), 400
+
+        # 二次校验：基于内容识别真实类型（只读取头部字节）
+        if _sniff_file_ext(read_object_head(object_key, SNIFF_BYTES)) != payload["ext"]:
+            remove_certificate_object(object_key)
+            remove_certificate_object(upload_key)
+            return jsonify({"code": 400, "msg": "file extension does not match file content"}), 400
+        # 分块流式计算副本的 SHA-256 用于去重（不把整个文件读入内存）
+        content_sha256 = hash_object(object_key)
+    except Exception:
+        logger.exception("直传文件校验失败: user_id=%s key=%s", user_id, upload_key)
         return jsonify({"code": 500, "msg": "Upload failed"}), 500
 
+    cert_name = payload["cert_name"]
+    extra_data = payload.get("extra_data")
+    duplicate = _find_duplicate_certificate(user_id, content_sha256)
+    if _is_retried_upload(duplicate, cert_name, extra_data):
+        _discard_direct_upload_objects(user_id, object_key)
+        return _upload_success_response(duplicate)
+
+    # 申请表单后可能已通过其他途径上传了同类证书
+    error = _check_single_upload(user_id, cert_name)
+    if error:
+        _discard_direct_upload_objects(user_id, object_key, upload_key)
+        return jsonify({"code": 400, "msg": error}), 400
+
+    if duplicate is not None:
+        # 复用已有对象，删除本次复制的副本
+        _discard_direct_upload_objects(user_id, object_key)
+        object_key = duplicate.image_url
+
+    response, code = _save_certificate(
+        user_id, cert_name, object_key, extra_data, content_sha256, duplicate, upload_key=upload_key
+    )
+    if code == 200:
+        # 证书已引用正式 Key，临时对象不再需要
+        _discard_direct_upload_objects(user_id, upload_key)
+    return response, code
+
 
 @api_bp.route('/certificate/list', methods=['GET'])
 @jwt_required()
@@ -178,11 +604,14 @@ def get_certificates():
 
     cert_dicts = []
     any_presign_failed = False
+    urls = presign_many(key for cert in certificates for key in (cert.image_url, cert.thumbnail_key))
     for cert in certificates:
         d = cert.to_dict()
         # 兼容前端字段命名：imgUrl 为临时授权访问链接；image_url 仍保留为 Object Key
         d["certName"] = cert.name
-        d["imgUrl"] = presign_get_object_url(cert.image_url)
+        d["imgUrl"] = urls.get(cert.image_url)
+        # 缩略图未生成（PDF、任务未完成）时回退为原图
+        d["thumbUrl"] = urls.get(cert.thumbnail_key) or d["imgUrl"]
         if d["imgUrl"] is None and cert.image_url:
             any_presign_failed = True
         cert_dicts.append(d)
@@ -208,6 +637,8 @@ def get_certificate_detail(cert_id):
     d = certificate.to_dict()
     d["certName"] = certificate.name
     d["imgUrl"] = presign_get_object_url(certificate.image_url)
+    # 审核尺寸图未生成时回退为原图
+    d["reviewUrl"] = presign_get_object_url(certificate.review_image_key) or d["imgUrl"]
     payload = {'certificate': d}
     if d["imgUrl"] is None and certificate.image_url:
         payload["warning"] = "图片链接生成失败，请稍后重试"
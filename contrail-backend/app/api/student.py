@@ -5,7 +5,8 @@
 from flask import request, jsonify
 from app.api import api_bp
 from app.extensions import db
-from app.models import User, ScoreLog, Comment, Certificate
+from app.models import User, ScoreLog, Comment
+from app.utils.student_records import load_student_records
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 
@@ -173,8 +174,7 @@ def get_student_profile():
     }
 
     # 获取该学生的所有证书（仅通过审核的，按上传时间倒序）
-    certificates = user.certificates.filter_by(status=Certificate.STATUS_APPROVED)\
-        .order_by(Certificate.upload_time.desc()).all()
+    certificates = load_student_records([user.id], include_score_logs=False)[user.id]['certificates']
 
     # 根据证书名称和类型分类处理
     cet4_cert = None
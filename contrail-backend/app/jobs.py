@@ -0,0 +1,393 @@
+"""
+后台任务队列模块
+基于数据库 background_jobs 表的持久化任务队列（替代进程内字典 + 每个请求启动一个线程的方案）：
+- 任务状态、进度、结果存储在数据库中，所有 worker 进程都能查询，进程重启后不丢失
+- 每个进程维护有界的工作线程池（JOB_WORKER_THREADS），按优先级、创建时间领取任务
+- 限制单个管理员同时执行（JOB_MAX_RUNNING_PER_ADMIN）与排队（JOB_MAX_PENDING_PER_ADMIN）的任务数
+- 执行中的任务持续写入心跳；心跳超时（JOB_STALE_SECONDS）视为执行进程崩溃，
+  任务重新入队，由处理函数根据断点（checkpoint）续跑
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, or_, select, update
+
+from app.extensions import db
+from app.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# 任务类型 -> 处理函数
+JOB_HANDLERS = {}
+
+# 工作线程池（每个进程一份；fork 出的子进程需要重新启动）
+_workers_lock = threading.Lock()
+_workers_pid = None
+_workers = []
+
+# 崩溃任务检查的节流时间戳
+_last_stale_check = 0.0
+
+# 未结束（占用排队/执行名额）的任务状态
+ACTIVE_STATUSES = (BackgroundJob.STATUS_QUEUED, BackgroundJob.STATUS_PROCESSING)
+
+
+class JobLostError(Exception):
+    """任务已不再属于当前工作线程（心跳超时后被重新入队/接管），当前线程应停止执行"""
+
+
+def register_job_handler(job_type):
+    """
+    装饰器：注册任务处理函数
+    处理函数签名为 handler(ctx: JobContext)：
+    - 正常返回视为成功，返回值（可 JSON 序列化）保存为任务结果
+    - 抛出 ValueError 视为业务失败，异常信息直接作为任务错误信息
+    - 抛出其他异常视为执行异常
+    """
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+class JobContext:
+    """
+    任务执行上下文，供处理函数汇报进度、保存断点
+    所有写操作都以 worker_id 为条件，任务被其他线程接管后抛出 JobLostError
+    """
+
+    def __init__(self, job, worker_id):
+        self.job_id = job.id
+        self.admin_id = job.admin_id
+        self.payload = job.payload or {}
+        self.checkpoint = job.checkpoint or {}
+        self.attempts = job.attempts
+        self.worker_id = worker_id
+
+    def _update(self, **values):
+        values['heartbeat_time'] = datetime.utcnow()
+        result = db.session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == self.job_id,
+                BackgroundJob.worker_id == self.worker_id,
+                BackgroundJob.status == BackgroundJob.STATUS_PROCESSING
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount != 1:
+            raise JobLostError(self.job_id)
+
+    def heartbeat(self):
+        """仅刷新心跳"""
+        self._update()
+
+    def set_progress(self, progress, total=None):
+        """更新进度（同时刷新心跳）"""
+        values = {'progress': progress}
+        if total is not None:
+            values['total'] = total
+        self._update(**values)
+
+    def save_checkpoint(self, checkpoint, progress=None):
+        """保存断点（同时刷新心跳），任务重新入队后处理函数可从 ctx.checkpoint 续跑"""
+        self.checkpoint = checkpoint
+        values = {'checkpoint': checkpoint}
+        if progress is not None:
+            values['progress'] = progress
+        self._update(**values)
+
+
+def enqueue_job(job_type, admin_id, payload=None, priority=0):
+    """
+    创建任务并加入队列
+
+    Args:
+        job_type: 任务类型（需已通过 register_job_handler 注册）
+        admin_id: 发起任务的管理员ID
+        payload: 任务参数（可 JSON 序列化）
+        priority: 优先级，数值越大越先执行
+
+    Returns:
+        tuple: (job: BackgroundJob or None, error: str or None)
+               管理员未结束的任务数达到上限时返回 (None, 错误信息)
+    """
+    max_pending = current_app.config.get('JOB_MAX_PENDING_PER_ADMIN') or 0
+    if admin_id is not None and max_pending:
+        active_count = BackgroundJob.query.filter(
+            BackgroundJob.admin_id == admin_id,
+            BackgroundJob.status.in_(ACTIVE_STATUSES)
+        ).count()
+        if active_count >= max_pending:
+            return None, f'您已有 {active_count} 个任务正在排队或执行，请等待完成后再试'
+
+    job = BackgroundJob(
+        id=uuid.uuid4().hex,
+        job_type=job_type,
+        admin_id=admin_id,
+        priority=priority,
+        status=BackgroundJob.STATUS_QUEUED,
+        payload=payload,
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    ensure_job_workers(current_app._get_current_object())
+    return job, None
+
+
+def get_queue_position(job):
+    """
+    获取排队中的任务前面还有多少个任务（按优先级、创建时间排序）
+
+    Returns:
+        int: 前面的任务数；任务不在排队状态时返回 0
+    """
+    if job.status != BackgroundJob.STATUS_QUEUED:
+        return 0
+    return BackgroundJob.query.filter(
+        BackgroundJob.status == BackgroundJob.STATUS_QUEUED,
+        or_(
+            BackgroundJob.priority > job.priority,
+            (BackgroundJob.priority == job.priority) & (BackgroundJob.create_time < job.create_time)
+        )
+    ).count()
+
+
+def init_job_queue(app):
+    """
+    在应用中启用任务队列：进程处理第一个请求时启动工作线程池
+    （命令行脚本创建的应用实例不会处理请求，因此不会启动工作线程）
+    """
+    @app.before_request
+    def _ensure_job_workers():
+        ensure_job_workers(app)
+
+
+def ensure_job_workers(app):
+    """
+    确保当前进程的工作线程池已启动（幂等，按进程ID区分 fork 出的子进程）
+    """
+    global _workers_pid
+    pid = os.getpid()
+    if _workers_pid == pid:
+        return
+
+    with _workers_lock:
+        if _workers_pid == pid:
+            return
+
+        _workers.clear()
+        thread_count = max(1, int(app.config.get('JOB_WORKER_THREADS') or 1))
+        instance_tag = uuid.uuid4().hex[:8]
+        for i in range(thread_count):
+            worker_id = f'{socket.gethostname()}:{pid}:{instance_tag}:{i}'
+            thread = threading.Thread(
+                target=_worker_loop,
+                args=(app, worker_id),
+                name=f'job-worker-{i}',
+                daemon=True
+            )
+            thread.start()
+            _workers.append(thread)
+        _workers_pid = pid
+        logger.info(f"[任务队列] 已启动 {thread_count} 个工作线程 (pid={pid})")
+
+
+def requeue_stale_jobs():
+    """
+    处理心跳超时的执行中任务（执行进程崩溃或被重启）：
+    - 执行次数未达上限：重新入队，等待从断点续跑
+    - 执行次数已达上限：标记为失败
+
+    Returns:
+        int: 重新入队的任务数
+    """
+    stale_seconds = int(current_app.config.get('JOB_STALE_SECONDS') or 300)
+    max_attempts = int(current_app.config.get('JOB_MAX_ATTEMPTS') or 3)
+    now = datetime.utcnow()
+    deadline = now - timedelta(seconds=stale_seconds)
+
+    stale_filter = (
+        BackgroundJob.status == BackgroundJob.STATUS_PROCESSING,
+        BackgroundJob.heartbeat_time < deadline,
+    )
+    db.session.execute(
+        update(BackgroundJob)
+        .where(*stale_filter, BackgroundJob.attempts >= max_attempts)
+        .values(
+            status=BackgroundJob.STATUS_FAILED,
+            error='任务多次执行中断，已停止重试',
+            finish_time=now,
+            worker_id=None
+        )
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.session.execute(
+        update(BackgroundJob)
+        .where(*stale_filter)
+        .values(status=BackgroundJob.STATUS_QUEUED, worker_id=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if requeued:
+        logger.warning(f"[任务队列] {requeued} 个任务心跳超时，已重新入队")
+    return requeued
+
+
+def _claim_next_job(worker_id):
+    """
+    领取下一个可执行的任务（跳过已达到并发上限的管理员的任务）
+    通过带状态条件的 UPDATE 实现原子领取，多进程/多线程并发领取时只有一个会成功
+
+    Returns:
+        BackgroundJob or None
+    """
+    max_running = int(current_app.config.get('JOB_MAX_RUNNING_PER_ADMIN') or 0)
+
+    query = select(BackgroundJob.id, BackgroundJob.admin_id).where(
+        BackgroundJob.status == BackgroundJob.STATUS_QUEUED
+    )
+    if max_running:
+        saturated_admins = (
+            select(BackgroundJob.admin_id)
+            .where(
+                BackgroundJob.status == BackgroundJob.STATUS_PROCESSING,
+                BackgroundJob.admin_id.isnot(None)
+            )
+            .group_by(BackgroundJob.admin_id)
+            .having(func.count(BackgroundJob.id) >= max_running)
+        )
+        query = query.where(or_(
+            BackgroundJob.admin_id.is_(None),
+            BackgroundJob.admin_id.not_in(saturated_admins)
+        ))
+
+    candidates = db.session.execute(
+        query.order_by(BackgroundJob.priority.desc(), BackgroundJob.create_time.asc()).limit(5)
+    ).all()
+
+    for job_id, admin_id in candidates:
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == BackgroundJob.STATUS_QUEUED)
+            .values(
+                status=BackgroundJob.STATUS_PROCESSING,
+                worker_id=worker_id,
+                heartbeat_time=now,
+                start_time=func.coalesce(BackgroundJob.start_time, now),
+                attempts=BackgroundJob.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed != 1:
+            continue
+
+        # 并发领取可能让同一管理员短暂超出并发上限：复核，超出则退回队列
+        if max_running and admin_id is not None:
+            running = BackgroundJob.query.filter(
+                BackgroundJob.admin_id == admin_id,
+                BackgroundJob.status == BackgroundJob.STATUS_PROCESSING
+            ).count()
+            if running > max_running:
+                db.session.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id, BackgroundJob.worker_id == worker_id)
+                    .values(
+                        status=BackgroundJob.STATUS_QUEUED,
+                        worker_id=None,
+                        attempts=BackgroundJob.attempts - 1
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                continue
+
+        return db.session.get(BackgroundJob, job_id)
+
+    return None
+
+
+def _finish_job(ctx, status, result=None, error=None):
+    """记录任务最终状态（仅当任务仍属于当前工作线程时生效）"""
+    db.session.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == ctx.job_id, BackgroundJob.worker_id == ctx.worker_id)
+        .values(
+            status=status,
+            result=result,
+            error=error[:500] if error else None,
+            finish_time=datetime.utcnow(),
+            heartbeat_time=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _execute_job(job, worker_id):
+    """执行已领取的任务，并根据处理结果更新任务状态"""
+    ctx = JobContext(job, worker_id)
+    handler = JOB_HANDLERS.get(job.job_type)
+    if handler is None:
+        _finish_job(ctx, BackgroundJob.STATUS_FAILED, error=f'未知的任务类型: {job.job_type}')
+        return
+
+    logger.info(f"[任务队列] {worker_id} 开始执行任务 {job.id} ({job.job_type}，第 {job.attempts} 次)")
+    try:
+        result = handler(ctx)
+    except JobLostError:
+        db.session.rollback()
+        logger.warning(f"[任务队列] 任务 {job.id} 已被重新分配，{worker_id} 停止执行")
+        return
+    except ValueError as e:
+        db.session.rollback()
+        _finish_job(ctx, BackgroundJob.STATUS_FAILED, error=str(e))
+        return
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"[任务队列] 任务 {job.id} 执行异常")
+        _finish_job(ctx, BackgroundJob.STATUS_FAILED, error=f'任务执行异常: {str(e)}')
+        return
+
+    _finish_job(ctx, BackgroundJob.STATUS_COMPLETED, result=result)
+    logger.info(f"[任务队列] 任务 {job.id} 执行完成")
+
+
+def _worker_loop(app, worker_id):
+    """工作线程主循环：检查崩溃任务 → 领取任务 → 执行；无任务时按 JOB_POLL_INTERVAL 轮询"""
+    global _last_stale_check
+    poll_interval = float(app.config.get('JOB_POLL_INTERVAL') or 2)
+    stale_check_interval = max(poll_interval, int(app.config.get('JOB_STALE_SECONDS') or 300) / 4)
+
+    while True:
+        claimed = False
+        try:
+            with app.app_context():
+                try:
+                    if time.monotonic() - _last_stale_check >= stale_check_interval:
+                        _last_stale_check = time.monotonic()
+                        requeue_stale_jobs()
+
+                    job = _claim_next_job(worker_id)
+                    if job is not None:
+                        claimed = True
+                        _execute_job(job, worker_id)
+                finally:
+                    db.session.remove()
+        except Exception:
+            logger.exception(f"[任务队列] 工作线程 {worker_id} 发生异常")
+
+        if not claimed:
+            time.sleep(poll_interval)
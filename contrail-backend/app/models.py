@@ -1,8 +1,11 @@
 """
 数据库模型定义
-包含 User, ScoreLog, Certificate, Comment, CertificateType, AdminUser 等核心模型
+包含 User, ScoreLog, Certificate, Comment, CertificateType, AdminUser, BackgroundJob 等核心模型
 """
 from datetime import datetime, date
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
 from app.extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -68,6 +71,8 @@ class User(db.Model):
     name = db.Column(db.String(50), nullable=False, comment='姓名')
     password_hash = db.Column(db.String(255), nullable=False, comment='密码哈希值')
     base_score = db.Column(db.Integer, default=80, nullable=False, comment='基础分，默认80分')
+    # 积分流水累计值（物化余额）：由 ScoreLog 写入/删除时在同一事务内同步维护，避免每次读取总分都执行 SUM 聚合
+    total_delta = db.Column(db.Integer, default=0, server_default='0', nullable=False, comment='积分流水变动累计值（物化余额）')
 
     # 用户绑定部门（可为空，兼容未完善信息的用户）
     department_id = db.Column(
@@ -114,11 +119,10 @@ class User(db.Model):
     @property
     def total_score(self):
         """
-        计算用户动态总分
-        总分 = 基础分 + 所有积分变动的总和
+        用户总分
+        总分 = 基础分 + 所有积分变动的总和（total_delta 为物化余额，无需再查询积分流水）
         """
-        total_delta = db.session.query(db.func.sum(ScoreLog.delta)).filter_by(user_id=self.id).scalar() or 0
-        return self.base_score + total_delta
+        return self.base_score + (self.total_delta or 0)
     
     def to_dict(self, include_score=True):
         """转换为字典（用于 JSON 序列化）"""
@@ -174,6 +178,14 @@ class ScoreLog(db.Model):
     reason = db.Column(db.String(200), nullable=True, comment='变动原因说明')
     type = db.Column(db.String(20), default=TYPE_MANUAL, nullable=False, comment='变动类型：system(系统) 或 manual(人工)')
     create_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True, comment='创建时间')
+    # 人工调整的操作管理员（系统奖励与历史数据为空）
+    admin_id = db.Column(db.Integer, nullable=True, comment='操作管理员ID（人工调整时记录）')
+    # 批量调整的幂等键（客户端提供，按操作管理员区分）：同一批次对同一学生只记录一次，重试时不会重复加减分
+    batch_key = db.Column(db.String(64), nullable=True, comment='批量调整批次键（幂等键）')
+    
+    __table_args__ = (
+        db.Index('ix_score_logs_admin_id_batch_key_user_id', 'admin_id', 'batch_key', 'user_id', unique=True),
+    )
     
     def to_dict(self):
         """转换为字典（用于 JSON 序列化）"""
@@ -190,6 +202,42 @@ class ScoreLog(db.Model):
         return f'<ScoreLog user_id={self.user_id} delta={self.delta}>'
 
 
+def _bump_user_total_delta(connection, user_id, delta, session=None):
+    """
+    在当前事务连接上累加用户的物化余额（total_delta）
+    同时同步 Session 中已加载的 User 实例，避免同一事务内读到旧的总分
+    """
+    if not user_id or not delta:
+        return
+
+    users_table = User.__table__
+    connection.execute(
+        users_table.update()
+        .where(users_table.c.id == user_id)
+        .values(total_delta=users_table.c.total_delta + delta)
+    )
+
+    if session is None:
+        return
+    user = session.identity_map.get(sa_inspect(User).identity_key_from_primary_key((user_id,)))
+    if user is not None:
+        state = sa_inspect(user)
+        if 'total_delta' in state.dict:
+            set_committed_value(user, 'total_delta', (state.dict['total_delta'] or 0) + delta)
+
+
+@event.listens_for(ScoreLog, 'after_insert')
+def _score_log_after_insert(mapper, connection, target):
+    """积分流水写入后，同步累加用户物化余额（与流水在同一事务内）"""
+    _bump_user_total_delta(connection, target.user_id, target.delta, object_session(target))
+
+
+@event.listens_for(ScoreLog, 'after_delete')
+def _score_log_after_delete(mapper, connection, target):
+    """积分流水删除后，同步扣回用户物化余额（与流水在同一事务内）"""
+    _bump_user_total_delta(connection, target.user_id, -(target.delta or 0), object_session(target))
+
+
 class Certificate(db.Model):
     """
     证书模型
@@ -212,6 +260,19 @@ class Certificate(db.Model):
     upload_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, comment='上传时间')
     review_time = db.Column(db.DateTime, nullable=True, comment='审核时间')
     extra_data = db.Column(db.JSON, nullable=True, comment='额外数据（JSON格式），用于存储分数、任职情况、获奖情况等详细信息')
+    # 图片证书的衍生图（后台任务生成，与原图同目录），未生成时为空
+    review_image_key = db.Column(db.String(500), nullable=True, comment='审核尺寸图片的 Object Key')
+    thumbnail_key = db.Column(db.String(500), nullable=True, comment='缩略图的 Object Key')
+    # 文件内容 SHA-256：同一学生重复上传相同文件时复用已有对象（多条证书可共享同一 Object Key 与衍生图，
+    # 删除对象须通过 app.api.certificate.remove_certificate_object，仍被引用的对象不会被删除）
+    content_sha256 = db.Column(db.String(64), nullable=True, comment='文件内容 SHA-256（十六进制）')
+    # 直传模式的临时上传 Object Key（上传凭证中的 Key，唯一）：同一次直传重复或并发登记时只创建一条证书
+    upload_key = db.Column(db.String(500), nullable=True, comment='直传临时对象的 Object Key')
+
+    __table_args__ = (
+        db.Index('ix_certificates_user_id_content_sha256', 'user_id', 'content_sha256'),
+        db.Index('ix_certificates_upload_key', 'upload_key', unique=True),
+    )
     
     def to_dict(self):
         """转换为字典（用于 JSON 序列化）"""
@@ -335,6 +396,7 @@ class AdminUser(db.Model):
     password_hash = db.Column(db.String(255), nullable=False, comment='密码哈希值')
     name = db.Column(db.String(50), nullable=False, comment='真实姓名')
     role = db.Column(db.String(20), default=ROLE_NORMAL, nullable=False, index=True, comment='角色：super(超级管理员) 或 normal(普通管理员)')
+    scope_version = db.Column(db.Integer, default=0, nullable=False, server_default='0', comment='权限版本号（角色或管理部门变更时递增，使令牌中的权限声明失效）')
     create_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, comment='创建时间')
     
     # 关系：一个管理员可以管理多个部门（多对多）
@@ -437,3 +499,61 @@ class SystemConfig(db.Model):
     def __repr__(self):
         return f'<SystemConfig {self.key}={self.value}>'
 
+
+
+class BackgroundJob(db.Model):
+    """
+    后台任务模型
+    持久化存储异步任务（如部门学生档案导出）的状态、进度与断点
+    任务状态保存在数据库中，多个 worker 进程共享，进程重启后可从断点继续执行
+    """
+    __tablename__ = 'background_jobs'
+
+    # 任务状态枚举
+    STATUS_QUEUED = 'queued'  # 排队中
+    STATUS_PROCESSING = 'processing'  # 执行中
+    STATUS_COMPLETED = 'completed'  # 已完成
+    STATUS_FAILED = 'failed'  # 失败
+
+    # 任务类型枚举
+    TYPE_DEPARTMENT_EXPORT = 'department_export'  # 部门学生档案导出
+    TYPE_CERTIFICATE_DERIVATIVES = 'certificate_derivatives'  # 证书图片缩略图/审核图生成
+    TYPE_STUDENT_IMPORT = 'student_import'  # Excel 批量导入学生
+
+    id = db.Column(db.String(32), primary_key=True, comment='任务ID（uuid hex）')
+    job_type = db.Column(db.String(50), nullable=False, index=True, comment='任务类型')
+    admin_id = db.Column(db.Integer, nullable=True, index=True, comment='发起任务的管理员ID')
+    priority = db.Column(db.Integer, default=0, nullable=False, index=True, comment='优先级，数值越大越先执行')
+    status = db.Column(db.String(20), default=STATUS_QUEUED, nullable=False, index=True, comment='任务状态：queued/processing/completed/failed')
+    payload = db.Column(db.JSON, nullable=True, comment='任务参数（JSON）')
+    progress = db.Column(db.Integer, default=0, nullable=False, comment='已完成数量')
+    total = db.Column(db.Integer, default=0, nullable=False, comment='总数量')
+    checkpoint = db.Column(db.JSON, nullable=True, comment='断点数据（JSON），用于崩溃后续跑')
+    result = db.Column(db.JSON, nullable=True, comment='任务结果（JSON）')
+    error = db.Column(db.String(500), nullable=True, comment='错误信息')
+    attempts = db.Column(db.Integer, default=0, nullable=False, comment='已执行次数')
+    worker_id = db.Column(db.String(100), nullable=True, comment='当前执行该任务的工作线程标识')
+    heartbeat_time = db.Column(db.DateTime, nullable=True, comment='最近一次心跳时间')
+    create_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True, comment='创建时间')
+    start_time = db.Column(db.DateTime, nullable=True, comment='首次开始执行时间')
+    finish_time = db.Column(db.DateTime, nullable=True, comment='结束时间')
+
+    def to_dict(self):
+        """转换为字典（用于 JSON 序列化）"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'admin_id': self.admin_id,
+            'priority': self.priority,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'error': self.error,
+            'attempts': self.attempts,
+            'create_time': self.create_time.isoformat() if self.create_time else None,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'finish_time': self.finish_time.isoformat() if self.finish_time else None,
+        }
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.job_type} (status={self.status})>'
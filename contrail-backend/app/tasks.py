@@ -4,12 +4,17 @@
 """
 import logging
 from datetime import datetime, timedelta, date
+from sqlalchemy import select
 from app.extensions import db, scheduler
 from app.models import User, ScoreLog, Department, SystemConfig
+from app.utils.score_ledger import bulk_insert_score_logs
 
 
 logger = logging.getLogger(__name__)
 
+# 每批集合化处理的部门数量
+BONUS_DEPARTMENT_BATCH_SIZE = 50
+
 
 def _get_default_bonus_start_date():
     """
@@ -26,68 +31,78 @@ def _get_default_bonus_start_date():
         return date(2024, 1, 1)
 
 
-def _process_bonus(users, days_back, bonus_delta, bonus_reason):
+def _process_bonus(dept_ids, days_back, bonus_delta, bonus_reason):
     """
-    处理奖励逻辑（检查指定天数内是否有扣分，无扣分则奖励）
-    
+    处理奖励逻辑（集合化批量计算：检查指定天数内是否有扣分，无扣分则奖励）
+
+    一次查询筛选出指定部门中「窗口期内无扣分记录且尚未发放过该奖励」的用户，
+    再通过单次 executemany 批量写入奖励流水，避免逐用户两次查询。
+
     Args:
-        users: 用户查询对象或用户列表
+        dept_ids: 部门ID列表（同一批次处理）
         days_back: 检查过去多少天（7天或30天）
         bonus_delta: 奖励分数（1分或2分）
         bonus_reason: 奖励原因说明
-    
+
     Returns:
-        int: 奖励的学生数量
+        dict: {department_id: 奖励的学生数量}
     """
-    if not users:
-        return 0
-    
-    # 如果传入的是查询对象，转换为列表
-    if hasattr(users, 'all'):
-        users = users.all()
-    
-    bonus_count = 0
-    check_start_time = datetime.utcnow() - timedelta(days=days_back)
-    
-    for user in users:
-        # 检查该用户在过去指定天数内是否有扣分记录
-        has_deduction = ScoreLog.query.filter(
-            ScoreLog.user_id == user.id,
-            ScoreLog.delta < 0,  # 扣分记录
-            ScoreLog.create_time >= check_start_time
-        ).first()
-        
-        # 如果没有扣分记录，给予奖励
-        if not has_deduction:
-            # 检查是否已经给过奖励（避免重复）
-            existing_bonus = ScoreLog.query.filter(
-                ScoreLog.user_id == user.id,
-                ScoreLog.delta == bonus_delta,
-                ScoreLog.reason == bonus_reason,
-                ScoreLog.type == ScoreLog.TYPE_SYSTEM,
-                ScoreLog.create_time >= check_start_time
-            ).first()
-            
-            if not existing_bonus:
-                # 创建奖励记录
-                score_log = ScoreLog(
-                    user_id=user.id,
-                    delta=bonus_delta,
-                    reason=bonus_reason,
-                    type=ScoreLog.TYPE_SYSTEM
-                )
-                db.session.add(score_log)
-                bonus_count += 1
-                user_key = getattr(user, 'id_card_no', None) or getattr(user, 'student_id', None) or str(user.id)
-                logger.info(f"  ✓ 用户 {user_key} ({user.name}) 获得{bonus_reason} +{bonus_delta}分")
-    
-    return bonus_count
+    if not dept_ids:
+        return {}
+
+    now = datetime.utcnow()
+    check_start_time = now - timedelta(days=days_back)
+
+    # 窗口期内有扣分记录
+    has_deduction = select(ScoreLog.id).where(
+        ScoreLog.user_id == User.id,
+        ScoreLog.delta < 0,  # 扣分记录
+        ScoreLog.create_time >= check_start_time
+    ).exists()
+
+    # 窗口期内已经给过奖励（避免重复）
+    existing_bonus = select(ScoreLog.id).where(
+        ScoreLog.user_id == User.id,
+        ScoreLog.delta == bonus_delta,
+        ScoreLog.reason == bonus_reason,
+        ScoreLog.type == ScoreLog.TYPE_SYSTEM,
+        ScoreLog.create_time >= check_start_time
+    ).exists()
+
+    eligible_users = db.session.execute(
+        select(User.id, User.department_id, User.id_card_no, User.student_id, User.name)
+        .where(User.department_id.in_(dept_ids), ~has_deduction, ~existing_bonus)
+        .order_by(User.id.asc())
+    ).all()
+
+    if not eligible_users:
+        return {}
+
+    bulk_insert_score_logs([
+        {
+            'user_id': user.id,
+            'delta': bonus_delta,
+            'reason': bonus_reason,
+            'type': ScoreLog.TYPE_SYSTEM,
+            'create_time': now,
+        }
+        for user in eligible_users
+    ])
+
+    counts = {}
+    for user in eligible_users:
+        counts[user.department_id] = counts.get(user.department_id, 0) + 1
+        user_key = user.id_card_no or user.student_id or str(user.id)
+        logger.debug(f"  ✓ 用户 {user_key} ({user.name}) 获得{bonus_reason} +{bonus_delta}分")
+
+    return counts
 
 
 def check_and_award_bonus():
     """
     统一的自动加分检查函数（按部门轮询模式）
     遍历所有部门，根据每个部门的考核起始日期判断是否触发周/月奖励
+    触发奖励的部门按批次集合化处理（每批 BONUS_DEPARTMENT_BATCH_SIZE 个部门）
     """
     logger.info(f"[定时任务] 开始执行自动加分检查任务 - {datetime.now()}")
     
@@ -102,10 +117,11 @@ def check_and_award_bonus():
     departments = Department.query.all()
     logger.info(f"[定时任务] 共找到 {len(departments)} 个部门")
     
-    total_weekly_bonus = 0
-    total_monthly_bonus = 0
+    weekly_depts = []
+    monthly_depts = []
+    dept_names = {}
     
-    # 4. 遍历每个部门
+    # 4. 遍历每个部门，确定需要触发周/月奖励的部门
     for dept in departments:
         # 确定该部门的起始日期（优先取部门配置，若为空则取全局默认）
         dept_start_date = dept.bonus_start_date if dept.bonus_start_date else default_start_date
@@ -113,9 +129,11 @@ def check_and_award_bonus():
         # 计算天数差
         days_diff = (today - dept_start_date).days
         
+        dept_name = f"{dept.college}/{dept.grade}/{dept.major}/{dept.class_name}" or f"部门#{dept.id}"
+        dept_names[dept.id] = dept_name
+        
         # 如果起始日期在未来，跳过该部门
         if days_diff <= 0:
-            dept_name = f"{dept.college}/{dept.grade}/{dept.major}/{dept.class_name}" or f"部门#{dept.id}"
             logger.info(f"  [部门 {dept_name}] 起始日期 {dept_start_date} 尚未到达，跳过")
             continue
         
@@ -124,35 +142,28 @@ def check_and_award_bonus():
         # 判断是否触发月奖励（每30天）
         is_monthly = (days_diff % 30 == 0)
         
-        dept_name = f"{dept.college}/{dept.grade}/{dept.major}/{dept.class_name}" or f"部门#{dept.id}"
-        
         if is_weekly or is_monthly:
             logger.info(f"  [部门 {dept_name}] 起始日期: {dept_start_date}, 天数差: {days_diff}天")
-            
-            # 获取该部门下的所有学生
-            dept_users = dept.users
-            
-            if is_weekly:
-                logger.info("    → 触发周奖励检查（7天无扣分）")
-                weekly_count = _process_bonus(
-                    dept_users,
-                    days_back=7,
-                    bonus_delta=1,
-                    bonus_reason='每周全勤奖励'
-                )
-                total_weekly_bonus += weekly_count
-                logger.info(f"    → 部门 {dept_name} 周奖励: {weekly_count} 位学生")
-            
-            if is_monthly:
-                logger.info("    → 触发月奖励检查（30天无扣分）")
-                monthly_count = _process_bonus(
-                    dept_users,
-                    days_back=30,
-                    bonus_delta=2,
-                    bonus_reason='每月全勤奖励'
-                )
-                total_monthly_bonus += monthly_count
-                logger.info(f"    → 部门 {dept_name} 月奖励: {monthly_count} 位学生")
+        if is_weekly:
+            weekly_depts.append(dept.id)
+        if is_monthly:
+            monthly_depts.append(dept.id)
+    
+    # 5. 按部门批次集合化发放奖励
+    total_weekly_bonus = _award_in_batches(
+        weekly_depts, dept_names,
+        days_back=7,
+        bonus_delta=1,
+        bonus_reason='每周全勤奖励',
+        label='周奖励'
+    )
+    total_monthly_bonus = _award_in_batches(
+        monthly_depts, dept_names,
+        days_back=30,
+        bonus_delta=2,
+        bonus_reason='每月全勤奖励',
+        label='月奖励'
+    )
     
     # 提交所有更改
     db.session.commit()
@@ -167,6 +178,40 @@ def check_and_award_bonus():
     }
 
 
+def _award_in_batches(dept_ids, dept_names, days_back, bonus_delta, bonus_reason, label):
+    """
+    将需要触发奖励的部门按批次交给 _process_bonus 处理，并输出每个部门的奖励人数
+
+    Returns:
+        int: 奖励的学生总数
+    """
+    if not dept_ids:
+        return 0
+
+    logger.info(f"    → 触发{label}检查（{days_back}天无扣分），共 {len(dept_ids)} 个部门")
+    total = 0
+    for i in range(0, len(dept_ids), BONUS_DEPARTMENT_BATCH_SIZE):
+        batch = dept_ids[i:i + BONUS_DEPARTMENT_BATCH_SIZE]
+        counts = _process_bonus(
+            batch,
+            days_back=days_back,
+            bonus_delta=bonus_delta,
+            bonus_reason=bonus_reason
+        )
+        for dept_id in batch:
+            logger.info(f"    → 部门 {dept_names.get(dept_id)} {label}: {counts.get(dept_id, 0)} 位学生")
+        total += sum(counts.values())
+    return total
+
+
+def _run_daily_bonus_check():
+    """
+    定时任务入口：调度器线程中没有 Flask 应用上下文，需要手动推入
+    """
+    with scheduler.app.app_context():
+        return check_and_award_bonus()
+
+
 def register_scheduled_tasks():
     """
     注册定时任务到调度器
@@ -178,7 +223,7 @@ def register_scheduled_tasks():
     # 每天凌晨 1:00 执行一次统一的检查函数
     scheduler.add_job(
         id='daily_bonus_check',
-        func=check_and_award_bonus,
+        func=_run_daily_bonus_check,
         trigger='cron',
         hour=1,  # 凌晨1点
         minute=0,
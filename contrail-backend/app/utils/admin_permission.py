@@ -6,6 +6,7 @@ from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.models import AdminUser
+from app.utils.permission import get_admin_scope
 
 
 def admin_required(f):
@@ -21,9 +22,9 @@ def admin_required(f):
     @jwt_required()
     def decorated_function(*args, **kwargs):
         admin_id = get_jwt_identity()
-        admin = AdminUser.query.get(admin_id)
+        scope = get_admin_scope(admin_id)
         
-        if not admin:
+        if not scope:
             return jsonify({'code': 404, 'message': '管理员不存在'}), 404
         
         return f(*args, **kwargs)
@@ -48,10 +49,10 @@ def super_admin_required(f):
         # 从 claims 中获取 role，如果没有则从数据库查询
         role = claims.get('role')
         if not role:
-            admin = AdminUser.query.get(admin_id)
-            if not admin:
+            scope = get_admin_scope(admin_id)
+            if not scope:
                 return jsonify({'error': '管理员不存在'}), 404
-            role = admin.role
+            role = scope.role
         
         # 检查是否是超级管理员
         if role != AdminUser.ROLE_SUPER:
@@ -87,9 +88,6 @@ def is_super_admin(admin_id=None):
     if admin_id is None:
         admin_id = get_jwt_identity()
     
-    admin = AdminUser.query.get(admin_id)
-    if not admin:
-        return False
-    
-    return admin.role == AdminUser.ROLE_SUPER
+    scope = get_admin_scope(admin_id)
+    return bool(scope and scope.is_super)
 
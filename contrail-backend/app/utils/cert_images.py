@@ -0,0 +1,86 @@
+"""
+证书图片衍生图生成
+手机拍摄的证书原图通常有 5~10MB，审核列表逐张加载原图很慢。上传后由后台任务生成：
+- 审核尺寸图（最长边 CERT_REVIEW_IMAGE_SIZE 像素），供详情/审核页面使用
+- 缩略图（最长边 CERT_THUMBNAIL_SIZE 像素），供列表页面使用
+均为 JPEG，按 EXIF 方向转正，保存为与原图同目录的兄弟 Object Key：
+    2024/01/{uuid}.jpg -> 2024/01/{uuid}_review.jpg / 2024/01/{uuid}_thumb.jpg
+
+依赖 Pillow；未安装时不生成衍生图，接口回退为返回原图链接。
+"""
+import io
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow 为可选依赖
+    Image = None
+    ImageOps = None
+
+# 支持生成衍生图的原图扩展名（PDF 不处理）
+IMAGE_EXTS = {'jpg', 'png'}
+
+REVIEW_SUFFIX = 'review'
+THUMBNAIL_SUFFIX = 'thumb'
+
+
+def is_derivative_supported(object_key):
+    """判断原图是否需要（且能够）生成衍生图"""
+    if Image is None or not object_key or '.' not in object_key:
+        return False
+    return object_key.rsplit('.', 1)[-1].lower() in IMAGE_EXTS
+
+
+def derivative_object_key(object_key, suffix):
+    """生成衍生图的 Object Key：{原 key 去掉扩展名}_{suffix}.jpg"""
+    return f"{object_key.rsplit('.', 1)[0]}_{suffix}.jpg"
+
+
+def _encode_jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_image_derivatives(data, review_size, thumbnail_size, quality=82):
+    """
+    生成审核尺寸图与缩略图
+
+    Args:
+        data: 原图字节
+        review_size: 审核尺寸图最长边（像素）
+        thumbnail_size: 缩略图最长边（像素）
+        quality: JPEG 质量
+
+    Returns:
+        dict: { "review": bytes, "thumb": bytes }
+
+    Raises:
+        ValueError: 未安装 Pillow 或图片无法解析
+    """
+    if Image is None:
+        raise ValueError('未安装 Pillow，无法生成衍生图')
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG 按目标尺寸解码（DCT 缩放），大图解码时间与内存大幅下降
+        image.draft('RGB', (review_size, review_size))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            # 透明背景（PNG）铺白底后转 RGB
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f'图片无法解析: {e}')
+
+    review = image.copy()
+    review.thumbnail((review_size, review_size), Image.LANCZOS)
+    # 缩略图从审核尺寸图继续缩小，避免再次处理原图
+    thumb = review.copy()
+    thumb.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+
+    return {
+        REVIEW_SUFFIX: _encode_jpeg(review, quality),
+        THUMBNAIL_SUFFIX: _encode_jpeg(thumb, quality),
+    }
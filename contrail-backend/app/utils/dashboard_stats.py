@@ -0,0 +1,116 @@
+"""
+管理员仪表盘统计
+- 一条 GROUP BY 查询得到有权限学生按部门、三个阶段状态组合的人数，在内存中汇总出总人数、阶段状态分布与部门明细
+- 结果按管理员缓存 DASHBOARD_STATS_CACHE_TTL 秒；学生状态/档案变更、学生导入注册、
+  部门增删及管理员权限变更时调用 invalidate_dashboard_stats 清空缓存
+"""
+from flask import current_app
+from sqlalchemy import func
+
+from app.models import Department, User
+from app.utils.permission import get_admin_accessible_query, get_admin_scope
+from app.utils.ttl_cache import TTLCache
+
+# 三个阶段字段：录取(admission)、体检(medical)、政审(political/vetted)
+STAGE_FIELDS = (
+    ('admission', User.admission_status),
+    ('medical', User.medical_status),
+    ('vetted', User.political_status),  # 政审字段在数据库中为 political_status
+)
+
+# 状态值映射：'pending' -> 0, 'qualified' -> 1, 'unqualified' -> 2
+STATUS_CODES = {
+    'pending': 0,
+    'qualified': 1,
+    'unqualified': 2,
+}
+
+# 管理员ID -> 统计结果
+_dashboard_cache = TTLCache(default_ttl=30, maxsize=512)
+
+
+def _empty_process_stats():
+    return {stage_name: {0: 0, 1: 0, 2: 0} for stage_name, _ in STAGE_FIELDS}
+
+
+def compute_dashboard_stats(admin):
+    """
+    计算管理员可见范围内的仪表盘统计（不使用缓存）
+
+    Returns:
+        dict: {
+            "total_students": 100,
+            "total_departments": 10,
+            "process_stats": { "admission": {0: 40, 1: 50, 2: 10}, ... },
+            "department_stats": [
+                { "department_id": 1, "college": "...", "class_name": "...",
+                  "total_students": 30, "process_stats": {...} }
+            ]
+        }
+    """
+    students_query = get_admin_accessible_query(User, admin.id)
+    group_columns = [User.department_id, Department.college, Department.class_name] + \
+        [stage_field for _, stage_field in STAGE_FIELDS]
+    rows = students_query\
+        .outerjoin(Department, Department.id == User.department_id)\
+        .with_entities(*group_columns, func.count(User.id))\
+        .group_by(*group_columns)\
+        .all()
+
+    total_students = 0
+    process_stats = _empty_process_stats()
+    departments = {}
+    for dept_id, college, class_name, *stage_values, count in rows:
+        total_students += count
+        dept_stats = departments.get(dept_id)
+        if dept_stats is None:
+            dept_stats = departments[dept_id] = {
+                'department_id': dept_id,
+                'college': college,
+                'class_name': class_name,
+                'total_students': 0,
+                'process_stats': _empty_process_stats(),
+            }
+        dept_stats['total_students'] += count
+
+        for (stage_name, _), value in zip(STAGE_FIELDS, stage_values):
+            code = STATUS_CODES.get(value)
+            if code is None:
+                continue
+            process_stats[stage_name][code] += count
+            dept_stats['process_stats'][stage_name][code] += count
+
+    # 统计总部门数（根据管理员权限）
+    scope = get_admin_scope(admin.id)
+    if scope.is_super:
+        # 超级管理员可以看到所有部门
+        total_departments = Department.query.count()
+    else:
+        # 普通管理员只能看到自己管理的部门
+        total_departments = len(scope.department_ids)
+
+    return {
+        'total_students': total_students,
+        'total_departments': total_departments,
+        'process_stats': process_stats,
+        'department_stats': sorted(departments.values(), key=lambda d: (d['department_id'] is None, d['department_id'] or 0)),
+    }
+
+
+def get_dashboard_stats_cached(admin):
+    """获取仪表盘统计（优先使用缓存，缓存结果不可修改）"""
+    data = _dashboard_cache.get(admin.id)
+    if data is None:
+        data = compute_dashboard_stats(admin)
+        _dashboard_cache.set(admin.id, data, ttl=current_app.config.get('DASHBOARD_STATS_CACHE_TTL', 30))
+    return data
+
+
+def invalidate_dashboard_stats():
+    """清空仪表盘统计缓存（学生统计口径相关的数据变更后调用）"""
+    _dashboard_cache.clear()
+
+
+def get_dashboard_cache_stats():
+    """获取仪表盘统计缓存的命中统计"""
+    return _dashboard_cache.stats()
@@ -0,0 +1,660 @@
+"""
+部门档案导出渲染模块
+将单个学生的导出数据整理为纯数据快照（可序列化，不依赖数据库会话），
+再由快照渲染出积分明细 Excel 与送飞鉴定表 Word。
+Word 模板在每个进程内只解析、编译一次（按文件修改时间失效），每次渲染使用克隆的文档。
+渲染是 CPU 密集型工作，可通过 iter_render_student_files 分发到多个进程并行执行，
+结果按输入顺序返回，由调用方单线程写入 ZIP（或通过 iter_zip_stream 流式输出）。
+
+依赖项：
+- docxtpl: 渲染 Word 模板
+- pandas + openpyxl: 生成 Excel 文件
+"""
+import copy
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from docx import Document
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+
+from app.models import ScoreLog
+
+# 尝试导入 pandas，如果未安装会抛出 ImportError
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+# 模板缓存（每个进程一份，按文件修改时间失效）：
+# { 模板路径: { "mtime": ..., "blob": 模板字节, "document": 已解析的文档, "jinja_env": ..., "patched_xml": {...} } }
+_TEMPLATE_CACHE = {}
+_TEMPLATE_CACHE_LOCK = threading.Lock()
+
+# 单个模板缓存的 XML 片段数上限（正文、页眉页脚、文档属性等，正常情况下只有十几个）
+_TEMPLATE_PART_CACHE_SIZE = 64
+
+
+class _CachingEnvironment(Environment):
+    """
+    缓存 from_string 编译结果的 Jinja 环境
+    docxtpl 对每个 XML 片段调用 from_string，模板不变时片段源码也不变，无需每次重新编译
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            if len(self._compiled) >= _TEMPLATE_PART_CACHE_SIZE:
+                self._compiled.clear()
+            self._compiled[source] = template
+        return template
+
+
+class _CachedDocxTemplate(DocxTemplate):
+    """复用模板缓存中 patch_xml 结果的 DocxTemplate（patch_xml 是纯字符串处理）"""
+
+    def __init__(self, template_file, patched_xml_cache):
+        super().__init__(template_file)
+        self._patched_xml_cache = patched_xml_cache
+
+    def patch_xml(self, src_xml):
+        patched = self._patched_xml_cache.get(src_xml)
+        if patched is None:
+            patched = super().patch_xml(src_xml)
+            if len(self._patched_xml_cache) >= _TEMPLATE_PART_CACHE_SIZE:
+                self._patched_xml_cache.clear()
+            self._patched_xml_cache[src_xml] = patched
+        return patched
+
+
+def _get_template_entry(template_path):
+    """获取模板缓存项，模板文件修改后重新加载"""
+    mtime = os.path.getmtime(template_path)
+    with _TEMPLATE_CACHE_LOCK:
+        entry = _TEMPLATE_CACHE.get(template_path)
+        if entry is None or entry['mtime'] != mtime:
+            with open(template_path, 'rb') as f:
+                blob = f.read()
+            entry = {
+                'mtime': mtime,
+                'blob': blob,
+                'document': Document(io.BytesIO(blob)),
+                'jinja_env': _CachingEnvironment(),
+                'patched_xml': {},
+            }
+            _TEMPLATE_CACHE[template_path] = entry
+        return entry
+
+
+def load_export_template(template_path):
+    """
+    获取可直接渲染的导出模板（模板只解析一次，每次渲染使用克隆的文档）
+
+    Returns:
+        tuple: (doc: DocxTemplate, jinja_env: Environment)  渲染时调用 doc.render(context, jinja_env)
+    """
+    entry = _get_template_entry(template_path)
+    doc = _CachedDocxTemplate(io.BytesIO(entry['blob']), entry['patched_xml'])
+    try:
+        doc.docx = copy.deepcopy(entry['document'])
+    except Exception:
+        # 克隆失败时退回重新解析模板字节（仍省去读取文件）
+        doc.docx = Document(io.BytesIO(entry['blob']))
+    return doc, entry['jinja_env']
+
+
+
+def extract_birth_and_gender(id_card_no: str):
+    """
+    从18位身份证号中提取出生年月和性别
+
+    返回:
+        birth_date: 'YYYY年MM月' 格式字符串
+        gender: '男' 或 '女'
+    """
+    if not id_card_no or len(id_card_no) != 18:
+        return '', ''
+
+    try:
+        birth_str = id_card_no[6:14]  # YYYYMMDD
+        year = birth_str[0:4]
+        month = birth_str[4:6]
+        birth_date = f"{year}年{month}月"
+    except Exception:
+        birth_date = ''
+
+    try:
+        gender_code = int(id_card_no[16])
+        gender = '男' if gender_code % 2 == 1 else '女'
+    except Exception:
+        gender = ''
+
+    return birth_date, gender
+
+
+def build_student_snapshot(user, department, approved_certs, score_logs):
+    """
+    整理单个学生的导出快照（只读取传入的数据，不触发数据库查询）
+
+    Args:
+        user: 学生
+        department: 学生所在部门
+        approved_certs: 该学生审核通过的证书列表（按上传时间倒序，最新的在前）
+        score_logs: 该学生的积分流水列表（按创建时间升序）
+
+    Returns:
+        dict: {
+            "user_id": 1,
+            "context": {...},        # Word 模板上下文
+            "excel_rows": [...],     # 积分明细 Excel 行
+            "excel_path": "...",     # ZIP 内 Excel 路径
+            "word_path": "..."       # ZIP 内 Word 路径
+        }
+    """
+    # ========== 1. 数据清洗与提取 ==========
+    birth_date, gender = extract_birth_and_gender(user.id_card_no)
+    dept = department
+    
+    # 提取英语四六级成绩（与 student.py 的 profile 接口保持一致）
+    cet4_cert = None
+    cet6_cert = None
+    for cert in approved_certs:
+        cert_name = cert.name or ''
+        cert_name_upper = cert_name.upper()
+        
+        # 根据证书名称分类（与 profile 接口逻辑一致）
+        if cert_name == '英语四级' or ('CET-4' in cert_name_upper or '四级' in cert_name):
+            if not cet4_cert:  # 只取第一个（最新的）
+                cet4_cert = cert
+        elif cert_name == '英语六级' or ('CET-6' in cert_name_upper or '六级' in cert_name):
+            if not cet6_cert:  # 只取第一个（最新的）
+                cet6_cert = cert
+    
+    # 处理四级（与 profile 接口逻辑一致）
+    cet4_score = ''
+    if cet4_cert:
+        extra_data = cet4_cert.extra_data or {}
+        if not isinstance(extra_data, dict):
+            extra_data = {}
+        score = extra_data.get('score')
+        if score is not None:
+            cet4_score = str(score)
+    
+    # 处理六级（与 profile 接口逻辑一致）
+    cet6_score = ''
+    if cet6_cert:
+        extra_data = cet6_cert.extra_data or {}
+        if not isinstance(extra_data, dict):
+            extra_data = {}
+        score = extra_data.get('score')
+        if score is not None:
+            cet6_score = str(score)
+    
+    # 提取雅思成绩（取最新的一条）
+    ielts_l = ielts_r = ielts_w = ielts_s = ielts_total = ''
+    ielts_certs = [cert for cert in approved_certs 
+                  if 'IELTS' in (cert.name or '').upper() or '雅思' in (cert.name or '')]
+    if ielts_certs:
+        # 按 upload_time 排序，取最新的
+        latest_ielts = max(ielts_certs, key=lambda c: c.upload_time or datetime.min)
+        extra_data = latest_ielts.extra_data or {}
+        if isinstance(extra_data, dict):
+            # 确保空值转换为空字符串，而不是 'None'
+            listening_val = extra_data.get('listening')
+            reading_val = extra_data.get('reading')
+            writing_val = extra_data.get('writing')
+            speaking_val = extra_data.get('speaking')
+            total_val = extra_data.get('total')
+            
+            ielts_l = str(listening_val) if listening_val is not None else ''
+            ielts_r = str(reading_val) if reading_val is not None else ''
+            ielts_w = str(writing_val) if writing_val is not None else ''
+            ielts_s = str(speaking_val) if speaking_val is not None else ''
+            ielts_total = str(total_val) if total_val is not None else ''
+    
+    # 提取任职情况
+    # 先识别任职类证书（根据证书名称和类型，与 student.py 保持一致）
+    position_certs = []
+    for cert in approved_certs:
+        cert_name = cert.name or ''
+        cert_type = (cert.extra_data or {}).get('type', '').lower() if isinstance(cert.extra_data, dict) else ''
+        if cert_name == '任职情况' or cert_name == '任职经历' or cert_type == 'position' or '任职' in cert_name:
+            position_certs.append(cert)
+    
+    jobs = []
+    for cert in position_certs:
+        extra_data = cert.extra_data or {}
+        if not isinstance(extra_data, dict):
+            extra_data = {}
+        
+        # 解析任职时间：优先使用 start_time/end_time，如果没有则尝试解析 date 字段
+        start_time = extra_data.get('start_time', '') or ''
+        end_time = extra_data.get('end_time', '') or ''
+        
+        # 如果 start_time/end_time 为空，尝试从 date 字段解析（格式：2026-02 至 2026-02）
+        if not start_time and not end_time:
+            date_str = extra_data.get('date', '') or ''
+            if date_str and '至' in date_str:
+                parts = date_str.split('至')
+                if len(parts) == 2:
+                    start_time = parts[0].strip()
+                    end_time = parts[1].strip()
+        
+        # 处理集体获奖情况：优先使用 collective_awards，如果没有则使用 award 字段（与 student.py 保持一致）
+        collective_awards = extra_data.get('collective_awards') or extra_data.get('collectiveAwards')
+        if not collective_awards:
+            collective_awards = extra_data.get('award', '')  # 兼容 award 字段
+        
+        collective_awards_str = ''
+        if collective_awards:
+            if isinstance(collective_awards, list):
+                collective_awards_str = '；'.join(str(a) for a in collective_awards if a)
+            elif isinstance(collective_awards, str):
+                collective_awards_str = collective_awards.strip()
+        
+        job = {
+            'start_time': start_time,
+            'end_time': end_time,
+            'role': extra_data.get('role') or extra_data.get('position', ''),  # 兼容 position 字段
+            'organization': extra_data.get('organization') or extra_data.get('org', ''),  # 兼容 org 字段
+            'collective_awards': collective_awards_str,
+        }
+        jobs.append(job)
+    
+    # 提取获奖情况（先识别获奖类证书，与 student.py 保持一致）
+    award_certs = []
+    for cert in approved_certs:
+        cert_name = cert.name or ''
+        cert_type = (cert.extra_data or {}).get('type', '').lower() if isinstance(cert.extra_data, dict) else ''
+        # 排除英语和任职类证书
+        is_english = (cert_name == '英语四级' or cert_name == '英语六级' or 
+                     'CET-4' in cert_name.upper() or 'CET-6' in cert_name.upper() or
+                     '四级' in cert_name or '六级' in cert_name or
+                     'IELTS' in cert_name.upper() or '雅思' in cert_name)
+        is_position = (cert_name == '任职情况' or cert_name == '任职经历' or 
+                      cert_type == 'position' or '任职' in cert_name)
+        
+        # 识别获奖类证书
+        if not is_english and not is_position:
+            if cert_name == '获奖情况' or cert_type in ['competition', 'honor']:
+                award_certs.append(cert)
+            # 如果证书名称不是明确的英语/任职类，也视为获奖（兼容处理）
+            elif cert_name and cert_name not in ['英语四级', '英语六级', '任职情况', '任职经历']:
+                award_certs.append(cert)
+    
+    awards = []
+    for cert in award_certs:
+        extra_data = cert.extra_data or {}
+        if not isinstance(extra_data, dict):
+            extra_data = {}
+        
+        # 标准化获奖信息（与 profile 接口逻辑一致）
+        award_date = extra_data.get('date')
+        # 如果 date 为空，尝试使用 upload_time
+        if not award_date and cert.upload_time:
+            award_date = cert.upload_time.strftime('%Y-%m-%d')
+        
+        award = {
+            'date': award_date if award_date else '',  # 转换为字符串或空字符串
+            'name': extra_data.get('name') or cert.name or '',  # 奖励名称，如果没有 name，使用证书名称
+            'level': extra_data.get('level') or '',  # 奖励级别
+            'rank': extra_data.get('rank') or '',  # 获奖等次
+            'organizer': extra_data.get('organizer') or '',  # 主办单位
+        }
+        
+        awards.append(award)
+    
+    # ========== 2. 整理积分明细 Excel 行 ==========
+    excel_data = []
+    for log in score_logs:
+        if log.delta is None:
+            continue
+        date_str = log.create_time.strftime('%Y-%m-%d') if log.create_time else ''
+        delta_str = f"+{log.delta}" if log.delta > 0 else str(log.delta)
+        reason = log.reason or ''
+        # 操作类型映射：'system' -> '系统', 'manual' -> '人工'
+        op_type = '系统' if log.type == ScoreLog.TYPE_SYSTEM else '人工'
+        excel_data.append({
+            '日期': date_str,
+            '变动分值': delta_str,
+            '变动原因': reason,
+            '操作类型': op_type,
+        })
+    
+    # ========== 3. 准备 Word Context（包含定长切片逻辑）==========
+    # 任职情况：前3条映射到扁平变量，超出部分放入 jobs_extra
+    jobs_main = jobs[:3]
+    jobs_extra_raw = jobs[3:]
+    # 格式化额外任职情况：任职时间：xxx，担任职务：xxx，任职期间集体获奖情况：xxxxxx;
+    # 注意：docxtpl 模板中可能使用 {% for job in jobs_extra %} 循环，需要传递字典列表
+    jobs_extra = []
+    for idx, job in enumerate(jobs_extra_raw, start=4):  # 从第4条开始编号
+        start_time = job.get('start_time', '') or ''
+        end_time = job.get('end_time', '') or ''
+        job_time = f"{start_time} - {end_time}".strip(' -') if (start_time or end_time) else '无'
+        job_role = job.get('role', '') or '无'
+        collective_awards = job.get('collective_awards', '') or '无'
+        # 格式：任职时间：xxx，担任职务：xxx，任职期间集体获奖情况：xxxxxx;
+        job_str = f"任职时间：{job_time}，担任职务：{job_role}，任职期间集体获奖情况：{collective_awards};"
+        jobs_extra.append({
+            'index': idx,
+            'text': job_str,
+            'time': job_time,
+            'role': job_role,
+            'collective_awards': collective_awards
+        })
+    
+    # 填充前3条任职变量（不足3条用空字符串填充）
+    job_vars = {}
+    for i in range(1, 4):
+        if i <= len(jobs_main):
+            job = jobs_main[i - 1]
+            start_time = job.get('start_time', '') or ''
+            end_time = job.get('end_time', '') or ''
+            # 如果任职时间都为空，显示"无"，否则显示时间范围
+            if start_time or end_time:
+                job_vars[f'job_{i}_time'] = f"{start_time} - {end_time}".strip(' -')
+            else:
+                job_vars[f'job_{i}_time'] = '无'
+            job_vars[f'job_{i}_role'] = job.get('role', '') or ''
+            # 任职期间集体获奖情况：Word 模板使用 job_{i}_note 字段
+            # 如果为空，显示"无"
+            collective_awards = job.get('collective_awards', '') or ''
+            job_vars[f'job_{i}_note'] = collective_awards if collective_awards else '无'
+            # 保留兼容变量名
+            job_vars[f'job_{i}_collective_awards'] = collective_awards if collective_awards else '无'
+        else:
+            job_vars[f'job_{i}_time'] = ''
+            job_vars[f'job_{i}_role'] = ''
+            job_vars[f'job_{i}_note'] = ''
+            job_vars[f'job_{i}_collective_awards'] = ''
+    
+    # 获奖情况：前3条映射到扁平变量，超出部分放入 awards_extra
+    awards_main = awards[:3]
+    awards_extra_raw = awards[3:]
+    # 格式化额外获奖情况：奖励时间：xxx，奖励名称：xxxx，主办单位：xxx；奖励级别：xxxx，获奖等次：xxx；
+    # 注意：docxtpl 模板中可能使用 {% for award in awards_extra %} 循环，需要传递字典列表
+    awards_extra = []
+    for idx, award in enumerate(awards_extra_raw, start=4):  # 从第4条开始编号
+        award_date = award.get('date', '') or '无'
+        award_name = award.get('name', '') or '无'
+        award_organizer = award.get('organizer', '') or '无'
+        award_level = award.get('level', '') or '无'
+        award_rank = award.get('rank', '') or '无'
+        # 格式：奖励时间：xxx，奖励名称：xxxx，主办单位：xxx；奖励级别：xxxx，获奖等次：xxx；
+        award_str = f"奖励时间：{award_date}，奖励名称：{award_name}，主办单位：{award_organizer}；奖励级别：{award_level}，获奖等次：{award_rank}；"
+        awards_extra.append({
+            'index': idx,
+            'text': award_str,
+            'date': award_date,
+            'name': award_name,
+            'organizer': award_organizer,
+            'level': award_level,
+            'rank': award_rank
+        })
+    
+    # 填充前3条获奖变量（不足3条用空字符串填充）
+    # 注意：Word 模板使用的字段名为：award_{i}_time, award_{i}_name, award_{i}_host, award_{i}_level, award_{i}_grade
+    award_vars = {}
+    for i in range(1, 4):
+        if i <= len(awards_main):
+            award = awards_main[i - 1]
+            # 确保所有字段都不为 None，转换为字符串
+            award_name = award.get('name', '') or ''
+            award_date = award.get('date', '') or ''
+            award_level = award.get('level', '') or ''
+            award_rank = award.get('rank', '') or ''  # rank 对应模板中的 grade
+            award_organizer = award.get('organizer', '') or ''  # organizer 对应模板中的 host
+            
+            # Word 模板使用的字段名
+            award_vars[f'award_{i}_time'] = str(award_date) if award_date else ''
+            award_vars[f'award_{i}_name'] = str(award_name) if award_name else ''
+            award_vars[f'award_{i}_host'] = str(award_organizer) if award_organizer else ''  # 主办单位
+            award_vars[f'award_{i}_level'] = str(award_level) if award_level else ''
+            award_vars[f'award_{i}_grade'] = str(award_rank) if award_rank else ''  # 获奖等次
+            
+            # 保留兼容变量名
+            award_vars[f'award_{i}_date'] = str(award_date) if award_date else ''
+            award_vars[f'award_{i}_rank'] = str(award_rank) if award_rank else ''
+            award_vars[f'award_{i}_organizer'] = str(award_organizer) if award_organizer else ''
+        else:
+            award_vars[f'award_{i}_time'] = ''
+            award_vars[f'award_{i}_name'] = ''
+            award_vars[f'award_{i}_host'] = ''
+            award_vars[f'award_{i}_level'] = ''
+            award_vars[f'award_{i}_grade'] = ''
+            # 保留兼容变量名
+            award_vars[f'award_{i}_date'] = ''
+            award_vars[f'award_{i}_rank'] = ''
+            award_vars[f'award_{i}_organizer'] = ''
+    
+    # 生成导出日期
+    export_date = datetime.now().strftime('%Y年%m月%d日')
+    
+    # 合并显示英语四六级分数（格式：四级：xxx\n六级：xxx，如果没有就写"无"）
+    english_level = ''
+    if cet4_score or cet6_score:
+        parts = []
+        if cet4_score:
+            parts.append(f'四级：{cet4_score}')
+        else:
+            parts.append('四级：无')
+        if cet6_score:
+            parts.append(f'六级：{cet6_score}')
+        else:
+            parts.append('六级：无')
+        english_level = '\n'.join(parts)
+    else:
+        english_level = '四级：无\n六级：无'
+    
+    # 格式化 GPA（保留2位小数）
+    gpa_display = ''
+    if user.gpa is not None:
+        gpa_display = f'{user.gpa:.2f}'
+    
+    # 构建 Word 模板上下文
+    context = {
+        'name': user.name or '',
+        'id_card_no': user.id_card_no or '',
+        'student_id': user.student_id or '',
+        'college': dept.college or '',
+        'class_name': dept.class_name or '',  # 班级
+        'grade': dept.grade or '',
+        'total_score': user.total_score or 0,
+        'birth_date': birth_date,
+        'gender': gender,
+        'ethnicity': user.ethnicity or '',  # 民族
+        'political_affiliation': user.political_affiliation or '',  # 政治面貌
+        'gpa': gpa_display,  # 学分绩点
+        'birthplace': user.birthplace or '',  # 籍贯
+        'phone': user.phone or '',  # 联系电话
+        'export_date': export_date,
+        # 英语成绩（Word 模板使用 english_level 字段）
+        'english_level': english_level,  # 格式：四级：xxx\n六级：xxx，如果没有就写"无"
+        # 保留兼容变量名
+        'cet4_score': cet4_score,
+        'cet6_score': cet6_score,
+        'cet_scores': english_level,
+        'cet4': cet4_score,
+        'cet6': cet6_score,
+        # 雅思成绩（Word 模板使用的字段名）
+        'ielts_speaking': ielts_s,  # 口语
+        'ielts_listening': ielts_l,  # 听力
+        'ielts_reading': ielts_r,  # 阅读
+        'ielts_writing': ielts_w,  # 写作
+        'ielts_total': ielts_total,  # 总分
+        # 保留兼容变量名
+        'ielts_l': ielts_l,
+        'ielts_r': ielts_r,
+        'ielts_w': ielts_w,
+        'ielts_s': ielts_s,
+        # 任职情况（前3条）
+        **job_vars,
+        'jobs_extra': jobs_extra,  # 超出3条的数据，用于附录页循环展示（格式化的字典列表）
+        # 获奖情况（前3条）
+        **award_vars,
+        'awards_extra': awards_extra,  # 超出3条的数据，用于附录页循环展示（格式化的字典列表）
+        # 缺失字段（必须置空）
+        'photo_path': None,
+        'warning_logs': [],  # 积分预警情况（暂无数据源，保持为空）
+    }
+    
+    # ========== 4. ZIP 内文件路径 ==========
+    # 文件夹名：{学院}_{班级}_{姓名}_{学号}
+    safe_name = (user.name or '未命名').replace('/', '_').replace('\\', '_')
+    safe_college = (dept.college or '未知学院').replace('/', '_').replace('\\', '_')
+    safe_class = (dept.class_name or f'班级{dept.id}').replace('/', '_').replace('\\', '_')
+    stu_id_or_id = user.student_id or user.id_card_no or ''
+    folder_name = f'{safe_college}_{safe_class}_{safe_name}_{stu_id_or_id}'
+    
+    # Excel 文件名：{姓名}_积分明细.xlsx
+    excel_filename = f'{safe_name}_积分明细.xlsx'
+    excel_path_in_zip = f'{folder_name}/{excel_filename}'
+    
+    # Word 文件名：{姓名}_送飞鉴定表.docx
+    word_filename = f'{safe_name}_送飞鉴定表.docx'
+    word_path_in_zip = f'{folder_name}/{word_filename}'
+
+    return {
+        'user_id': user.id,
+        'context': context,
+        'excel_rows': excel_data,
+        'excel_path': excel_path_in_zip,
+        'word_path': word_path_in_zip,
+    }
+
+
+def render_student_files(snapshot, template_path):
+    """
+    根据快照渲染单个学生的导出文档（纯函数，可在子进程中执行）
+
+    Returns:
+        list: [(ZIP 内路径, 文件内容 bytes), ...]
+    """
+    # 使用 pandas 生成 Excel
+    df = pd.DataFrame(snapshot['excel_rows'])
+    excel_buffer = io.BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='积分明细')
+
+    # 生成 Word 文档
+    doc, jinja_env = load_export_template(template_path)
+    doc.render(snapshot['context'], jinja_env)
+    word_buffer = io.BytesIO()
+    doc.save(word_buffer)
+
+    return [
+        (snapshot['excel_path'], excel_buffer.getvalue()),
+        (snapshot['word_path'], word_buffer.getvalue()),
+    ]
+
+
+def resolve_render_processes(configured):
+    """
+    计算渲染进程数：配置值大于 0 时直接使用，否则按 CPU 核数自动选择（最多 4 个）
+    """
+    if configured and configured > 0:
+        return int(configured)
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def iter_render_student_files(snapshots, template_path, processes=1):
+    """
+    渲染一批学生的导出文档，按输入顺序逐个产出结果
+
+    processes > 1 时使用进程池并行渲染，同时在途的渲染任务数限制为 processes * 2，
+    避免渲染结果在内存中堆积；子进程以 spawn 方式启动（调用方是多线程的任务队列工作线程，fork 不安全）。
+    spawn 子进程会以 __mp_main__ 重新导入启动入口模块，入口模块不能在此时创建应用（见 run.py）。
+
+    Args:
+        snapshots: build_student_snapshot 生成的快照列表
+        template_path: Word 模板路径
+        processes: 渲染进程数
+
+    Yields:
+        tuple: (snapshot, [(ZIP 内路径, 文件内容 bytes), ...])
+    """
+    if processes <= 1 or len(snapshots) <= 1:
+        for snapshot in snapshots:
+            yield snapshot, render_student_files(snapshot, template_path)
+        return
+
+    max_in_flight = processes * 2
+    pending = deque()
+    snapshot_iter = iter(snapshots)
+    mp_context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as pool:
+        for snapshot in snapshot_iter:
+            pending.append((snapshot, pool.submit(render_student_files, snapshot, template_path)))
+            if len(pending) >= max_in_flight:
+                break
+
+        while pending:
+            snapshot, future = pending.popleft()
+            files = future.result()
+            next_snapshot = next(snapshot_iter, None)
+            if next_snapshot is not None:
+                pending.append((next_snapshot, pool.submit(render_student_files, next_snapshot, template_path)))
+            yield snapshot, files
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """
+    只写、不可 seek 的缓冲区，供 zipfile 流式写入
+    （zipfile 检测到不可 seek 时会改用数据描述符记录 CRC 与大小，无需回写文件头）
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """取出并清空已写入的数据"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_stream(files_iter, compression=zipfile.ZIP_DEFLATED):
+    """
+    流式生成 ZIP 文件内容
+
+    Args:
+        files_iter: 逐个产出 [(ZIP 内路径, 文件内容 bytes), ...] 的可迭代对象（通常是每个学生一组）
+        compression: zipfile.ZIP_DEFLATED 或 zipfile.ZIP_STORED
+
+    Yields:
+        bytes: ZIP 数据块（每组文件写入后产出一次，最后产出中央目录）
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression) as zipf:
+        for files in files_iter:
+            for path_in_zip, data in files:
+                zipf.writestr(path_in_zip, data)
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
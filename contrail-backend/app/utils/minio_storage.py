@@ -2,24 +2,58 @@
 MinIO 存储工具
 
 包含：
-- MinIO client 创建（从 Flask app.config 读取配置）
+- MinIO client 获取（从 Flask app.config 读取配置，同一配置进程内复用）
 - 上传对象（put_object），用于后端中转上传模式
+  - upload_bytes: 上传内存中的 bytes
+  - upload_stream: 从文件流分片读取上传，内存占用与文件大小无关
+  - hash_stream / HashingStream: 上传前或上传过程中流式计算内容 SHA-256（用于去重）
+  - hash_object: 流式计算已上传对象的 SHA-256（直传完成时去重）
+- 下载对象（get_object），用于后台任务处理已上传的文件
+- 浏览器直传：生成 POST Policy 表单（presign_post_upload），上传完成后复制到正式 Object Key 再校验（copy/stat/读取头部/删除）
 """
 
+import hashlib
 import io
 import logging
-from typing import Optional, Tuple
+import threading
+from datetime import datetime, timedelta
+from typing import BinaryIO, Optional, Tuple
 from urllib.parse import urlparse
 
 from flask import current_app
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import PostPolicy
+from minio.error import S3Error
 
 logger = logging.getLogger(__name__)
 
 
+# MinIO client 缓存：{ (host, access_key, secret_key, secure, region): Minio }
+# Minio client 线程安全，同一配置在进程内复用一个实例（复用 urllib3 连接池，避免重复解析配置）
+_client_cache = {}
+_client_cache_lock = threading.Lock()
+
+
+def _resolve_endpoint() -> Tuple[str, bool]:
+    """解析 MINIO_ENDPOINT / MINIO_SECURE，返回 (host, secure)"""
+    endpoint = current_app.config.get("MINIO_ENDPOINT")
+    parsed = urlparse(endpoint or "")
+    host = (parsed.netloc or parsed.path or "").strip() or (endpoint or "").strip()
+    if not host:
+        raise ValueError("MinIO endpoint 未配置（请设置 MINIO_ENDPOINT）")
+
+    secure_cfg = current_app.config.get("MINIO_SECURE")
+    if secure_cfg in (True, False):
+        secure = bool(secure_cfg)
+    else:
+        secure = (parsed.scheme == "https")
+    return host, secure
+
+
 def get_minio_client() -> Minio:
     """
-    创建 MinIO client（S3 协议兼容）。
+    获取 MinIO client（S3 协议兼容），同一配置在进程内复用同一个实例。
 
     配置来自 app.config：
     - MINIO_ENDPOINT: http(s)://host:port 或 host:port
@@ -27,7 +61,6 @@ def get_minio_client() -> Minio:
     - MINIO_SECURE: True/False/None（None 表示从 endpoint scheme 推断）
     - MINIO_REGION: 建议配置，避免 SDK presign 时触发 region 探测
     """
-    endpoint = current_app.config.get("MINIO_ENDPOINT")
     access_key = current_app.config.get("MINIO_ACCESS_KEY")
     secret_key = current_app.config.get("MINIO_SECRET_KEY")
     region = current_app.config.get("MINIO_REGION") or None
@@ -35,24 +68,22 @@ def get_minio_client() -> Minio:
     if not access_key or not secret_key:
         raise ValueError("MinIO access key/secret key 未配置（请设置 MINIO_ACCESS_KEY / MINIO_SECRET_KEY）")
 
-    parsed = urlparse(endpoint or "")
-    host = (parsed.netloc or parsed.path or "").strip() or (endpoint or "").strip()
-    if not host:
-        raise ValueError("MinIO endpoint 未配置（请设置 MINIO_ENDPOINT）")
-
-    secure_cfg = current_app.config.get("MINIO_SECURE")
-    if secure_cfg in (True, False):
-        secure = bool(secure_cfg)
-    else:
-        secure = (parsed.scheme == "https")
-
-    return Minio(
-        host,
-        access_key=access_key,
-        secret_key=secret_key,
-        secure=secure,
-        region=region,
-    )
+    host, secure = _resolve_endpoint()
+    cache_key = (host, access_key, secret_key, secure, region)
+    client = _client_cache.get(cache_key)
+    if client is None:
+        with _client_cache_lock:
+            client = _client_cache.get(cache_key)
+            if client is None:
+                client = Minio(
+                    host,
+                    access_key=access_key,
+                    secret_key=secret_key,
+                    secure=secure,
+                    region=region,
+                )
+                _client_cache[cache_key] = client
+    return client
 
 
 def upload_bytes(
@@ -83,4 +114,204 @@ def upload_bytes(
     return object_key, len(data)
 
 
+def download_bytes(object_key: str, bucket: Optional[str] = None) -> bytes:
+    """
+    下载对象内容（读入内存，仅用于证书图片等小文件）。
+    """
+    if not object_key:
+        raise ValueError("object_key 不能为空")
+
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    response = get_minio_client().get_object(bkt, object_key)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def read_object_head(object_key: str, length: int, bucket: Optional[str] = None) -> bytes:
+    """
+    读取对象开头的 length 个字节（Range 请求，不下载整个对象），用于内容类型嗅探。
+    """
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    response = get_minio_client().get_object(bkt, object_key, offset=0, length=length)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def hash_object(object_key: str, bucket: Optional[str] = None) -> str:
+    """
+    流式读取对象并计算内容 SHA-256（十六进制），按块读取响应，内存占用与对象大小无关。
+    """
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    response = get_minio_client().get_object(bkt, object_key)
+    try:
+        return hash_stream(response)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def stat_object(object_key: str, bucket: Optional[str] = None):
+    """
+    获取对象信息（大小、Content-Type 等）。
+
+    Returns:
+        minio Object；对象不存在时返回 None
+    """
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    try:
+        return get_minio_client().stat_object(bkt, object_key)
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchObject", "ResourceNotFound"):
+            return None
+        raise
+
+
+def copy_object(source_key: str, object_key: str, bucket: Optional[str] = None) -> None:
+    """在同一 Bucket 内复制对象（服务端复制，不经过应用服务器）。"""
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    get_minio_client().copy_object(bkt, object_key, CopySource(bkt, source_key))
 
+
+def remove_object(object_key: str, bucket: Optional[str] = None) -> None:
+    """删除对象（对象不存在时不报错）。"""
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    get_minio_client().remove_object(bkt, object_key)
+
+
+def presign_post_upload(
+    object_key: str,
+    content_type: str,
+    max_size: int,
+    expires_in: int,
+    bucket: Optional[str] = None,
+) -> Tuple[str, dict]:
+    """
+    生成浏览器直传 MinIO 的 POST Policy 表单。
+
+    策略限定：Object Key 必须等于 object_key、Content-Type 必须等于 content_type、
+    文件大小在 1 ~ max_size 字节之间，超过 expires_in 秒后失效。
+
+    Returns:
+        (upload_url, form_data): 前端以 multipart/form-data 向 upload_url 提交 form_data 中的全部字段，
+        最后附加 file 字段（文件内容）
+    """
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    policy = PostPolicy(bkt, datetime.utcnow() + timedelta(seconds=expires_in))
+    policy.add_equals_condition("key", object_key)
+    policy.add_equals_condition("Content-Type", content_type)
+    policy.add_content_length_range_condition(1, max_size)
+
+    form_data = get_minio_client().presigned_post_policy(policy)
+    form_data["key"] = object_key
+    form_data["Content-Type"] = content_type
+
+    host, secure = _resolve_endpoint()
+    upload_url = f"{'https' if secure else 'http'}://{host}/{bkt}"
+    return upload_url, form_data
+
+
+class PrefixedStream(io.RawIOBase):
+    """
+    把已经读出的开头字节（如用于类型嗅探的前 64 字节）与剩余流拼接成一个只读流，
+    用于不可 seek 的输入流：无需回退，也无需把整个文件读入内存。
+    """
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._stream.read(), b""
+            return data
+        if self._prefix:
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            if len(data) < size:
+                data += self._stream.read(size - len(data))
+            return data
+        return self._stream.read(size)
+
+
+class HashingStream(io.RawIOBase):
+    """在读取（上传）过程中同时计算 SHA-256 的只读流包装"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._hash = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._hash.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def hash_stream(stream: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+    """
+    分块读取流并计算 SHA-256（十六进制），内存占用不超过 chunk_size。
+    读取到流末尾，调用方需要时自行 seek 回开头。
+    """
+    digest = hashlib.sha256()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upload_stream(
+    object_key: str,
+    stream: BinaryIO,
+    length: int,
+    content_type: Optional[str],
+    bucket: Optional[str] = None,
+) -> Tuple[str, int]:
+    """
+    从文件流上传到 MinIO，并返回 (object_key, size)。
+
+    Args:
+        length: 流的总字节数；未知时传 -1，按 MINIO_UPLOAD_PART_SIZE 分片（multipart）上传
+
+    SDK 每次只把一个分片读入内存，单个请求的内存占用不超过分片大小，与文件大小无关。
+    """
+    if not object_key:
+        raise ValueError("object_key 不能为空")
+    if length == 0:
+        raise ValueError("上传文件为空")
+
+    bkt = bucket or current_app.config.get("MINIO_BUCKET") or "student-certificates"
+    client = get_minio_client()
+
+    part_size = 0
+    if length is None or length < 0:
+        length = -1
+        part_size = int(current_app.config.get("MINIO_UPLOAD_PART_SIZE") or 5 * 1024 * 1024)
+
+    result = client.put_object(
+        bkt,
+        object_key,
+        stream,
+        length=length,
+        content_type=content_type or "application/octet-stream",
+        part_size=part_size,
+    )
+    size = length
+    if size < 0:
+        # 长度未知时以实际读取的字节数为准（SDK 不返回对象大小，查询一次对象信息）
+        size = client.stat_object(bkt, object_key, version_id=result.version_id).size
+    return object_key, size
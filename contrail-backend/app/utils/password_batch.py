@@ -0,0 +1,54 @@
+"""
+批量密码处理
+- 批量注册/导入学生时，RSA 解密与密码哈希（pbkdf2，刻意设计为慢操作）占据绝大部分耗时
+- 两者的计算都在 C 扩展中进行并释放 GIL，使用线程池即可利用多核并行，结果按输入顺序返回
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+
+def resolve_password_workers(configured):
+    """
+    计算密码处理线程数：配置值大于 0 时直接使用，否则按 CPU 核数自动选择（最多 8 个）
+    """
+    if configured and configured > 0:
+        return int(configured)
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def _map_ordered(func, items, workers):
+    """按输入顺序返回 func(item) 的结果；只有一个线程或一项数据时直接串行执行"""
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def decrypt_passwords(rsa_utils, encrypted_passwords, workers=1):
+    """
+    批量解密 RSA 加密的密码
+
+    Returns:
+        list: 与输入一一对应的 (明文密码, 错误信息)，解密成功时错误信息为 None，失败时明文密码为 None
+    """
+    def _decrypt(encrypted):
+        try:
+            return rsa_utils.decrypt_password(encrypted), None
+        except ValueError as e:
+            return None, f'密码解密失败，请确保密码已使用RSA公钥加密: {str(e)}'
+        except Exception as e:
+            return None, f'密码处理失败: {str(e)}'
+
+    return _map_ordered(_decrypt, list(encrypted_passwords), workers)
+
+
+def hash_passwords(passwords, workers=1):
+    """
+    批量生成密码哈希（与 User.set_password 使用相同的算法与参数）
+
+    Returns:
+        list: 与输入一一对应的密码哈希
+    """
+    return _map_ordered(generate_password_hash, list(passwords), workers)
@@ -1,9 +1,174 @@
 """
 权限控制辅助模块
 提供管理员权限查询和数据过滤功能
+
+管理员的角色与管理的部门ID集合（AdminScope）通过 get_admin_scope 加载：
+- 同一请求内只查询一次（缓存在 flask.g 中）
+- 跨请求缓存 ADMIN_SCOPE_CACHE_TTL 秒（为 0 时不缓存），管理员信息、部门分配变更或部门删除时
+  调用 invalidate_admin_scope 清除
+- 开启 ADMIN_SCOPE_IN_JWT 时，登录令牌携带 dept_ids / scope_version 声明，令牌中的版本号与
+  管理员当前的 scope_version 一致时直接使用令牌中的权限，不查询管理员与部门关联；
+  角色或管理部门变更时递增 scope_version，旧令牌的权限声明随之失效（回退为查询数据库）
 """
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import false
+
 from app.extensions import db
-from app.models import AdminUser
+from app.models import AdminUser, admin_departments
+from app.utils.ttl_cache import TTLCache
+
+# 管理员ID -> AdminScope
+_admin_scope_cache = TTLCache(default_ttl=30, maxsize=1024)
+
+# 全部管理员的权限版本号 { admin_id: scope_version }，一条查询加载，用于校验令牌中的权限声明
+_scope_versions_cache = TTLCache(default_ttl=30, maxsize=1)
+_SCOPE_VERSIONS_KEY = 'all'
+
+
+class AdminScope:
+    """
+    管理员权限范围（纯数据，不持有数据库会话，可跨请求缓存）
+
+    Attributes:
+        admin_id: 管理员ID
+        role: 管理员角色（super/normal）
+        department_ids: 管理的部门ID集合（frozenset）
+    """
+    __slots__ = ('admin_id', 'role', 'department_ids')
+
+    def __init__(self, admin_id, role, department_ids):
+        self.admin_id = admin_id
+        self.role = role
+        self.department_ids = frozenset(department_ids)
+
+    @property
+    def is_super(self):
+        return self.role == AdminUser.ROLE_SUPER
+
+    def can_access_department(self, department_id):
+        """是否有权限访问指定部门（超级管理员可以访问所有部门）"""
+        return self.is_super or (department_id is not None and department_id in self.department_ids)
+
+
+def _load_admin_scope(admin_id):
+    """一条查询取出管理员角色及其管理的部门ID"""
+    rows = db.session.query(AdminUser.role, admin_departments.c.department_id)\
+        .outerjoin(admin_departments, admin_departments.c.admin_id == AdminUser.id)\
+        .filter(AdminUser.id == admin_id)\
+        .all()
+    if not rows:
+        return None
+    return AdminScope(admin_id, rows[0][0], [dept_id for _, dept_id in rows if dept_id is not None])
+
+
+def _get_scope_versions():
+    """获取全部管理员的权限版本号（缓存 ADMIN_SCOPE_CACHE_TTL 秒）"""
+    versions = _scope_versions_cache.get(_SCOPE_VERSIONS_KEY)
+    if versions is None:
+        versions = dict(db.session.query(AdminUser.id, AdminUser.scope_version).all())
+        _scope_versions_cache.set(_SCOPE_VERSIONS_KEY, versions, ttl=current_app.config.get('ADMIN_SCOPE_CACHE_TTL', 30))
+    return versions
+
+
+def build_admin_scope_claims(admin, department_ids):
+    """
+    生成登录令牌中的权限声明（仅在开启 ADMIN_SCOPE_IN_JWT 时使用）
+
+    Returns:
+        dict: { "dept_ids": [1, 2], "scope_version": 3 }
+    """
+    return {
+        'dept_ids': sorted(department_ids),
+        'scope_version': admin.scope_version or 0,
+    }
+
+
+def _scope_from_jwt(admin_id):
+    """从当前请求令牌的权限声明构造 AdminScope；未开启、不是本人令牌或版本号已过期时返回 None"""
+    if not current_app.config.get('ADMIN_SCOPE_IN_JWT') or not has_request_context():
+        return None
+    try:
+        claims = get_jwt()
+        identity = get_jwt_identity()
+    except RuntimeError:
+        # 当前请求未经过 JWT 校验
+        return None
+
+    if identity != admin_id or 'scope_version' not in claims or 'dept_ids' not in claims or 'role' not in claims:
+        return None
+    if _get_scope_versions().get(admin_id) != claims['scope_version']:
+        return None
+    return AdminScope(admin_id, claims['role'], claims['dept_ids'])
+
+
+def get_admin_scope(admin_id):
+    """
+    获取管理员权限范围（请求内缓存 + 跨请求 TTL 缓存）
+
+    Args:
+        admin_id: 管理员ID
+
+    Returns:
+        AdminScope or None: 管理员不存在时返回 None（不存在的结果只在请求内缓存）
+    """
+    if admin_id is None:
+        return None
+
+    request_scopes = g.setdefault('_admin_scopes', {})
+    if admin_id in request_scopes:
+        return request_scopes[admin_id]
+
+    scope = _scope_from_jwt(admin_id)
+    if scope is not None:
+        request_scopes[admin_id] = scope
+        return scope
+
+    scope = _admin_scope_cache.get(admin_id)
+    if scope is None:
+        scope = _load_admin_scope(admin_id)
+        if scope is not None:
+            _admin_scope_cache.set(admin_id, scope, ttl=current_app.config.get('ADMIN_SCOPE_CACHE_TTL', 30))
+
+    request_scopes[admin_id] = scope
+    return scope
+
+
+def invalidate_admin_scope(admin_id=None):
+    """
+    清除管理员权限范围缓存
+
+    Args:
+        admin_id: 管理员ID；为空时清除所有管理员（如删除部门后）
+    """
+    request_scopes = g.get('_admin_scopes')
+    _scope_versions_cache.clear()
+    if admin_id is None:
+        _admin_scope_cache.clear()
+        if request_scopes:
+            request_scopes.clear()
+    else:
+        _admin_scope_cache.delete(admin_id)
+        if request_scopes:
+            request_scopes.pop(admin_id, None)
+
+
+def get_admin_scope_cache_stats():
+    """获取管理员权限范围缓存的命中统计"""
+    return _admin_scope_cache.stats()
+
+
+def bump_admin_scope_version(admin_ids):
+    """
+    递增管理员的权限版本号（在角色或管理部门变更的同一事务中调用，由调用方提交）
+
+    Args:
+        admin_ids: 管理员ID列表，或返回管理员ID的子查询
+    """
+    db.session.query(AdminUser).filter(AdminUser.id.in_(admin_ids)).update(
+        {AdminUser.scope_version: AdminUser.scope_version + 1},
+        synchronize_session=False
+    )
 
 
 def get_admin_accessible_query(model, admin_id):
@@ -21,25 +186,47 @@ def get_admin_accessible_query(model, admin_id):
     Returns:
         SQLAlchemy Query 对象，已根据权限过滤
     """
-    admin = AdminUser.query.get(admin_id)
+    scope = get_admin_scope(admin_id)
     
-    if not admin:
+    if not scope:
         # 如果管理员不存在，返回空查询
         return model.query.filter(False)
     
     # 超级管理员可以访问所有数据
-    if admin.role == AdminUser.ROLE_SUPER:
+    if scope.is_super:
         return model.query
     
     # 普通管理员只能访问其管理的部门的数据
-    # 获取管理员管理的部门ID列表
-    managed_departments = admin.managed_departments.all()
-    dept_ids = [dept.id for dept in managed_departments]
-    
-    if not dept_ids:
+    if not scope.department_ids:
         # 如果没有管理的部门，返回空查询
         return model.query.filter(False)
     
     # 返回过滤后的查询
-    return model.query.filter(model.department_id.in_(dept_ids))
+    return model.query.filter(model.department_id.in_(sorted(scope.department_ids)))
+
 
+def get_admin_department_filter(department_column, admin_id):
+    """
+    根据管理员权限返回部门过滤条件
+    
+    逻辑：
+    - 如果是 super 管理员，返回 None（无需过滤）
+    - 如果是 normal 管理员，返回 department_column IN (管理的部门ID)
+    - 管理员不存在或没有管理的部门时返回恒假条件
+    
+    Args:
+        department_column: 需要过滤的部门ID列，如 User.department_id
+        admin_id: 管理员ID
+    
+    Returns:
+        SQLAlchemy 条件表达式或 None
+    """
+    scope = get_admin_scope(admin_id)
+    
+    if not scope or (not scope.is_super and not scope.department_ids):
+        return false()
+    
+    if scope.is_super:
+        return None
+    
+    return department_column.in_(sorted(scope.department_ids))
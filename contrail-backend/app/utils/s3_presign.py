@@ -4,20 +4,54 @@ S3/MinIO Presigned URL 工具
 目标：
 - 数据库仅保存 Object Key（相对路径/文件名）
 - 后端在返回 DTO 时生成临时可访问的 Presigned URL（默认 1 小时）
+- 已签名的 URL 在进程内缓存，剩余有效期不少于 MINIO_PRESIGN_CACHE_MARGIN 秒时直接复用
+- 列表接口使用 presign_many 批量签名：Presign 是纯本地 HMAC 计算（不访问网络），
+  同一批 key 共用一个签名时间与一次签名密钥派生，每个 key 只需两次 SHA256/HMAC
 
 依赖：
 - minio
 """
 
+import hashlib
+import hmac
 import logging
-from typing import Optional
-from datetime import timedelta
+import threading
+from typing import Dict, Iterable, Optional
+from datetime import datetime, timedelta
+from urllib.parse import quote
 
 from flask import current_app
 from app.utils.minio_storage import get_minio_client
+from app.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# 签名 URL 缓存：{ (endpoint, bucket, object_key, 有效期秒数): url }，首次使用时按配置创建
+_presign_cache = None
+_presign_cache_lock = threading.Lock()
+
+
+def _get_presign_cache() -> TTLCache:
+    global _presign_cache
+    if _presign_cache is None:
+        with _presign_cache_lock:
+            if _presign_cache is None:
+                _presign_cache = TTLCache(
+                    default_ttl=0,
+                    maxsize=int(current_app.config.get("MINIO_PRESIGN_CACHE_SIZE") or 4096),
+                )
+    return _presign_cache
+
+
+def get_presign_cache_stats() -> dict:
+    """
+    获取签名 URL 缓存统计。
+
+    Returns:
+        { "size": 10, "hits": 100, "misses": 20 }
+    """
+    return _get_presign_cache().stats()
+
 
 def presign_get_object_url(object_key: str, expires_in: Optional[int] = None) -> Optional[str]:
     """
@@ -36,11 +70,122 @@ def presign_get_object_url(object_key: str, expires_in: Optional[int] = None) ->
     try:
         bucket = current_app.config.get("MINIO_BUCKET") or "student-certificates"
         exp = int(expires_in or current_app.config.get("MINIO_PRESIGN_EXPIRES") or 3600)
+
+        # 命中缓存时直接返回（缓存项在 URL 剩余有效期不足安全余量前过期）
+        cache = _get_presign_cache()
+        cache_key = (current_app.config.get("MINIO_ENDPOINT"), bucket, object_key, exp)
+        url = cache.get(cache_key)
+        if url is not None:
+            return url
+
         client = get_minio_client()
-        return client.presigned_get_object(bucket, object_key, expires=timedelta(seconds=exp))
+        url = client.presigned_get_object(bucket, object_key, expires=timedelta(seconds=exp))
+        margin = int(current_app.config.get("MINIO_PRESIGN_CACHE_MARGIN") or 0)
+        cache.set(cache_key, url, ttl=exp - margin)
+        return url
     except Exception:
         # 只记录日志，不让异常穿透导致接口崩溃
         logger.exception("生成 Presigned URL 失败: key=%s", object_key)
         return None
 
 
+def _quote(value: str, safe: str = "") -> str:
+    """与 minio SDK 一致的 URI 编码（'~' 不编码）"""
+    return quote(value, safe=safe).replace("%7E", "~")
+
+
+def _hmac(key: bytes, data: str) -> bytes:
+    return hmac.new(key, data.encode(), hashlib.sha256).digest()
+
+
+def _sign_keys_locally(bucket: str, object_keys, exp: int, request_date: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    用同一个 client、同一签名时间为一批 object key 生成 AWS Signature V4 查询串签名。
+
+    与 client.presigned_get_object 的区别只在于：region、凭证、签名密钥（4 次 HMAC）与
+    URL 前缀每批只计算一次；生成的 URL 与 SDK 逐个签名（相同 request_date）完全一致。
+    """
+    client = get_minio_client()
+    region = current_app.config.get("MINIO_REGION") or client._get_region(bucket)
+    access_key = current_app.config.get("MINIO_ACCESS_KEY")
+    secret_key = current_app.config.get("MINIO_SECRET_KEY")
+
+    # URL 前缀（scheme、host 与 path 风格）由 SDK 决定，只构造一次
+    sample = client._base_url.build("GET", region, bucket_name=bucket, object_name="_")
+    path_prefix = sample.path[:-1]
+    base = f"{sample.scheme}://{sample.netloc}"
+
+    date = request_date or datetime.utcnow()
+    amz_date = date.strftime("%Y%m%dT%H%M%SZ")
+    scope_date = date.strftime("%Y%m%d")
+    scope = f"{scope_date}/{region}/s3/aws4_request"
+    signing_key = _hmac(_hmac(_hmac(_hmac(f"AWS4{secret_key}".encode(), scope_date), region), "s3"), "aws4_request")
+
+    # 参数名已按字典序排列，查询串即规范查询串
+    query = (
+        "X-Amz-Algorithm=AWS4-HMAC-SHA256"
+        f"&X-Amz-Credential={_quote(f'{access_key}/{scope}')}"
+        f"&X-Amz-Date={amz_date}"
+        f"&X-Amz-Expires={exp}"
+        "&X-Amz-SignedHeaders=host"
+    )
+    canonical_tail = f"\n{query}\nhost:{sample.netloc}\n\nhost\nUNSIGNED-PAYLOAD"
+    string_to_sign_head = f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+
+    urls = {}
+    for object_key in object_keys:
+        path = path_prefix + _quote(object_key, safe="/")
+        canonical_hash = hashlib.sha256(f"GET\n{path}{canonical_tail}".encode()).hexdigest()
+        signature = hmac.new(signing_key, (string_to_sign_head + canonical_hash).encode(), hashlib.sha256).hexdigest()
+        urls[object_key] = f"{base}{path}?{query}&X-Amz-Signature={signature}"
+    return urls
+
+
+def presign_many(object_keys: Iterable[str], expires_in: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """
+    批量生成 get_object 的 Presigned URL（列表接口使用）。
+
+    Args:
+        object_keys: Object Key 列表，可包含重复值与空值（空值会被忽略）
+        expires_in: 过期秒数；不传则读取 MINIO_PRESIGN_EXPIRES（默认 3600）
+
+    Returns:
+        { object_key: url }；签名失败的 key 对应 None（不会抛到 API 层导致接口崩溃）。
+    """
+    keys = list(dict.fromkeys(key for key in object_keys if key))
+    if not keys:
+        return {}
+
+    try:
+        bucket = current_app.config.get("MINIO_BUCKET") or "student-certificates"
+        exp = int(expires_in or current_app.config.get("MINIO_PRESIGN_EXPIRES") or 3600)
+        endpoint = current_app.config.get("MINIO_ENDPOINT")
+        cache = _get_presign_cache()
+    except Exception:
+        logger.exception("批量生成 Presigned URL 失败: %d 个 key", len(keys))
+        return {key: None for key in keys}
+
+    result = {}
+    missing = []
+    for key in keys:
+        url = cache.get((endpoint, bucket, key, exp))
+        if url is None:
+            missing.append(key)
+        else:
+            result[key] = url
+    if not missing:
+        return result
+
+    try:
+        signed = _sign_keys_locally(bucket, missing, exp)
+    except Exception:
+        # 本地签名失败（如 SDK 内部接口变化）时退回逐个签名
+        logger.exception("批量签名失败，改为逐个签名: %d 个 key", len(missing))
+        signed = {key: presign_get_object_url(key, expires_in=exp) for key in missing}
+
+    margin = int(current_app.config.get("MINIO_PRESIGN_CACHE_MARGIN") or 0)
+    for key, url in signed.items():
+        result[key] = url
+        if url is not None:
+            cache.set((endpoint, bucket, key, exp), url, ttl=exp - margin)
+    return result
@@ -0,0 +1,116 @@
+"""
+积分账本工具
+User.total_delta 是积分流水（ScoreLog）的物化余额：
+- ORM 写入/删除 ScoreLog 时由 models 中的事件监听器在同一事务内同步维护
+- 批量写入积分流水（绕过 ORM 事件）时由 bulk_insert_score_logs / apply_score_deltas 同步维护
+- 本模块提供对账功能：以积分流水为准重建物化余额，并报告偏差
+"""
+import logging
+
+from sqlalchemy import bindparam, func, insert, select
+
+from app.extensions import db
+from app.models import User, ScoreLog
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_score_balances(fix=True):
+    """
+    对账：比对每个用户的物化余额与积分流水 SUM(delta)，可选地修复偏差
+
+    Args:
+        fix: 是否将物化余额改写为积分流水的实际合计（默认 True）；False 时只报告不修改
+
+    Returns:
+        list: 存在偏差的用户列表，每项为
+              { "user_id": 1, "cached": 5, "actual": 7, "drift": -2 }
+              drift = cached - actual
+    """
+    ledger = (
+        select(ScoreLog.user_id, func.sum(ScoreLog.delta).label('actual'))
+        .group_by(ScoreLog.user_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(User.id, User.total_delta, func.coalesce(ledger.c.actual, 0))
+        .outerjoin(ledger, ledger.c.user_id == User.id)
+    ).all()
+
+    drifts = []
+    for user_id, cached, actual in rows:
+        cached = cached or 0
+        actual = int(actual or 0)
+        if cached != actual:
+            drifts.append({
+                'user_id': user_id,
+                'cached': cached,
+                'actual': actual,
+                'drift': cached - actual,
+            })
+
+    if fix and drifts:
+        users_table = User.__table__
+        db.session.execute(
+            users_table.update()
+            .where(users_table.c.id == bindparam('uid'))
+            .values(total_delta=bindparam('actual_delta')),
+            [{'uid': d['user_id'], 'actual_delta': d['actual']} for d in drifts]
+        )
+        db.session.commit()
+        logger.info("[积分对账] 已修复 %d 个用户的物化余额", len(drifts))
+
+    return drifts
+
+
+def apply_score_deltas(deltas, chunk_size=500):
+    """
+    批量累加用户物化余额（用于绕过 ORM 事件的批量写入积分流水场景）
+    相同变动值的用户合并为一条 UPDATE ... WHERE id IN (...)，调用方负责提交事务
+
+    Args:
+        deltas: {user_id: delta}
+        chunk_size: 单条 UPDATE 的 IN 列表最大长度
+    """
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+
+    users_table = User.__table__
+    for delta, user_ids in by_delta.items():
+        for i in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[i:i + chunk_size]
+            db.session.execute(
+                users_table.update()
+                .where(users_table.c.id.in_(chunk))
+                .values(total_delta=users_table.c.total_delta + delta)
+            )
+
+    # Session 中已加载的 User 实例的 total_delta 已过期，下次访问时重新加载
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, User) and obj.id in deltas:
+            db.session.expire(obj, ['total_delta'])
+
+
+def bulk_insert_score_logs(rows):
+    """
+    批量写入积分流水（单次 executemany），并同步累加物化余额
+    调用方负责提交事务
+
+    Args:
+        rows: [{ "user_id": 1, "delta": 1, "reason": "...", "type": "system", ... }]
+
+    Returns:
+        int: 写入的流水条数
+    """
+    if not rows:
+        return 0
+
+    db.session.execute(insert(ScoreLog.__table__), rows)
+
+    deltas = {}
+    for row in rows:
+        deltas[row['user_id']] = deltas.get(row['user_id'], 0) + row['delta']
+    apply_score_deltas(deltas)
+    return len(rows)
@@ -0,0 +1,294 @@
+"""
+学生批量导入/注册的公共工具
+- Excel 导入数据按整列（pandas Series）清洗与校验，不再逐行 iterrows
+- 已注册的身份证号/学号只按本批数据分批查询（不加载全表）
+- 新学生按批次批量插入
+- 大文件流式读取：.xlsx 使用 openpyxl 只读模式逐行读取，.csv 使用 csv 模块逐行读取，
+  按批次生成 DataFrame，内存占用与批次大小相关、与文件大小无关（pandas/openpyxl 在使用时才导入）
+"""
+import codecs
+import csv
+import io
+
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import User
+
+# 单条 IN 查询的最大长度（超过时分批查询）
+IDENTITY_QUERY_CHUNK_SIZE = 1000
+# 批量插入时每条 INSERT 语句的最大行数
+INSERT_CHUNK_SIZE = 1000
+# 导入文件必需的列（不再需要班级名称列）
+IMPORT_REQUIRED_COLUMNS = ['学号', '姓名', '身份证号']
+# 支持流式读取的导入文件格式（.xls 为旧二进制格式，只能由 pandas 整表读取）
+STREAMING_IMPORT_EXTENSIONS = ('.xlsx', '.csv')
+
+
+def load_registered_identities(id_card_nos, student_ids):
+    """
+    批量查询已注册的身份证号与学号
+
+    Args:
+        id_card_nos: 待检查的身份证号列表
+        student_ids: 待检查的学号列表
+
+    Returns:
+        tuple: (已注册的身份证号集合（统一为大写）, 已注册的学号集合)
+    """
+    # 身份证号末位 X 可能以大写或小写形式存储，两种写法都查询
+    id_card_candidates = set()
+    for id_card_no in id_card_nos:
+        id_card_candidates.update((id_card_no, id_card_no.upper(), id_card_no.lower()))
+
+    registered_id_cards = set()
+    id_card_candidates = sorted(id_card_candidates)
+    for i in range(0, len(id_card_candidates), IDENTITY_QUERY_CHUNK_SIZE):
+        chunk = id_card_candidates[i:i + IDENTITY_QUERY_CHUNK_SIZE]
+        rows = db.session.query(User.id_card_no).filter(User.id_card_no.in_(chunk)).all()
+        registered_id_cards.update(id_card_no.upper() for id_card_no, in rows)
+
+    registered_student_ids = set()
+    student_ids = sorted(set(student_ids))
+    for i in range(0, len(student_ids), IDENTITY_QUERY_CHUNK_SIZE):
+        chunk = student_ids[i:i + IDENTITY_QUERY_CHUNK_SIZE]
+        rows = db.session.query(User.student_id).filter(User.student_id.in_(chunk)).all()
+        registered_student_ids.update(student_id for student_id, in rows)
+
+    return registered_id_cards, registered_student_ids
+
+
+def bulk_insert_users(rows):
+    """
+    批量插入学生（每 INSERT_CHUNK_SIZE 行一条语句，由调用方提交事务）
+
+    Args:
+        rows: 学生字段字典列表（id_card_no、student_id、name、password_hash、department_id、base_score 等）
+    """
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(insert(User), rows[i:i + INSERT_CHUNK_SIZE])
+
+
+def _clean_column(series):
+    """整列转换为去除首尾空格的字符串，空值转换为空字符串（与逐个 str(value).strip() 结果一致）"""
+    return series.astype(str).str.strip().where(series.notna(), '')
+
+
+def validate_import_rows(df):
+    """
+    校验 Excel 导入数据（需包含 学号、姓名、身份证号 三列）
+
+    校验顺序与规则：
+    - 姓名为空、身份证号为空、身份证号不是18位或格式不正确的行记为错误
+    - 身份证号或学号已注册（包括本文件中更靠前的已接受行）的行跳过
+    - 学号不是纯数字的行记为错误
+
+    Args:
+        df: pandas DataFrame（行号 = 索引 + 2，分批校验时传入保留原索引的切片）
+
+    Returns:
+        tuple: (new_students, skip_count, errors)
+            new_students: 待创建学生列表 [{'row', 'id_card_no', 'student_id', 'name'}, ...]，按行号顺序
+            errors: 错误列表（按行号排序），格式与逐行导入时一致
+    """
+    student_ids = _clean_column(df['学号'])
+    names = _clean_column(df['姓名'])
+    id_card_nos = _clean_column(df['身份证号']).str.upper()
+    row_nums = df.index + 2
+
+    errors = []
+    remaining = names.notna()  # 全部为 True 的布尔列
+
+    def reject(mask, message, with_id_card=False):
+        nonlocal remaining
+        hit = remaining & mask
+        for row_num, student_id, id_card_no in zip(row_nums[hit.to_numpy()], student_ids[hit], id_card_nos[hit]):
+            error = {'row': int(row_num), 'student_id': student_id}
+            if with_id_card:
+                error['id_card_no'] = id_card_no
+            error['error'] = message
+            errors.append(error)
+        remaining = remaining & ~hit
+
+    reject(names == '', '姓名为空')
+    reject(id_card_nos == '', '身份证号为空')
+    reject(id_card_nos.str.len() != 18, '身份证号必须为18位', with_id_card=True)
+    last_chars = id_card_nos.str[17:]
+    valid_format = id_card_nos.str[:17].str.isdigit() & (last_chars.str.isdigit() | (last_chars == 'X'))
+    reject(~valid_format.fillna(False).astype(bool), '身份证号格式不正确', with_id_card=True)
+
+    # 数据库中已注册的身份证号/学号：跳过
+    has_student_id = student_ids != ''
+    registered_id_cards, registered_student_ids = load_registered_identities(
+        id_card_nos[remaining].tolist(),
+        student_ids[remaining & has_student_id].tolist(),
+    )
+    registered = id_card_nos.isin(registered_id_cards) | (has_student_id & student_ids.isin(registered_student_ids))
+    skip_count = int((remaining & registered).sum())
+    remaining = remaining & ~registered
+
+    # 文件内重复（与更靠前的已接受行重复则跳过）依赖逐行的接受结果，只对剩余行顺序判断
+    invalid_student_id = has_student_id & ~student_ids.str.isdigit().fillna(False).astype(bool)
+    accepted_id_cards = set()
+    accepted_student_ids = set()
+    new_students = []
+    for row_num, student_id, name, id_card_no, invalid in zip(
+        row_nums[remaining.to_numpy()], student_ids[remaining], names[remaining],
+        id_card_nos[remaining], invalid_student_id[remaining],
+    ):
+        if id_card_no in accepted_id_cards or (student_id and student_id in accepted_student_ids):
+            skip_count += 1
+            continue
+        if invalid:
+            errors.append({'row': int(row_num), 'student_id': student_id, 'error': '学号必须为纯数字'})
+            continue
+
+        if student_id:
+            accepted_student_ids.add(student_id)
+        accepted_id_cards.add(id_card_no)
+        new_students.append({
+            'row': int(row_num), 'id_card_no': id_card_no, 'student_id': student_id or None, 'name': name
+        })
+
+    errors.sort(key=lambda error: error['row'])
+    return new_students, skip_count, errors
+
+
+def _detect_csv_encoding(stream, sample_size=64 * 1024):
+    """根据文件开头判断 CSV 编码：能按 UTF-8 解码时使用 utf-8-sig（兼容 BOM），否则按 GB18030（Excel 中文默认编码）"""
+    head = stream.read(sample_size)
+    stream.seek(0)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return 'gb18030'
+    return 'utf-8-sig'
+
+
+def _iter_sheet_rows(stream, filename):
+    """逐行读取导入文件（第一行为表头），每行为单元格值的元组/列表"""
+    if filename.endswith('.csv'):
+        text = io.TextIOWrapper(stream, encoding=_detect_csv_encoding(stream), newline='')
+        try:
+            yield from csv.reader(text)
+        finally:
+            # 不关闭调用方传入的文件
+            text.detach()
+    else:
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+
+def _read_required_positions(header, filename):
+    """根据表头找到必需列的位置，缺少必需的列时抛出 ValueError"""
+    columns = [str(value).strip() if value is not None else '' for value in (header or ())]
+    missing_columns = [col for col in IMPORT_REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        file_type = 'CSV' if filename.endswith('.csv') else 'Excel'
+        raise ValueError(f'{file_type} 文件缺少必需的列: {", ".join(missing_columns)}')
+    return [columns.index(col) for col in IMPORT_REQUIRED_COLUMNS]
+
+
+def _normalize_cell(value):
+    """单元格值与 pandas 读取结果保持一致：整数值的浮点数转为整数，空字符串视为空值"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if value == '':
+        return None
+    return value
+
+
+def inspect_import_file(stream, filename):
+    """
+    检查导入文件的表头并统计数据行数（.xlsx 取工作表记录的行数，可能包含空行）
+
+    Returns:
+        int: 数据行数（不含表头）
+
+    Raises:
+        ValueError: 文件读取失败或缺少必需的列
+    """
+    try:
+        if filename.endswith('.csv'):
+            rows = _iter_sheet_rows(stream, filename)
+            try:
+                _read_required_positions(next(rows, None), filename)
+                return sum(1 for _ in rows)
+            finally:
+                rows.close()
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            _read_required_positions(next(sheet.iter_rows(max_row=1, values_only=True), None), filename)
+            return max((sheet.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f'文件读取失败: {str(e)}')
+    finally:
+        stream.seek(0)
+
+
+def iter_import_chunks(stream, filename, chunk_size, start_row=0):
+    """
+    流式读取 .xlsx/.csv 导入文件，每 chunk_size 个数据行生成一个 DataFrame（只含必需的三列）
+
+    DataFrame 的索引为数据行序号（从0开始，包含空行），行号 = 索引 + 2 与表格中的实际行号一致；
+    三列都为空的行不放入 DataFrame。
+
+    Args:
+        stream: 二进制文件对象
+        filename: 文件名（小写，用于判断格式）
+        chunk_size: 每批的数据行数
+        start_row: 从第几个数据行开始（断点续跑时跳过已处理的行）
+
+    Yields:
+        tuple: (已读取的数据行数, DataFrame)
+
+    Raises:
+        ValueError: 缺少必需的列
+    """
+    import pandas as pd
+
+    rows = _iter_sheet_rows(stream, filename)
+    try:
+        positions = _read_required_positions(next(rows, None), filename)
+
+        values, index = [], []
+        consumed = start_row
+        for position, row in enumerate(rows):
+            if position < start_row:
+                continue
+            consumed = position + 1
+            cells = [_normalize_cell(row[i]) if i < len(row) else None for i in positions]
+            if any(cell is not None for cell in cells):
+                values.append(cells)
+                index.append(position)
+            if (consumed - start_row) % chunk_size == 0:
+                yield consumed, pd.DataFrame(values, columns=IMPORT_REQUIRED_COLUMNS, index=index, dtype=object)
+                values, index = [], []
+
+        if (consumed - start_row) % chunk_size:
+            yield consumed, pd.DataFrame(values, columns=IMPORT_REQUIRED_COLUMNS, index=index, dtype=object)
+    finally:
+        rows.close()
+
+
+def read_import_frame(stream, filename):
+    """一次读取整个 .csv/.xlsx 导入文件（用于同步导入）"""
+    import pandas as pd
+
+    frames = [frame for _, frame in iter_import_chunks(stream, filename, chunk_size=10000)]
+    if not frames:
+        return pd.DataFrame(columns=IMPORT_REQUIRED_COLUMNS, dtype=object)
+    return pd.concat(frames)
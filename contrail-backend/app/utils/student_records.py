@@ -0,0 +1,53 @@
+"""
+学生档案数据批量加载工具
+User.certificates / User.score_logs 是 lazy='dynamic' 关系，逐个学生访问会为每个学生各发一次查询。
+本模块按学生ID批量查询审核通过的证书与积分流水（各一条查询），在内存中按 user_id 分组，
+供部门档案导出与学生档案接口共用。
+"""
+from app.models import Certificate, ScoreLog
+
+# 单条查询 IN 列表的最大长度（超过时分批查询）
+RECORDS_CHUNK_SIZE = 1000
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def load_student_records(user_ids, include_score_logs=True):
+    """
+    批量加载学生的档案数据
+
+    Args:
+        user_ids: 学生ID列表
+        include_score_logs: 是否同时加载积分流水
+
+    Returns:
+        dict: {
+            user_id: {
+                "certificates": [...],   # 审核通过的证书，按上传时间倒序（最新的在前）
+                "score_logs": [...]      # 积分流水，按创建时间升序
+            }
+        }
+        没有数据的学生对应空列表
+    """
+    user_ids = list(user_ids)
+    records = {user_id: {'certificates': [], 'score_logs': []} for user_id in user_ids}
+
+    for chunk in _chunks(user_ids, RECORDS_CHUNK_SIZE):
+        certificates = Certificate.query.filter(
+            Certificate.user_id.in_(chunk),
+            Certificate.status == Certificate.STATUS_APPROVED
+        ).order_by(Certificate.upload_time.desc(), Certificate.id.desc()).all()
+        for cert in certificates:
+            records[cert.user_id]['certificates'].append(cert)
+
+        if include_score_logs:
+            score_logs = ScoreLog.query.filter(
+                ScoreLog.user_id.in_(chunk)
+            ).order_by(ScoreLog.create_time.asc(), ScoreLog.id.asc()).all()
+            for log in score_logs:
+                records[log.user_id]['score_logs'].append(log)
+
+    return records
@@ -0,0 +1,86 @@
+"""
+进程内 TTL 缓存
+线程安全，支持容量上限（超出时淘汰最久未使用的项）与命中统计。缓存只在当前进程内有效，
+多进程部署时各进程各自缓存，数据一致性依赖较短的过期时间与写操作时的主动失效。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    带过期时间的键值缓存
+
+    使用方式：
+        cache = TTLCache(default_ttl=30, maxsize=512)
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value)
+    """
+
+    def __init__(self, default_ttl=60, maxsize=1024):
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expire_at, value)，按最近使用顺序排列
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, default=None):
+        """获取缓存值，不存在或已过期时返回 default"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expire_at, value = item
+                if expire_at > now:
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """写入缓存值，ttl 为空时使用 default_ttl；ttl <= 0 时不缓存"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict(now)
+            self._data[key] = (now + ttl, value)
+            self._data.move_to_end(key)
+
+    def delete(self, key):
+        """删除指定缓存项"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        获取缓存统计
+
+        Returns:
+            dict: { "size": 10, "hits": 100, "misses": 20 }
+        """
+        with self._lock:
+            return {'size': len(self._data), 'hits': self._hits, 'misses': self._misses}
+
+    def _evict(self, now):
+        """腾出空间：先清理过期项，仍然已满时淘汰最久未使用的项（调用方需持有锁）"""
+        expired = [key for key, (expire_at, _) in self._data.items() if expire_at <= now]
+        for key in expired:
+            del self._data[key]
+        while len(self._data) >= self.maxsize:
+            self._data.popitem(last=False)
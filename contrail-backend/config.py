@@ -24,6 +24,35 @@ class Config:
     SCHEDULER_API_ENABLED = True  # 启用调度器 API (用于查看任务状态)
     SCHEDULER_TIMEZONE = 'Asia/Shanghai'  # 时区设置为中国时区
     
+    # 后台任务队列配置（导出等耗时任务）
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS') or '2')  # 每个进程的工作线程数
+    JOB_MAX_RUNNING_PER_ADMIN = int(os.environ.get('JOB_MAX_RUNNING_PER_ADMIN') or '1')  # 单个管理员同时执行的任务数
+    JOB_MAX_PENDING_PER_ADMIN = int(os.environ.get('JOB_MAX_PENDING_PER_ADMIN') or '5')  # 单个管理员排队+执行中的任务数上限
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or '2')  # 空闲时轮询队列的间隔（秒）
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS') or '300')  # 心跳超时时间（秒），超时视为执行进程崩溃
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or '3')  # 崩溃后最多执行次数
+    
+    # 档案导出渲染进程数（0 表示按 CPU 核数自动选择，1 表示在任务线程内串行渲染）
+    EXPORT_RENDER_PROCESSES = int(os.environ.get('EXPORT_RENDER_PROCESSES') or '0')
+    
+    # 管理员仪表盘统计缓存时间（秒，0 表示不缓存）
+    DASHBOARD_STATS_CACHE_TTL = int(os.environ.get('DASHBOARD_STATS_CACHE_TTL') or '30')
+    
+    # 管理员角色与管理部门的跨请求缓存时间（秒，0 表示只在请求内缓存）
+    # 多进程部署时，其他进程的缓存最多在该时间后才感知到权限变更
+    ADMIN_SCOPE_CACHE_TTL = int(os.environ.get('ADMIN_SCOPE_CACHE_TTL') or '30')
+    # 是否在管理员令牌中携带权限声明（管理部门ID与权限版本号），开启后权限版本号未变化的请求不再查询管理员权限
+    ADMIN_SCOPE_IN_JWT = os.environ.get('ADMIN_SCOPE_IN_JWT', 'false').lower() in ('1', 'true', 'yes', 'y')
+    
+    # 批量注册学生：单次请求的最大人数，以及 RSA 解密与密码哈希的线程数（0 表示按 CPU 核数自动选择）
+    # 每个密码哈希约需 0.3~0.4 秒 CPU 时间，单次人数上限应按 线程数 / 单个哈希耗时 × 请求超时时间 估算，
+    # 实测 100 人单线程约 35 秒（多核时按线程数缩短），调高前先用 scripts/bench_batch_register.py 按目标人数实测；
+    # 更多学生请使用异步导入（/students/import/start）
+    BATCH_REGISTER_MAX_USERS = int(os.environ.get('BATCH_REGISTER_MAX_USERS') or '100')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or '0')
+    # 异步导入学生任务每批处理（并提交）的行数，任务中断后从最后提交的批次继续
+    STUDENT_IMPORT_CHUNK_SIZE = int(os.environ.get('STUDENT_IMPORT_CHUNK_SIZE') or '500')
+    
     # 文件上传配置
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 最大上传文件大小 16MB
     UPLOAD_FOLDER = 'uploads'  # 证书图片上传目录
@@ -38,6 +67,17 @@ class Config:
     MINIO_SECRET_KEY = os.environ.get('MINIO_SECRET_KEY')
     MINIO_REGION = os.environ.get('MINIO_REGION') or 'us-east-1'
     MINIO_PRESIGN_EXPIRES = int(os.environ.get('MINIO_PRESIGN_EXPIRES') or '3600')  # 默认 1 小时
+    # 签名 URL 缓存：剩余有效期不少于安全余量（秒）时复用已签名的 URL；余量不小于有效期时不缓存
+    MINIO_PRESIGN_CACHE_MARGIN = int(os.environ.get('MINIO_PRESIGN_CACHE_MARGIN') or '600')
+    MINIO_PRESIGN_CACHE_SIZE = int(os.environ.get('MINIO_PRESIGN_CACHE_SIZE') or '4096')
+    # 流式上传长度未知时的分片大小（字节，S3 要求不小于 5MB），也是单个上传请求缓冲的内存上限
+    MINIO_UPLOAD_PART_SIZE = int(os.environ.get('MINIO_UPLOAD_PART_SIZE') or str(5 * 1024 * 1024))
+    # 证书图片衍生图：审核尺寸图与缩略图的最长边（像素）及 JPEG 质量
+    CERT_REVIEW_IMAGE_SIZE = int(os.environ.get('CERT_REVIEW_IMAGE_SIZE') or '1600')
+    CERT_THUMBNAIL_SIZE = int(os.environ.get('CERT_THUMBNAIL_SIZE') or '320')
+    CERT_DERIVATIVE_QUALITY = int(os.environ.get('CERT_DERIVATIVE_QUALITY') or '82')
+    # 浏览器直传 MinIO 的上传表单有效期（秒）
+    CERT_DIRECT_UPLOAD_EXPIRES = int(os.environ.get('CERT_DIRECT_UPLOAD_EXPIRES') or '600')
     # 是否使用 HTTPS：
     # - 若设置了 MINIO_SECURE，则使用该值
     # - 若未设置，则由 MINIO_ENDPOINT 的 scheme 自动推断（http -> False / https -> True）
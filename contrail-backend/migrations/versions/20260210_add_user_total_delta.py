@@ -0,0 +1,36 @@
+"""add user total_delta materialized balance
+
+在 users 表添加物化余额字段：
+- total_delta: 积分流水变动累计值（total_score = base_score + total_delta）
+并根据现有 score_logs 回填该字段
+
+Revision ID: 20260210_add_user_total_delta
+Revises: 20260203_add_user_political_affiliation_field
+Create Date: 2026-02-10
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260210_add_user_total_delta'
+down_revision = '20260203_add_user_political_affiliation_field'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_delta', sa.Integer(), nullable=False, server_default='0', comment='积分流水变动累计值（物化余额）'))
+
+    # 根据现有积分流水回填物化余额
+    op.execute(
+        "UPDATE users SET total_delta = COALESCE("
+        "(SELECT SUM(score_logs.delta) FROM score_logs WHERE score_logs.user_id = users.id), 0)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('total_delta')
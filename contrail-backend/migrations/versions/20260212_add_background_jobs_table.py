@@ -0,0 +1,63 @@
+"""add background_jobs table
+
+新增 background_jobs 表，持久化存储后台任务（部门档案导出等）：
+- 任务状态/进度/结果保存在数据库中，多进程共享、重启不丢失
+- priority: 任务优先级
+- checkpoint: 断点数据，崩溃后从断点续跑
+- worker_id / heartbeat_time: 执行者与心跳，用于识别崩溃的任务
+
+Revision ID: 20260212_add_background_jobs_table
+Revises: 20260210_add_user_total_delta
+Create Date: 2026-02-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260212_add_background_jobs_table'
+down_revision = '20260210_add_user_total_delta'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False, comment='任务ID（uuid hex）'),
+        sa.Column('job_type', sa.String(length=50), nullable=False, comment='任务类型'),
+        sa.Column('admin_id', sa.Integer(), nullable=True, comment='发起任务的管理员ID'),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='0', comment='优先级，数值越大越先执行'),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued', comment='任务状态：queued/processing/completed/failed'),
+        sa.Column('payload', sa.JSON(), nullable=True, comment='任务参数（JSON）'),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0', comment='已完成数量'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0', comment='总数量'),
+        sa.Column('checkpoint', sa.JSON(), nullable=True, comment='断点数据（JSON），用于崩溃后续跑'),
+        sa.Column('result', sa.JSON(), nullable=True, comment='任务结果（JSON）'),
+        sa.Column('error', sa.String(length=500), nullable=True, comment='错误信息'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0', comment='已执行次数'),
+        sa.Column('worker_id', sa.String(length=100), nullable=True, comment='当前执行该任务的工作线程标识'),
+        sa.Column('heartbeat_time', sa.DateTime(), nullable=True, comment='最近一次心跳时间'),
+        sa.Column('create_time', sa.DateTime(), nullable=False, comment='创建时间'),
+        sa.Column('start_time', sa.DateTime(), nullable=True, comment='首次开始执行时间'),
+        sa.Column('finish_time', sa.DateTime(), nullable=True, comment='结束时间'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_background_jobs_job_type'), ['job_type'], unique=False)
+        batch_op.create_index(batch_op.f('ix_background_jobs_admin_id'), ['admin_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_background_jobs_priority'), ['priority'], unique=False)
+        batch_op.create_index(batch_op.f('ix_background_jobs_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_background_jobs_create_time'), ['create_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_background_jobs_create_time'))
+        batch_op.drop_index(batch_op.f('ix_background_jobs_status'))
+        batch_op.drop_index(batch_op.f('ix_background_jobs_priority'))
+        batch_op.drop_index(batch_op.f('ix_background_jobs_admin_id'))
+        batch_op.drop_index(batch_op.f('ix_background_jobs_job_type'))
+
+    op.drop_table('background_jobs')
@@ -0,0 +1,32 @@
+"""add certificate derivative image keys
+
+在 certificates 表添加图片衍生图字段（上传后由后台任务生成）：
+- review_image_key: 审核尺寸图片的 Object Key
+- thumbnail_key: 缩略图的 Object Key
+
+Revision ID: 20260213_add_certificate_derivative_keys
+Revises: 20260212_add_background_jobs_table
+Create Date: 2026-02-13
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260213_add_certificate_derivative_keys'
+down_revision = '20260212_add_background_jobs_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('certificates', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('review_image_key', sa.String(length=500), nullable=True, comment='审核尺寸图片的 Object Key'))
+        batch_op.add_column(sa.Column('thumbnail_key', sa.String(length=500), nullable=True, comment='缩略图的 Object Key'))
+
+
+def downgrade():
+    with op.batch_alter_table('certificates', schema=None) as batch_op:
+        batch_op.drop_column('thumbnail_key')
+        batch_op.drop_column('review_image_key')
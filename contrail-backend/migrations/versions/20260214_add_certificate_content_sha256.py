@@ -0,0 +1,32 @@
+"""add certificate content_sha256
+
+在 certificates 表添加文件内容哈希字段，用于同一学生重复上传相同文件时复用已有对象：
+- content_sha256: 文件内容 SHA-256（十六进制）
+- 索引 ix_certificates_user_id_content_sha256 (user_id, content_sha256)
+
+Revision ID: 20260214_add_certificate_content_sha256
+Revises: 20260213_add_certificate_derivative_keys
+Create Date: 2026-02-14
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260214_add_certificate_content_sha256'
+down_revision = '20260213_add_certificate_derivative_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('certificates', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_sha256', sa.String(length=64), nullable=True, comment='文件内容 SHA-256（十六进制）'))
+        batch_op.create_index('ix_certificates_user_id_content_sha256', ['user_id', 'content_sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('certificates', schema=None) as batch_op:
+        batch_op.drop_index('ix_certificates_user_id_content_sha256')
+        batch_op.drop_column('content_sha256')
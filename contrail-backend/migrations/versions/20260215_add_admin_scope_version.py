@@ -0,0 +1,29 @@
+"""add admin_users scope_version
+
+在 admin_users 表添加权限版本号字段：
+- scope_version: 角色或管理部门变更时递增，令牌中携带的权限声明（ADMIN_SCOPE_IN_JWT）版本不一致时失效
+
+Revision ID: 20260215_add_admin_scope_version
+Revises: 20260214_add_certificate_content_sha256
+Create Date: 2026-02-15
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260215_add_admin_scope_version'
+down_revision = '20260214_add_certificate_content_sha256'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('admin_users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scope_version', sa.Integer(), nullable=False, server_default='0', comment='权限版本号（角色或管理部门变更时递增，使令牌中的权限声明失效）'))
+
+
+def downgrade():
+    with op.batch_alter_table('admin_users', schema=None) as batch_op:
+        batch_op.drop_column('scope_version')
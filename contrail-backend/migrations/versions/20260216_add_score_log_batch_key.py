@@ -0,0 +1,35 @@
+"""add score_logs admin_id and batch_key
+
+在 score_logs 表添加操作管理员与批量调整的幂等键字段，批量调整积分重试时不会重复加减分：
+- admin_id: 操作管理员ID（人工调整时记录，系统奖励与历史数据为空）
+- batch_key: 客户端提供的批次键（单条调整为空）
+- 唯一索引 ix_score_logs_admin_id_batch_key_user_id (admin_id, batch_key, user_id)：批次键按管理员区分
+
+Revision ID: 20260216_add_score_log_batch_key
+Revises: 20260215_add_admin_scope_version
+Create Date: 2026-02-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260216_add_score_log_batch_key'
+down_revision = '20260215_add_admin_scope_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('score_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('admin_id', sa.Integer(), nullable=True, comment='操作管理员ID（人工调整时记录）'))
+        batch_op.add_column(sa.Column('batch_key', sa.String(length=64), nullable=True, comment='批量调整批次键（幂等键）'))
+        batch_op.create_index('ix_score_logs_admin_id_batch_key_user_id', ['admin_id', 'batch_key', 'user_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('score_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_score_logs_admin_id_batch_key_user_id')
+        batch_op.drop_column('batch_key')
+        batch_op.drop_column('admin_id')
@@ -0,0 +1,32 @@
+"""add certificate upload_key
+
+在 certificates 表添加直传临时对象的 Object Key，直传完成接口据此保证同一次上传只登记一条证书：
+- upload_key: 直传临时对象的 Object Key（后端中转上传为空）
+- 唯一索引 ix_certificates_upload_key (upload_key)
+
+Revision ID: 20260217_add_certificate_upload_key
+Revises: 20260216_add_score_log_batch_key
+Create Date: 2026-02-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260217_add_certificate_upload_key'
+down_revision = '20260216_add_score_log_batch_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('certificates', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('upload_key', sa.String(length=500), nullable=True, comment='直传临时对象的 Object Key'))
+        batch_op.create_index('ix_certificates_upload_key', ['upload_key'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('certificates', schema=None) as batch_op:
+        batch_op.drop_index('ix_certificates_upload_key')
+        batch_op.drop_column('upload_key')
@@ -13,7 +13,10 @@ load_dotenv()
 config_name = os.environ.get('FLASK_ENV', 'development')
 
 # 创建应用实例
-app = create_app(config_name)
+# 档案导出的渲染进程以 spawn 方式启动，子进程会以 __mp_main__ 的名义重新导入本文件；
+# 子进程只执行渲染函数，不能再创建应用（否则每个子进程都会检查迁移、启动定时任务与任务队列）
+if __name__ != '__mp_main__':
+    app = create_app(config_name)
 
 if __name__ == '__main__':
     # 开发环境配置
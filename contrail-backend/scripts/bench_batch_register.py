@@ -0,0 +1,128 @@
+"""
+批量注册学生基准测试
+以普通管理员身份，对比逐行处理（逐行查询部门与唯一性、串行解密和哈希、逐行 flush 的旧实现）与
+POST /api/admin/students/batch-register 的批量流水线注册同样数量学生的耗时和 SQL 语句数，
+并校验两者创建的学生数据一致。
+
+密码哈希（pbkdf2）占据绝大部分耗时，流水线的加速比取决于 CPU 核数（PASSWORD_HASH_WORKERS）。
+
+用法：
+    python scripts/bench_batch_register.py --users 100
+"""
+import argparse
+import base64
+
+from bench_utils import create_bench_app, measure
+
+
+def _seed():
+    """创建两个部门和一个管理这两个部门的普通管理员"""
+    from app.extensions import db
+    from app.models import AdminUser, Department
+
+    departments = [Department(college='基准学院', class_name=f'{i}班', base_score=80 + i) for i in range(2)]
+    db.session.add_all(departments)
+    db.session.flush()
+
+    admin = AdminUser(username='bench_admin', password_hash='x', name='基准管理员', role=AdminUser.ROLE_NORMAL)
+    admin.managed_departments.extend(departments)
+    db.session.add(admin)
+    db.session.commit()
+    return admin.id, [department.id for department in departments]
+
+
+def _users_payload(count, prefix, department_ids, encrypt):
+    """生成 count 个待注册学生，身份证号/学号以 prefix 开头区分两组数据"""
+    users = []
+    for i in range(count):
+        users.append({
+            'id_card_no': f'{prefix}{i:017d}',
+            'student_id': f'{prefix}{i:011d}',
+            'name': f'学生{i}',
+            'password': encrypt(f'pw{i}'),
+            'department_id': department_ids[i % len(department_ids)],
+        })
+    return users
+
+
+def _legacy_register(users):
+    """旧实现：逐行查询部门与唯一性，串行解密密码、生成哈希，逐行 flush"""
+    from app.extensions import db
+    from app.models import Department, User
+    from app.utils.rsa_utils import get_rsa_utils
+
+    rsa_utils = get_rsa_utils()
+    for user_data in users:
+        department = db.session.get(Department, user_data['department_id'])
+        password = rsa_utils.decrypt_password(user_data['password'])
+        assert not User.query.filter_by(id_card_no=user_data['id_card_no']).first()
+        assert not User.query.filter_by(student_id=user_data['student_id']).first()
+        user = User(
+            id_card_no=user_data['id_card_no'],
+            student_id=user_data['student_id'],
+            name=user_data['name'],
+            department_id=department.id,
+            base_score=department.base_score,
+        )
+        user.set_password(password)
+        db.session.add(user)
+        db.session.flush()
+    db.session.commit()
+
+
+def _created_users(prefix):
+    """按身份证号顺序返回一组学生的数据（去掉区分两组数据的前缀）"""
+    from app.models import User
+
+    users = User.query.filter(User.id_card_no.like(f'{prefix}%')).order_by(User.id_card_no).all()
+    return [
+        (user.id_card_no[1:], user.student_id[1:], user.name, user.department_id, user.base_score,
+         user.check_password(f'pw{int(user.id_card_no[1:])}'))
+        for user in users
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量注册学生基准测试')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=0, help='密码处理线程数（0 表示按 CPU 核数自动选择）')
+    args = parser.parse_args()
+
+    app, _ = create_bench_app()
+    app.config['BATCH_REGISTER_MAX_USERS'] = max(args.users, app.config['BATCH_REGISTER_MAX_USERS'])
+    app.config['PASSWORD_HASH_WORKERS'] = args.workers
+
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from flask_jwt_extended import create_access_token
+    from app.utils.password_batch import resolve_password_workers
+    from app.utils.rsa_utils import get_rsa_utils
+
+    with app.app_context():
+        admin_id, department_ids = _seed()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=admin_id)}'}
+        public_key = get_rsa_utils()._private_key.public_key()
+
+    def encrypt(password):
+        return base64.b64encode(public_key.encrypt(password.encode('utf-8'), padding.PKCS1v15())).decode('utf-8')
+
+    legacy_users = _users_payload(args.users, '1', department_ids, encrypt)
+    batch_users = _users_payload(args.users, '2', department_ids, encrypt)
+    print(f"学生 {args.users} 人（两组各一份），密码处理线程 {resolve_password_workers(args.workers)} 个\n")
+
+    client = app.test_client()
+    with app.app_context():
+        with measure('逐行注册'):
+            _legacy_register(legacy_users)
+
+        with measure('批量流水线'):
+            response = client.post('/api/admin/students/batch-register', json={'users': batch_users}, headers=headers)
+            assert response.status_code == 200, response.get_json()
+        result = response.get_json()
+        assert result['failed_count'] == 0, result['failed'][:5]
+
+        assert _created_users('1') == _created_users('2'), '两种实现创建的学生数据不一致'
+        print("\n两种实现创建的学生数据一致")
+
+
+if __name__ == '__main__':
+    main()
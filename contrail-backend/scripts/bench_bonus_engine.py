@@ -0,0 +1,112 @@
+"""
+自动加分引擎基准测试
+对比逐用户查询的旧实现与集合化批量实现（app.tasks._process_bonus）的耗时和 SQL 语句数，
+并校验两者奖励的用户集合一致。
+
+用法：
+    python scripts/bench_bonus_engine.py --departments 40 --students 50
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from bench_utils import create_bench_app, measure
+
+
+def _legacy_process_bonus(users, days_back, bonus_delta, bonus_reason):
+    """旧实现：逐用户两次查询（仅用于基准对比）"""
+    from app.extensions import db
+    from app.models import ScoreLog
+
+    awarded = []
+    check_start_time = datetime.utcnow() - timedelta(days=days_back)
+    for user in users:
+        has_deduction = ScoreLog.query.filter(
+            ScoreLog.user_id == user.id,
+            ScoreLog.delta < 0,
+            ScoreLog.create_time >= check_start_time
+        ).first()
+        if not has_deduction:
+            existing_bonus = ScoreLog.query.filter(
+                ScoreLog.user_id == user.id,
+                ScoreLog.delta == bonus_delta,
+                ScoreLog.reason == bonus_reason,
+                ScoreLog.type == ScoreLog.TYPE_SYSTEM,
+                ScoreLog.create_time >= check_start_time
+            ).first()
+            if not existing_bonus:
+                db.session.add(ScoreLog(
+                    user_id=user.id,
+                    delta=bonus_delta,
+                    reason=bonus_reason,
+                    type=ScoreLog.TYPE_SYSTEM
+                ))
+                awarded.append(user.id)
+    db.session.flush()
+    return awarded
+
+
+def _seed(departments, students):
+    from app.extensions import db
+    from app.models import Department, User, ScoreLog
+
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    for d in range(departments):
+        dept = Department(college='基准学院', class_name=f'班级{d}')
+        db.session.add(dept)
+        db.session.flush()
+        for s in range(students):
+            db.session.add(User(
+                id_card_no=f'{d:06d}{s:012d}',
+                name=f'学生{d}-{s}',
+                password_hash='x',
+                department_id=dept.id,
+            ))
+    db.session.flush()
+
+    logs = []
+    for user_id, in db.session.query(User.id).all():
+        # 约 30% 的学生近期有扣分，约 10% 的学生已经领过本周奖励
+        if rnd.random() < 0.3:
+            logs.append({'user_id': user_id, 'delta': -2, 'reason': '迟到', 'type': ScoreLog.TYPE_MANUAL,
+                         'create_time': now - timedelta(days=rnd.randint(0, 6))})
+        if rnd.random() < 0.1:
+            logs.append({'user_id': user_id, 'delta': 1, 'reason': '每周全勤奖励', 'type': ScoreLog.TYPE_SYSTEM,
+                         'create_time': now - timedelta(days=1)})
+    db.session.execute(ScoreLog.__table__.insert(), logs)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自动加分引擎基准测试')
+    parser.add_argument('--departments', type=int, default=40)
+    parser.add_argument('--students', type=int, default=50, help='每个部门的学生数')
+    args = parser.parse_args()
+
+    app, _ = create_bench_app()
+    with app.app_context():
+        from app.extensions import db
+        from app.models import Department, User
+        from app.tasks import _process_bonus
+
+        _seed(args.departments, args.students)
+        dept_ids = [d.id for d in Department.query.order_by(Department.id).all()]
+        print(f"部门 {len(dept_ids)} 个，学生 {User.query.count()} 人\n")
+
+        with measure('逐用户旧实现'):
+            legacy = []
+            for dept in Department.query.order_by(Department.id).all():
+                legacy += _legacy_process_bonus(dept.users, 7, 1, '每周全勤奖励')
+        db.session.rollback()
+
+        with measure('集合化实现'):
+            counts = _process_bonus(dept_ids, 7, 1, '每周全勤奖励')
+        db.session.rollback()
+
+        print(f"\n奖励人数：旧实现 {len(legacy)}，新实现 {sum(counts.values())}")
+        assert len(legacy) == sum(counts.values()), '两种实现的奖励结果不一致'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+证书批量审核基准测试
+以普通管理员身份，对比逐条调用 POST /api/admin/certificates/<id>/audit 与一次调用
+POST /api/admin/certificates/audit-batch 审核同一批证书的耗时和 SQL 语句数，
+并校验两者审核后的证书状态一致。
+
+用法：
+    python scripts/bench_cert_audit.py --items 500
+"""
+import argparse
+
+from bench_utils import create_bench_app, measure
+
+
+def _seed(items):
+    """创建一个部门、一个管理该部门的普通管理员，以及 items 条待审核证书"""
+    from app.extensions import db
+    from app.models import AdminUser, Certificate, Department, User
+
+    dept = Department(college='基准学院', class_name='一班')
+    db.session.add(dept)
+    db.session.flush()
+
+    admin = AdminUser(username='bench_admin', password_hash='x', name='基准管理员', role=AdminUser.ROLE_NORMAL)
+    admin.managed_departments.append(dept)
+    db.session.add(admin)
+
+    students = []
+    for s in range(max(items // 10, 1)):
+        student = User(id_card_no=f'{s:018d}', name=f'学生{s}', password_hash='x', department_id=dept.id)
+        db.session.add(student)
+        students.append(student)
+    db.session.flush()
+
+    for i in range(items * 2):
+        db.session.add(Certificate(
+            user_id=students[i % len(students)].id,
+            name='英语四级',
+            image_url=f'2024/01/bench_{i}.jpg',
+            status=Certificate.STATUS_PENDING,
+        ))
+    db.session.commit()
+    cert_ids = [cert_id for cert_id, in db.session.query(Certificate.id).order_by(Certificate.id).all()]
+    return admin.id, cert_ids[:items], cert_ids[items:]
+
+
+def _audit_items(cert_ids):
+    """每 5 条驳回 1 条，驳回原因两种"""
+    items = []
+    for i, cert_id in enumerate(cert_ids):
+        if i % 5 == 0:
+            items.append({'id': cert_id, 'action': 'reject', 'reject_reason': '图片不清晰' if i % 2 else '信息不符'})
+        else:
+            items.append({'id': cert_id, 'action': 'approve'})
+    return items
+
+
+def _statuses(cert_ids):
+    from app.models import Certificate
+    rows = Certificate.query.filter(Certificate.id.in_(cert_ids)).order_by(Certificate.id).all()
+    return [(cert.status, cert.reject_reason) for cert in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='证书批量审核基准测试')
+    parser.add_argument('--items', type=int, default=500)
+    args = parser.parse_args()
+
+    app, _ = create_bench_app()
+    # 逐条审核接口会生成图片链接：使用占位配置（签名不访问网络）
+    app.config['MINIO_ACCESS_KEY'] = app.config.get('MINIO_ACCESS_KEY') or 'bench-access-key'
+    app.config['MINIO_SECRET_KEY'] = app.config.get('MINIO_SECRET_KEY') or 'bench-secret-key'
+
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        admin_id, legacy_ids, batch_ids = _seed(args.items)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=admin_id)}'}
+    print(f"证书 {args.items} 条（两组各一份）\n")
+
+    client = app.test_client()
+    with app.app_context():
+        with measure('逐条审核'):
+            for item in _audit_items(legacy_ids):
+                response = client.post(f"/api/admin/certificates/{item.pop('id')}/audit", json=item, headers=headers)
+                assert response.status_code == 200, response.get_json()
+
+        with measure('批量审核'):
+            response = client.post('/api/admin/certificates/audit-batch',
+                                   json={'items': _audit_items(batch_ids)}, headers=headers)
+            assert response.status_code == 200, response.get_json()
+        summary = response.get_json()['summary']
+        print(f"\n批量审核结果：{summary}")
+
+        assert summary['failed'] == 0, '批量审核存在失败项'
+        assert _statuses(legacy_ids) == _statuses(batch_ids), '两种实现审核后的状态不一致'
+        print("两种实现审核后的证书状态一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+导出模板渲染基准测试
+对比每个学生重新解析模板（DocxTemplate(template_path)）与模板缓存
+（app.utils.export_render.load_export_template）的单人 Word 渲染耗时，
+并校验两者生成的 word/document.xml 一致。
+
+用法：
+    python scripts/bench_export_render.py --students 50
+"""
+import argparse
+import io
+import sys
+import time
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from docxtpl import DocxTemplate
+
+from app.models import ScoreLog
+from app.utils.export_render import build_student_snapshot, load_export_template
+
+TEMPLATE_PATH = project_root / 'app' / 'templates' / 'template_profile.docx'
+
+
+def _sample_snapshot(i):
+    """构造一个包含任职、获奖附录的学生快照（不需要数据库）"""
+    now = datetime.utcnow()
+    department = SimpleNamespace(id=1, college='基准学院', class_name='一班', grade='2024级')
+    user = SimpleNamespace(
+        id=i, name=f'学生{i}', id_card_no=f'11010120000101{i:03d}1', student_id=f'2024{i:04d}',
+        gpa=3.5, total_score=86, ethnicity='汉族', political_affiliation='共青团员',
+        birthplace='北京', phone='13800000000'
+    )
+    certs = [
+        SimpleNamespace(name='英语四级', extra_data={'score': 560}, upload_time=now),
+        SimpleNamespace(name='雅思IELTS', extra_data={'listening': 7, 'reading': 7, 'writing': 6, 'speaking': 6, 'total': 6.5},
+                        upload_time=now),
+    ]
+    certs += [
+        SimpleNamespace(name='任职情况', extra_data={'start_time': '2024-09', 'end_time': '2025-06', 'role': f'职务{k}',
+                                                 'collective_awards': '优秀班集体'}, upload_time=now)
+        for k in range(5)
+    ]
+    certs += [
+        SimpleNamespace(name='获奖情况', extra_data={'date': '2025-05-01', 'name': f'竞赛{k}', 'level': '省级',
+                                                 'rank': '一等奖', 'organizer': '教育厅'}, upload_time=now)
+        for k in range(5)
+    ]
+    logs = [
+        SimpleNamespace(delta=1 if k % 3 else -2, reason='日常考核', type=ScoreLog.TYPE_SYSTEM,
+                        create_time=now - timedelta(days=k))
+        for k in range(20)
+    ]
+    return build_student_snapshot(user, department, certs, logs)
+
+
+def _render_legacy(snapshot):
+    doc = DocxTemplate(str(TEMPLATE_PATH))
+    doc.render(snapshot['context'])
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _render_cached(snapshot):
+    doc, jinja_env = load_export_template(str(TEMPLATE_PATH))
+    doc.render(snapshot['context'], jinja_env)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _document_xml(docx_bytes):
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as z:
+        return z.read('word/document.xml')
+
+
+def _bench(label, render, snapshots):
+    outputs = []
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        outputs.append(render(snapshot))
+    seconds = time.perf_counter() - start
+    print(f"{label:<16} 总耗时 {seconds * 1000:>10.1f} ms，单人 {seconds * 1000 / len(snapshots):>8.2f} ms")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出模板渲染基准测试')
+    parser.add_argument('--students', type=int, default=50)
+    args = parser.parse_args()
+
+    snapshots = [_sample_snapshot(i) for i in range(args.students)]
+    print(f"模板 {TEMPLATE_PATH.name}，学生 {len(snapshots)} 人\n")
+
+    # 预热：首次加载缓存的耗时单独统计
+    start = time.perf_counter()
+    _render_cached(snapshots[0])
+    print(f"{'缓存首次加载':<16} 耗时 {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    legacy = _bench('逐人解析模板', _render_legacy, snapshots)
+    cached = _bench('模板缓存', _render_cached, snapshots)
+
+    for old, new in zip(legacy, cached):
+        assert _document_xml(old) == _document_xml(new), '两种实现生成的文档不一致'
+    print("\n生成的 word/document.xml 一致")
+
+
+if __name__ == '__main__':
+    main()
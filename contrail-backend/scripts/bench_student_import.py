@@ -0,0 +1,126 @@
+"""
+Excel 学生导入校验基准测试
+对比逐行 iterrows 校验（加载全表已注册身份证号/学号的旧实现）与按列校验 validate_import_rows
+处理同一份导入数据的耗时和 SQL 语句数，并校验两者的结果一致。
+
+不包含密码哈希（两种实现的哈希开销相同，新实现按 PASSWORD_HASH_WORKERS 并行）。
+
+用法：
+    python scripts/bench_student_import.py --rows 5000 --registered 20000
+"""
+import argparse
+
+from bench_utils import create_bench_app, measure
+
+
+def _seed(registered):
+    """创建 registered 个已注册学生（用于唯一性检查）"""
+    from app.extensions import db
+    from app.models import Department
+    from app.utils.student_import import bulk_insert_users
+
+    department = Department(college='基准学院', class_name='一班')
+    db.session.add(department)
+    db.session.flush()
+    bulk_insert_users([
+        {'id_card_no': f'{i:018d}', 'student_id': f'{i:012d}', 'name': f'学生{i}',
+         'password_hash': 'x', 'department_id': department.id}
+        for i in range(registered)
+    ])
+    db.session.commit()
+
+
+def _import_frame(rows, registered):
+    """生成导入数据：约 1/10 已注册、1/50 文件内重复、1/100 格式错误"""
+    import pandas as pd
+
+    student_ids, names, id_card_nos = [], [], []
+    for i in range(rows):
+        if i % 10 == 0:
+            number = i % max(registered, 1)
+        elif i % 50 == 1:
+            number = registered + i - 2
+        else:
+            number = registered + i
+        id_card_no = f'{number:018d}'
+        if i % 100 == 7:
+            id_card_no = id_card_no[:10]
+        student_ids.append(f'{number:012d}')
+        names.append(f'导入学生{i}')
+        id_card_nos.append(id_card_no)
+    return pd.DataFrame({'学号': student_ids, '姓名': names, '身份证号': id_card_nos})
+
+
+def _legacy_validate(df):
+    """旧实现：加载全表已注册身份证号/学号，逐行 iterrows 校验"""
+    import pandas as pd
+    from app.models import User
+
+    existing_student_ids = {
+        str(sid) for sid, in User.query.with_entities(User.student_id).filter(
+            User.student_id.isnot(None), User.student_id != ''
+        ).all() if sid and str(sid).strip()
+    }
+    existing_id_cards = {str(card) for card, in User.query.with_entities(User.id_card_no).all() if card}
+
+    new_students, skip_count, errors = [], 0, []
+    for index, row in df.iterrows():
+        row_num = index + 2
+        student_id = str(row['学号']).strip() if pd.notna(row['学号']) else ''
+        name = str(row['姓名']).strip() if pd.notna(row['姓名']) else ''
+        id_card_no = str(row['身份证号']).strip() if pd.notna(row['身份证号']) else ''
+        if not name:
+            errors.append({'row': row_num, 'student_id': student_id, 'error': '姓名为空'})
+            continue
+        if not id_card_no:
+            errors.append({'row': row_num, 'student_id': student_id, 'error': '身份证号为空'})
+            continue
+        id_card_no = id_card_no.upper()
+        if len(id_card_no) != 18:
+            errors.append({'row': row_num, 'student_id': student_id, 'id_card_no': id_card_no,
+                           'error': '身份证号必须为18位'})
+            continue
+        if (not id_card_no[:17].isdigit()) or (not (id_card_no[17].isdigit() or id_card_no[17] == 'X')):
+            errors.append({'row': row_num, 'student_id': student_id, 'id_card_no': id_card_no,
+                           'error': '身份证号格式不正确'})
+            continue
+        if id_card_no in existing_id_cards or (student_id and student_id in existing_student_ids):
+            skip_count += 1
+            continue
+        if student_id and not student_id.isdigit():
+            errors.append({'row': row_num, 'student_id': student_id, 'error': '学号必须为纯数字'})
+            continue
+        new_students.append({'row': row_num, 'id_card_no': id_card_no, 'student_id': student_id or None, 'name': name})
+        if student_id:
+            existing_student_ids.add(student_id)
+        existing_id_cards.add(id_card_no)
+    return new_students, skip_count, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Excel 学生导入校验基准测试')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--registered', type=int, default=20000)
+    args = parser.parse_args()
+
+    app, _ = create_bench_app()
+    from app.utils.student_import import validate_import_rows
+
+    with app.app_context():
+        _seed(args.registered)
+        df = _import_frame(args.rows, args.registered)
+        print(f"导入 {args.rows} 行，已注册学生 {args.registered} 人\n")
+
+        with measure('逐行校验'):
+            legacy = _legacy_validate(df)
+        with measure('按列校验'):
+            result = validate_import_rows(df)
+
+        new_students, skip_count, errors = result
+        print(f"\n新增 {len(new_students)} 人，跳过 {skip_count} 行，错误 {len(errors)} 行")
+        assert legacy == result, '两种实现的校验结果不一致'
+        print("两种实现的校验结果一致")
+
+
+if __name__ == '__main__':
+    main()
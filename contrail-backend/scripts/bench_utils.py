@@ -0,0 +1,69 @@
+"""
+基准测试公共工具
+- 创建使用临时 SQLite 数据库的应用实例（自动执行迁移，关闭 SQL 回显）
+- 统计代码块内执行的 SQL 语句数量与耗时
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def create_bench_app():
+    """
+    创建基准测试用的应用实例（临时 SQLite 文件数据库）
+
+    Returns:
+        (app, db_path)
+    """
+    fd, db_path = tempfile.mkstemp(prefix='contrail_bench_', suffix='.db')
+    os.close(fd)
+    os.remove(db_path)
+    os.environ['DEV_DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from app import create_app
+    from app.extensions import db, scheduler
+
+    app = create_app('development')
+    # 基准测试不需要定时任务和 SQL 回显
+    scheduler.shutdown(wait=False)
+    with app.app_context():
+        db.engine.echo = False
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+    return app, db_path
+
+
+@contextmanager
+def measure(label):
+    """
+    统计代码块执行的 SQL 语句数量与耗时，并在结束时打印
+
+    使用方式：
+        with measure('旧实现') as stats:
+            ...
+        stats['queries'], stats['seconds']
+    """
+    from sqlalchemy import event
+    from app.extensions import db
+
+    stats = {'queries': 0, 'seconds': 0.0}
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        stats['queries'] += 1
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _count)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats['seconds'] = time.perf_counter() - start
+        event.remove(engine, 'before_cursor_execute', _count)
+        print(f"{label:<16} 耗时 {stats['seconds'] * 1000:>10.1f} ms，SQL 语句 {stats['queries']:>6} 条")
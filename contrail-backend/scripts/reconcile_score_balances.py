@@ -0,0 +1,52 @@
+"""
+积分物化余额对账脚本
+以积分流水（score_logs）为准，重建 users.total_delta 并报告偏差
+
+用法：
+    python scripts/reconcile_score_balances.py            # 对账并修复
+    python scripts/reconcile_score_balances.py --dry-run  # 仅报告偏差，不修改数据
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from app import create_app
+from app.utils.score_ledger import reconcile_score_balances
+
+# 加载环境变量
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='积分物化余额对账')
+    parser.add_argument('--dry-run', action='store_true', help='仅报告偏差，不修改数据')
+    args = parser.parse_args()
+
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app = create_app(config_name)
+
+    with app.app_context():
+        drifts = reconcile_score_balances(fix=not args.dry_run)
+
+    if not drifts:
+        print("✅ 所有用户的物化余额与积分流水一致")
+        return
+
+    print(f"⚠️  发现 {len(drifts)} 个用户的物化余额与积分流水不一致：")
+    for item in drifts:
+        print(f"   用户ID {item['user_id']}: 物化余额 {item['cached']}，流水合计 {item['actual']}，偏差 {item['drift']:+d}")
+
+    if args.dry_run:
+        print("\n（dry-run 模式，未修改数据；去掉 --dry-run 重新运行以修复）")
+    else:
+        print("\n✅ 已按积分流水重建上述用户的物化余额")
+
+
+if __name__ == '__main__':
+    main()